@@ -1,9 +1,13 @@
 import streamlit as st
 import database
 from models import Turma, Professor, Disciplina, Sala
+from session_state import init_session_state
+from importacao import faixa
 
 st.set_page_config(page_title="Cadastros", page_icon="➕")
 
+init_session_state()
+
 st.title("➕ Cadastro de Dados")
 
 tab1, tab2, tab3, tab4 = st.tabs(["Turmas", "Professores", "Disciplinas", "Salas"])
@@ -12,17 +16,19 @@ tab1, tab2, tab3, tab4 = st.tabs(["Turmas", "Professores", "Disciplinas", "Salas
 with tab1:
     st.subheader("Cadastrar Turma")
     
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
     with col1:
         nome_turma = st.text_input("Nome da Turma", placeholder="Ex: 6anoA")
     with col2:
-        serie = st.selectbox("Série", ["6", "7", "8", "9", "1em", "2em", "3em"])
+        semestre = st.number_input("Semestre", *faixa('turmas', 'semestre'), value=1)
     with col3:
-        turno = st.selectbox("Turno", ["matutino", "vespertino", "noturno"])
+        curso = st.text_input("Curso", placeholder="Ex: EF_II")
+    with col4:
+        alunos = st.number_input("Alunos", *faixa('turmas', 'quantidade_alunos'), value=30)
     
     if st.button("✅ Adicionar Turma", key="btn_turma"):
-        if nome_turma:
-            nova_turma = Turma(nome=nome_turma, serie=serie, turno=turno)
+        if nome_turma and curso:
+            nova_turma = Turma(nome=nome_turma, semestre=semestre, curso=curso, quantidade_alunos=alunos)
             st.session_state.turmas.append(nova_turma)
             database.salvar_turmas(st.session_state.turmas)
             st.success(f"✅ Turma {nome_turma} cadastrada!")
@@ -36,8 +42,9 @@ with tab1:
         for t in st.session_state.turmas:
             df_turmas.append({
                 "Nome": t.nome,
-                "Série": t.serie,
-                "Turno": t.turno
+                "Semestre": t.semestre,
+                "Curso": t.curso,
+                "Alunos": t.quantidade_alunos
             })
         
         import pandas as pd
@@ -105,38 +112,27 @@ with tab2:
 with tab3:
     st.subheader("Cadastrar Disciplina")
     
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        nome_disc = st.text_input("Nome da Disciplina", placeholder="Ex: Português")
-    with col2:
-        carga_semanal = st.number_input("Carga Semanal (aulas/semana)", min_value=1, max_value=10, value=2)
-    with col3:
-        tipo = st.selectbox("Tipo", ["media", "pesada", "leve"])
-    
     col1, col2 = st.columns(2)
     with col1:
-        cor_fundo = st.color_picker("Cor Fundo", "#4A90E2")
+        nome_disc = st.text_input("Nome da Disciplina", placeholder="Ex: Português")
     with col2:
-        cor_fonte = st.color_picker("Cor Fonte", "#FFFFFF")
+        carga_semanal = st.number_input("Carga Semanal (aulas/semana)", *faixa('disciplinas', 'carga_semanal'), value=2)
     
-    series_selecionadas = st.multiselect("Séries que usam:", ["6", "7", "8", "9", "1em", "2em", "3em"])
+    turmas_selecionadas = st.multiselect("Turmas que usam:", [t.nome for t in st.session_state.turmas])
     
     if st.button("✅ Adicionar Disciplina", key="btn_disc"):
-        if nome_disc and series_selecionadas:
+        if nome_disc and turmas_selecionadas:
             nova_disc = Disciplina(
                 nome=nome_disc,
                 carga_semanal=carga_semanal,
-                tipo=tipo,
-                turmas=series_selecionadas,
-                cor_fundo=cor_fundo,
-                cor_fonte=cor_fonte
+                turmas=turmas_selecionadas
             )
             st.session_state.disciplinas.append(nova_disc)
             database.salvar_disciplinas(st.session_state.disciplinas)
             st.success(f"✅ Disciplina {nome_disc} cadastrada!")
             st.rerun()
         else:
-            st.error("Preencha nome e selecione séries")
+            st.error("Preencha nome e selecione turmas")
     
     st.divider()
     st.subheader("Disciplinas Cadastradas")
@@ -148,8 +144,7 @@ with tab3:
             df_discs.append({
                 "Nome": d.nome,
                 "Carga": d.carga_semanal,
-                "Tipo": d.tipo,
-                "Séries": ", ".join(d.turmas)
+                "Turmas": ", ".join(d.turmas)
             })
         
         st.dataframe(pd.DataFrame(df_discs), use_container_width=True, hide_index=True)
@@ -168,17 +163,19 @@ with tab3:
 with tab4:
     st.subheader("Cadastrar Sala")
     
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
     with col1:
         nome_sala = st.text_input("Nome da Sala", placeholder="Ex: Sala 1")
     with col2:
-        capacidade = st.number_input("Capacidade", min_value=10, max_value=200, value=30)
+        capacidade = st.number_input("Capacidade", *faixa('salas', 'capacidade'), value=30)
     with col3:
-        tipo_sala = st.selectbox("Tipo", ["normal", "laboratorio", "auditorio", "informatica"])
+        predio = st.text_input("Prédio", placeholder="Ex: Bloco A")
+    with col4:
+        andar = st.number_input("Andar", *faixa('salas', 'andar'), value=0)
     
     if st.button("✅ Adicionar Sala", key="btn_sala"):
-        if nome_sala:
-            nova_sala = Sala(nome=nome_sala, capacidade=capacidade, tipo=tipo_sala)
+        if nome_sala and predio:
+            nova_sala = Sala(nome=nome_sala, capacidade=capacidade, predio=predio, andar=andar)
             st.session_state.salas.append(nova_sala)
             database.salvar_salas(st.session_state.salas)
             st.success(f"✅ Sala {nome_sala} cadastrada!")
@@ -194,7 +191,8 @@ with tab4:
             df_salas.append({
                 "Nome": s.nome,
                 "Capacidade": s.capacidade,
-                "Tipo": s.tipo
+                "Prédio": s.predio,
+                "Andar": s.andar
             })
         
         st.dataframe(pd.DataFrame(df_salas), use_container_width=True, hide_index=True)
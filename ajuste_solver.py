@@ -0,0 +1,270 @@
+"""
+ajuste_solver.py - Exportação, replay e ajuste de parâmetros do CP-SAT
+Os motores podem gravar o modelo montado (texto do proto) e os parâmetros
+em data/modelos/<chave>-<motor>.*; o replay roda esses modelos sob uma
+grade de parâmetros, em paralelo, e grava os melhores por classe de
+tamanho em data/modelos/ajuste.json, que os motores usam como padrão.
+Uso:
+    python -m ajuste_solver data/modelos -t 20 -p 4 [--completa]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# ============================================================================
+# CONFIGURAÇÃO
+# ============================================================================
+
+MODELOS_DIR = Path("data") / "modelos"
+AJUSTE_FILE = MODELOS_DIR / "ajuste.json"
+
+# Classe da instância pelo número de variáveis do modelo
+CLASSES = ((10_000, 'pequeno'), (100_000, 'medio'), (float('inf'), 'grande'))
+
+# Conjuntos testados por padrão (um eixo por vez a partir do padrão do CP-SAT)
+CONJUNTOS = {
+    'padrao': {},
+    '1_worker': {'num_workers': 1},
+    '8_workers': {'num_workers': 8},
+    'busca_fixa': {'search_branching': 'FIXED_SEARCH'},
+    'portfolio': {'search_branching': 'PORTFOLIO_SEARCH'},
+    'linearizacao_0': {'linearization_level': 0},
+    'linearizacao_2': {'linearization_level': 2},
+    'sem_lns': {'use_lns': False},
+    'so_lns': {'use_lns_only': True},
+}
+
+# Eixos da grade completa (--completa): produto cartesiano
+EIXOS = {
+    'num_workers': (1, 8),
+    'search_branching': ('AUTOMATIC_SEARCH', 'FIXED_SEARCH', 'PORTFOLIO_SEARCH'),
+    'linearization_level': (0, 1, 2),
+    'use_lns': (True, False),
+}
+
+RESOLVIDO = ('OPTIMAL', 'FEASIBLE')
+
+# ============================================================================
+# PARÂMETROS
+# ============================================================================
+
+def _texto(parametros: Dict) -> str:
+    """Dict → formato texto do SatParameters (enums pelo nome, booleanos minúsculos)"""
+    partes = []
+    for nome, valor in parametros.items():
+        if isinstance(valor, bool):
+            valor = 'true' if valor else 'false'
+        partes.append(f"{nome}: {valor}")
+    return '\n'.join(partes)
+
+def aplicar_parametros(solver, parametros: Dict) -> None:
+    """Acrescenta os parâmetros ao CpSolver (mantém os já definidos, como o tempo máximo)"""
+    if not parametros:
+        return
+    sat = solver.parameters
+    if hasattr(sat, 'merge_text_format'):
+        sat.merge_text_format(_texto(parametros))
+    else:  # OR-Tools antigo: SatParameters é um protobuf puro
+        from google.protobuf import text_format
+        text_format.Merge(_texto(parametros), sat)
+
+def classe_instancia(variaveis: int) -> str:
+    for limite, nome in CLASSES:
+        if variaveis < limite:
+            return nome
+    return CLASSES[-1][1]
+
+def parametros_ajustados(variaveis: int) -> Dict:
+    """Melhores parâmetros gravados para a classe do modelo ({} sem ajuste)"""
+    if not AJUSTE_FILE.exists():
+        return {}
+    try:
+        with open(AJUSTE_FILE, 'r', encoding='utf-8') as f:
+            ajuste = json.load(f)
+    except Exception as e:
+        print(f"❌ Erro ler ajuste do solver: {e}")
+        return {}
+    return ajuste.get(classe_instancia(variaveis), {}).get('parametros', {})
+
+def montar_grade(completa: bool = False) -> Dict[str, Dict]:
+    """Conjuntos nomeados (padrão) ou o produto cartesiano de EIXOS"""
+    if not completa:
+        return dict(CONJUNTOS)
+    grade = {}
+    for valores in itertools.product(*EIXOS.values()):
+        parametros = dict(zip(EIXOS, valores))
+        grade['|'.join(f"{k}={v}" for k, v in parametros.items())] = parametros
+    return grade
+
+# ============================================================================
+# EXPORTAÇÃO
+# ============================================================================
+
+def exportar_modelo(model, solver, destino: Path = None, chave: str = None, motor: str = 'simples',
+                    **extra) -> Path:
+    """
+    Grava o modelo (texto do CpModelProto) e um JSON com os parâmetros e o tamanho
+    Retorna: caminho do modelo
+    """
+    destino = Path(destino or MODELOS_DIR)
+    destino.mkdir(parents=True, exist_ok=True)
+    base = f"{chave or datetime.now().strftime('%Y%m%d%H%M%S')}-{motor}"
+    arquivo = destino / f"{base}.txt"
+    model.ExportToFile(str(arquivo))
+    proto = model.Proto()
+    meta = {
+        'chave': chave,
+        'motor': motor,
+        'criado_em': datetime.now().isoformat(timespec='seconds'),
+        'variaveis': len(proto.variables),
+        'restricoes': len(proto.constraints),
+        'classe': classe_instancia(len(proto.variables)),
+        'parametros': str(solver.parameters),
+        **extra,
+    }
+    with open(destino / f"{base}.json", 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return arquivo
+
+def listar_modelos(origem: Path) -> List[Path]:
+    """Modelos exportados numa pasta (ou o próprio arquivo)"""
+    origem = Path(origem)
+    if origem.is_file():
+        return [origem]
+    return sorted(p for p in origem.glob("*.txt") if p.with_suffix('.json').exists())
+
+def carregar_modelo(arquivo: Path):
+    """Reconstrói o CpModel a partir do texto exportado"""
+    from ortools.sat.python import cp_model
+    modelo = cp_model.CpModel()
+    texto = Path(arquivo).read_text(encoding='utf-8')
+    proto = modelo.Proto()
+    if hasattr(proto, 'parse_text_format'):
+        proto.parse_text_format(texto)
+    else:
+        from google.protobuf import text_format
+        text_format.Parse(texto, proto)
+    return modelo
+
+# ============================================================================
+# REPLAY
+# ============================================================================
+
+def replay(arquivo: str, nome: str, parametros: Dict, tempo: float) -> Dict:
+    """Resolve um modelo exportado com um conjunto de parâmetros (roda em processo separado)"""
+    from ortools.sat.python import cp_model
+
+    arquivo = Path(arquivo)
+    with open(arquivo.with_suffix('.json'), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    resultado = {'modelo': arquivo.stem, 'classe': meta['classe'], 'conjunto': nome,
+                 'parametros': parametros, 'status': None, 'segundos': None, 'objetivo': None, 'erro': None}
+    try:
+        modelo = carregar_modelo(arquivo)
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = tempo
+        aplicar_parametros(solver, parametros)
+        inicio = time.perf_counter()
+        status = solver.Solve(modelo)
+        resultado.update(status=solver.StatusName(status), segundos=round(time.perf_counter() - inicio, 3),
+                         conflitos=solver.NumConflicts())
+        if resultado['status'] in RESOLVIDO:
+            resultado['objetivo'] = solver.ObjectiveValue()
+    except Exception as e:
+        resultado['erro'] = str(e)
+    return resultado
+
+def ajustar(modelos: List[Path], grade: Dict[str, Dict], tempo: float,
+            processos: Optional[int] = None) -> List[Dict]:
+    """Roda cada modelo com cada conjunto de parâmetros, em paralelo"""
+    tarefas = [(str(m), nome, parametros) for m in modelos for nome, parametros in grade.items()]
+    processos = processos or max(1, (os.cpu_count() or 1) // 2)
+    resultados = []
+    with ProcessPoolExecutor(max_workers=min(processos, len(tarefas)) or 1) as executor:
+        futuros = [executor.submit(replay, m, nome, parametros, tempo) for m, nome, parametros in tarefas]
+        for futuro in as_completed(futuros):
+            r = futuro.result()
+            resultados.append(r)
+            marca = "❌" if r['erro'] else ("✅" if r['status'] in RESOLVIDO else "⏱️")
+            print(f"{marca} {r['modelo']} · {r['conjunto']}: {r['status'] or r['erro']} {r['segundos'] or ''}",
+                  flush=True)
+    return resultados
+
+def melhores_por_classe(resultados: List[Dict]) -> Dict[str, Dict]:
+    """
+    Para cada classe, o conjunto que resolve mais modelos e, no empate,
+    com a menor mediana de tempo
+    """
+    por_classe: Dict[str, Dict[str, List[Dict]]] = {}
+    for r in resultados:
+        por_classe.setdefault(r['classe'], {}).setdefault(r['conjunto'], []).append(r)
+
+    melhores = {}
+    for classe, conjuntos in por_classe.items():
+        linhas = []
+        for nome, rs in conjuntos.items():
+            resolvidos = [r for r in rs if r['status'] in RESOLVIDO]
+            tempos = [r['segundos'] for r in rs if r['segundos'] is not None]
+            linhas.append((-len(resolvidos), statistics.median(tempos) if tempos else float('inf'), nome, rs))
+        faltam, mediana, nome, rs = min(linhas, key=lambda l: l[:2])
+        melhores[classe] = {'conjunto': nome, 'parametros': rs[0]['parametros'], 'resolvidos': -faltam,
+                            'modelos': len(rs), 'mediana_s': round(mediana, 3)}
+    return melhores
+
+def gravar_ajuste(melhores: Dict[str, Dict], destino: Path = None) -> Path:
+    """Mescla os melhores conjuntos no arquivo de ajuste lido pelos motores"""
+    destino = Path(destino or AJUSTE_FILE)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    atual = {}
+    if destino.exists():
+        with open(destino, 'r', encoding='utf-8') as f:
+            atual = json.load(f)
+    atual.update(melhores)
+    temporario = destino.with_suffix('.json.tmp')
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(atual, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, destino)
+    return destino
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m ajuste_solver",
+                                     description="Replay de modelos CP-SAT exportados sob uma grade de parâmetros")
+    parser.add_argument('origem', type=Path, nargs='?', default=MODELOS_DIR, help="pasta ou arquivo .txt")
+    parser.add_argument('-t', '--tempo', type=float, default=20.0, help="tempo máximo por execução (s)")
+    parser.add_argument('-p', '--processos', type=int, default=None, help="execuções em paralelo")
+    parser.add_argument('--completa', action='store_true', help="produto cartesiano de todos os eixos")
+    parser.add_argument('--nao-gravar', action='store_true', help=f"não atualiza {AJUSTE_FILE}")
+    args = parser.parse_args(argv)
+
+    modelos = listar_modelos(args.origem)
+    if not modelos:
+        print(f"⚠️ Nenhum modelo exportado em {args.origem}")
+        return 1
+    grade = montar_grade(args.completa)
+    print(f"🚀 {len(modelos)} modelo(s) × {len(grade)} conjunto(s), {args.tempo:g}s cada", flush=True)
+
+    resultados = ajustar(modelos, grade, args.tempo, args.processos)
+    melhores = melhores_por_classe(resultados)
+    for classe, m in melhores.items():
+        print(f"🏁 {classe}: {m['conjunto']} ({m['resolvidos']}/{m['modelos']} resolvidos, "
+              f"mediana {m['mediana_s']}s) {m['parametros']}")
+    if not args.nao_gravar:
+        print(f"💾 {gravar_ajuste(melhores)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
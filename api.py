@@ -0,0 +1,464 @@
+"""
+api.py - API HTTP/JSON local para o cadastro e o solver (sem Streamlit)
+Uso:
+    python -m api --porta 8765
+Rotas (<escola> = id de escolas.py; 'padrao' = data/):
+    GET    /escolas
+    GET    /escolas/<escola>/<entidade>           lista (ETag = geração do banco)
+    GET    /escolas/<escola>/<entidade>/<id>      uma entidade (ETag = versão)
+    POST   /escolas/<escola>/<entidade>           inclui
+    PUT    /escolas/<escola>/<entidade>/<id>      edita (If-Match: versão; 409 em conflito)
+    DELETE /escolas/<escola>/<entidade>/<id>      remove (If-Match: versão)
+    POST   /escolas/<escola>/solves               {"motor", "tempo", "horarios"} → 202 + tarefa
+    GET    /tarefas/<id>                          situação da tarefa de solve
+    GET    /escolas/<escola>/grade                ?campo=turma&nome=1A&versao=... (gzip)
+    GET    /                                      restricoes.html
+Cada requisição roda na sua thread e os solves vão para a fila de
+escolas.py, então um solve longo nunca bloqueia as leituras
+"""
+
+import argparse
+import gzip
+import json
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import armazem_grades
+import database
+import instrumentacao
+from diario import ConflitoVersao, ENTIDADES, UPSERT, REMOVER
+from escolas import escolas, fila, CotaExcedida, Escola
+from models import HORARIOS_REAIS, MAX_HORARIOS_DIA
+
+# ============================================================================
+# CONFIGURAÇÃO
+# ============================================================================
+
+HOST = '127.0.0.1'
+PORTA = 8765
+GZIP_MINIMO = 1024            # bytes; respostas menores vão sem compressão
+CORPO_MAXIMO = 1024 * 1024    # bytes aceitos num POST/PUT
+MAX_TAREFAS = 200             # tarefas de solve lembradas (as mais antigas saem)
+TEMPO_MAXIMO = 300.0          # segundos de solver aceitos por pedido
+PAGINA_INICIAL = Path(__file__).parent / "restricoes.html"
+
+# Nome do motor (o mesmo gravado pela aba Grade nas opções) → motor do cli
+MOTORES = {
+    'simple_scheduler': 'simples',
+    'intervalos': 'intervalos',
+}
+
+class ErroAPI(Exception):
+    """Erro com status HTTP (vira {"erro": ...} na resposta)"""
+
+    def __init__(self, status: int, mensagem: str, **extra):
+        super().__init__(mensagem)
+        self.status = status
+        self.extra = extra
+
+# ============================================================================
+# TAREFAS DE SOLVE
+# ============================================================================
+
+_tarefas: 'OrderedDict[str, Dict]' = OrderedDict()
+_lock_tarefas = threading.Lock()
+
+def _resolver(escola: Escola, motor: str, tempo: float, horarios: int) -> Dict:
+    """Roda na fila (banco da escola ativo): resolve, valida e grava a versão"""
+    from cli import MOTORES as MOTORES_CLI
+    from validador import validar_grade
+
+    registro = escola.registro()
+    opcoes = armazem_grades.opcoes_chave(motor, horarios)
+    chave = armazem_grades.chave_entrada(*registro.listas(), opcoes)
+    grade = MOTORES_CLI[MOTORES[motor]](registro, {'tempo': tempo, 'chave': chave, 'horarios': horarios})
+    relatorio = validar_grade(grade, *registro.listas(), n_horarios=horarios)
+    versao = None
+    if relatorio.valido and grade.aulas:
+        versao = armazem_grades.salvar_grade(grade, chave, opcoes, validacao=relatorio.contagem())
+        database.registrar_grade(grade, chave=chave, versao=versao, origem='api')
+    return {'versao': versao, 'aulas': len(grade.aulas), 'valido': relatorio.valido,
+            'validacao': relatorio.contagem()}
+
+def submeter_solve(escola: Escola, motor: str, tempo: float, horarios: int = len(HORARIOS_REAIS)) -> Dict:
+    if motor not in MOTORES:
+        raise ErroAPI(400, f"Motor desconhecido: {motor} (use {', '.join(MOTORES)})")
+    try:
+        futuro = fila.submeter(escola, _resolver, escola, motor, tempo, horarios)
+    except CotaExcedida as e:
+        raise ErroAPI(429, str(e))
+    tarefa = {'id': uuid.uuid4().hex[:12], 'escola': escola.id, 'motor': motor, 'horarios': horarios,
+              'criado_em': datetime.now().isoformat(timespec='seconds'), 'futuro': futuro}
+    with _lock_tarefas:
+        _tarefas[tarefa['id']] = tarefa
+        while len(_tarefas) > MAX_TAREFAS:
+            _tarefas.popitem(last=False)
+    return situacao_tarefa(tarefa)
+
+def situacao_tarefa(tarefa: Dict) -> Dict:
+    futuro = tarefa['futuro']
+    situacao = {k: v for k, v in tarefa.items() if k != 'futuro'}
+    if not futuro.done():
+        situacao['status'] = 'rodando' if futuro.running() else 'aguardando'
+    elif futuro.cancelled():
+        situacao['status'] = 'cancelada'
+    elif futuro.exception() is not None:
+        situacao.update(status='erro', erro=str(futuro.exception()))
+    else:
+        situacao.update(status='concluida', resultado=futuro.result())
+    return situacao
+
+# ============================================================================
+# VISÃO DA GRADE
+# ============================================================================
+
+@lru_cache(maxsize=64)
+def _corpo_grade(escola_id: str, versao: str, campo: Optional[str], nome: Optional[str]) -> Tuple[bytes, bytes]:
+    """
+    JSON da grade (filtrada) e a versão gzip; a versão gravada nunca muda
+    Chave pelo id da escola: o objeto Escola pode ser recriado depois do despejo
+    """
+    from cli import aula_para_dict
+
+    escola = escolas.abrir(escola_id)
+    with database.usar_banco(escola.banco):
+        compacta = armazem_grades.carregar_compacta(versao)
+    if compacta is None:
+        raise ErroAPI(404, f"Grade não encontrada: {versao}")
+    aulas = compacta.para_grade().aulas
+    if campo:
+        aulas = [a for a in aulas if getattr(a, campo) == nome]
+    corpo = json.dumps({'versao': versao, 'campo': campo, 'nome': nome,
+                        'aulas': [dict(aula_para_dict(a), id=a.id) for a in aulas]},
+                       ensure_ascii=False).encode('utf-8')
+    return corpo, gzip.compress(corpo, compresslevel=6)
+
+# ============================================================================
+# HANDLER
+# ============================================================================
+
+ROTAS = [
+    ('GET', re.compile(r'^/$'), 'pagina_inicial'),
+    ('GET', re.compile(r'^/escolas$'), 'listar_escolas'),
+    ('GET', re.compile(r'^/tarefas/(?P<tarefa>[0-9a-f]+)$'), 'ler_tarefa'),
+    ('GET', re.compile(r'^/escolas/(?P<escola>[^/]+)/grade$'), 'ler_grade'),
+    ('POST', re.compile(r'^/escolas/(?P<escola>[^/]+)/solves$'), 'criar_solve'),
+    ('GET', re.compile(r'^/escolas/(?P<escola>[^/]+)/(?P<entidade>\w+)$'), 'listar_entidades'),
+    ('POST', re.compile(r'^/escolas/(?P<escola>[^/]+)/(?P<entidade>\w+)$'), 'incluir'),
+    ('GET', re.compile(r'^/escolas/(?P<escola>[^/]+)/(?P<entidade>\w+)/(?P<id>[^/]+)$'), 'ler_entidade'),
+    ('PUT', re.compile(r'^/escolas/(?P<escola>[^/]+)/(?P<entidade>\w+)/(?P<id>[^/]+)$'), 'editar'),
+    ('DELETE', re.compile(r'^/escolas/(?P<escola>[^/]+)/(?P<entidade>\w+)/(?P<id>[^/]+)$'), 'remover'),
+]
+
+def _etag_versao(valor) -> str:
+    return f'"{valor}"'
+
+def _etags(valor: Optional[str]) -> set:
+    """'W/"a", "b"' → {'a', 'b'} (comparação fraca, como pede o If-None-Match)"""
+    return {e.strip().removeprefix('W/').strip('"') for e in (valor or '').split(',') if e.strip()}
+
+def _versao_if_match(valor: Optional[str]) -> Optional[int]:
+    """If-Match: "7" → 7 (None se ausente; 400 se não for uma versão)"""
+    if valor is None:
+        return None
+    try:
+        return int(valor.strip().removeprefix('W/').strip('"'))
+    except ValueError:
+        raise ErroAPI(400, f"If-Match inválido: {valor}")
+
+
+class ManipuladorAPI(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'GeleiaAPI/1.0'
+
+    # ===== DESPACHO =====
+
+    def _despachar(self, metodo: str) -> None:
+        inicio = time.perf_counter()
+        url = urlparse(self.path)
+        self.consulta = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        status = 500
+        try:
+            for verbo, padrao, nome in ROTAS:
+                encontrado = padrao.match(url.path)
+                if encontrado and verbo == metodo:
+                    status = getattr(self, nome)(**encontrado.groupdict())
+                    break
+            else:
+                permitidos = sorted({v for v, p, _ in ROTAS if p.match(url.path)})
+                if permitidos:
+                    raise ErroAPI(405, f"Método não permitido: {metodo} {url.path}", permitidos=permitidos)
+                raise ErroAPI(404, f"Rota não encontrada: {metodo} {url.path}")
+        except ErroAPI as e:
+            status = e.status
+            self._json(e.status, {'erro': str(e), **e.extra})
+        except Exception as e:
+            print(f"❌ Erro API {metodo} {url.path}: {e}")
+            self._json(500, {'erro': str(e)})
+        finally:
+            instrumentacao.registrar(f"api.{metodo.lower()}", time.perf_counter() - inicio,
+                                     rota=url.path, status=status)
+
+    def do_GET(self):
+        self._despachar('GET')
+
+    def do_POST(self):
+        self._despachar('POST')
+
+    def do_PUT(self):
+        self._despachar('PUT')
+
+    def do_DELETE(self):
+        self._despachar('DELETE')
+
+    def log_message(self, formato, *args):
+        pass  # medições vão para instrumentacao
+
+    # ===== RESPOSTA =====
+
+    def _confere(self, etag: str) -> bool:
+        """O cliente já tem essa versão (If-None-Match)"""
+        return _etags(etag) <= _etags(self.headers.get('If-None-Match'))
+
+    def _nao_modificado(self, etag: str) -> int:
+        self.send_response(304)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+        return 304
+
+    def _enviar(self, status: int, corpo: bytes, tipo: str, etag: str = None, comprimido: bytes = None) -> int:
+        """Envia o corpo (gzip se o cliente aceita e compensa); 304 se o ETag confere"""
+        if etag and status == 200 and self._confere(etag):
+            return self._nao_modificado(etag)
+        aceita_gzip = 'gzip' in (self.headers.get('Accept-Encoding') or '')
+        if aceita_gzip and len(corpo) >= GZIP_MINIMO:
+            corpo = comprimido if comprimido is not None else gzip.compress(corpo, compresslevel=6)
+        else:
+            aceita_gzip = False
+        self.send_response(status)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.send_header('Vary', 'Accept-Encoding')
+        if aceita_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')  # sempre revalidar com If-None-Match
+        self.end_headers()
+        self.wfile.write(corpo)
+        return status
+
+    def _json(self, status: int, dados, etag: str = None) -> int:
+        corpo = json.dumps(dados, ensure_ascii=False).encode('utf-8')
+        return self._enviar(status, corpo, 'application/json; charset=utf-8', etag)
+
+    def _ler_corpo(self) -> Dict:
+        tamanho = int(self.headers.get('Content-Length') or 0)
+        if tamanho > CORPO_MAXIMO:
+            raise ErroAPI(413, f"Corpo maior que {CORPO_MAXIMO} bytes")
+        if not tamanho:
+            return {}
+        try:
+            dados = json.loads(self.rfile.read(tamanho))
+        except json.JSONDecodeError as e:
+            raise ErroAPI(400, f"JSON inválido: {e}")
+        if not isinstance(dados, dict):
+            raise ErroAPI(400, "O corpo deve ser um objeto JSON")
+        return dados
+
+    # ===== ESCOLA / ENTIDADE =====
+
+    def _escola(self, escola: str) -> Escola:
+        try:
+            return escolas.abrir(escola)
+        except (KeyError, ValueError) as e:
+            raise ErroAPI(404, str(e).strip("'"))
+
+    @staticmethod
+    def _validar_entidade(entidade: str) -> str:
+        if entidade not in ENTIDADES:
+            raise ErroAPI(404, f"Entidade desconhecida: {entidade} (use {', '.join(ENTIDADES)})")
+        return entidade
+
+    @staticmethod
+    def _buscar(doc: Dict, entidade: str, id: str) -> Optional[Dict]:
+        return next((item for item in doc[entidade] if item.get('id') == id), None)
+
+    def _editada(self, escola: Escola, doc: Dict, entidade: str, id: str) -> Tuple[Dict, int]:
+        """
+        Estado que o cliente editou e a versão dele (If-Match; sem ele, a atual)
+        Versão antiga: o estado sai do evento do diário com esse seq (base da mescla)
+        """
+        atual = self._buscar(doc, entidade, id)
+        if atual is None:
+            raise ErroAPI(404, f"{entidade} {id} não encontrado(a)")
+        versao_atual = doc.get('versoes', {}).get(entidade, {}).get(id, 0)
+        versao = _versao_if_match(self.headers.get('If-Match'))
+        if versao is None or versao == versao_atual:
+            return atual, versao_atual
+        evento = next(iter(escola.banco.diario.eventos(desde=versao - 1, ate=versao)), None)
+        if not evento or evento['op'] != UPSERT or (evento['entidade'], evento['id']) != (entidade, id):
+            raise ErroAPI(412, f"{entidade} {id}: versão {versao} indisponível (atual {versao_atual})",
+                          versao=versao_atual, atual=atual)
+        return evento['dados'], versao
+
+    @staticmethod
+    def _validar_dados(escola: Escola, entidade: str, dados: Dict) -> None:
+        """Campos obrigatórios, LIMITES e nome único (as mesmas regras da importação)"""
+        from importacao import validar_item
+        nomes = [item.get('nome') for item in escola.documento()[entidade] if item.get('id') != dados['id']]
+        erros = validar_item(entidade, dados, nomes)
+        if erros:
+            raise ErroAPI(400, f"Dados inválidos para {entidade}", erros=erros)
+
+    def _gravar(self, escola: Escola, entidade: str, op: str, dados: Dict, antes: Optional[Dict],
+                versao: int) -> int:
+        # Valida e grava sob o lock do banco: dois POSTs com o mesmo nome não passam juntos
+        with escola.banco.lock:
+            if op == UPSERT:
+                self._validar_dados(escola, entidade, dados)
+            objeto = database.DICT_PARA[entidade](dados)
+            if objeto is None:
+                raise ErroAPI(400, f"Dados inválidos para {entidade}")
+            try:
+                with database.usar_banco(escola.banco):
+                    return database.registrar_alteracao(entidade, op, objeto, antes, versao=versao)
+            except ConflitoVersao as e:
+                atual = self._buscar(escola.documento(), entidade, e.id)
+                raise ErroAPI(409, str(e), versao=e.atual, campos=e.campos, atual=atual)
+
+    # ===== ROTAS =====
+
+    def pagina_inicial(self) -> int:
+        if not PAGINA_INICIAL.exists():
+            raise ErroAPI(404, "restricoes.html não encontrado")
+        return self._enviar(200, PAGINA_INICIAL.read_bytes(), 'text/html; charset=utf-8')
+
+    def listar_escolas(self) -> int:
+        return self._json(200, {'escolas': escolas.listar(), 'abertas': escolas.abertas()})
+
+    def listar_entidades(self, escola: str, entidade: str) -> int:
+        entidade = self._validar_entidade(entidade)
+        escola = self._escola(escola)
+        doc = escola.documento()
+        geracao = int(doc.get('seq', 0))
+        return self._json(200, {'geracao': geracao, entidade: doc[entidade]},
+                          etag=f'W/"{escola.id}-{entidade}-{geracao}"')
+
+    def ler_entidade(self, escola: str, entidade: str, id: str) -> int:
+        entidade = self._validar_entidade(entidade)
+        escola = self._escola(escola)
+        doc = escola.documento()
+        item = self._buscar(doc, entidade, id)
+        if item is None:
+            raise ErroAPI(404, f"{entidade} {id} não encontrado(a)")
+        versao = doc.get('versoes', {}).get(entidade, {}).get(id, 0)
+        return self._json(200, dict(item, versao=versao), etag=_etag_versao(versao))
+
+    def incluir(self, escola: str, entidade: str) -> int:
+        entidade = self._validar_entidade(entidade)
+        escola = self._escola(escola)
+        dados = self._ler_corpo()
+        dados.pop('versao', None)
+        dados['id'] = dados.get('id') or uuid.uuid4().hex[:8]
+        seq = self._gravar(escola, entidade, UPSERT, dados, None, versao=0)
+        return self._json(201, {'id': dados['id'], 'versao': seq}, etag=_etag_versao(seq))
+
+    def editar(self, escola: str, entidade: str, id: str) -> int:
+        entidade = self._validar_entidade(entidade)
+        escola = self._escola(escola)
+        dados = dict(self._ler_corpo(), id=id)
+        dados.pop('versao', None)
+        base, versao = self._editada(escola, escola.documento(), entidade, id)
+        # Campos omitidos ficam como o cliente os viu; se outra edição veio
+        # depois, registrar_alteracao mescla campo a campo sobre a base
+        seq = self._gravar(escola, entidade, UPSERT, dict(base, **dados), base, versao)
+        return self._json(200, {'id': id, 'versao': seq}, etag=_etag_versao(seq))
+
+    def remover(self, escola: str, entidade: str, id: str) -> int:
+        entidade = self._validar_entidade(entidade)
+        escola = self._escola(escola)
+        antes, versao = self._editada(escola, escola.documento(), entidade, id)
+        seq = self._gravar(escola, entidade, REMOVER, antes, antes, versao)
+        return self._json(200, {'id': id, 'versao': seq})
+
+    def criar_solve(self, escola: str) -> int:
+        escola = self._escola(escola)
+        dados = self._ler_corpo()
+        try:
+            tempo = float(dados.get('tempo', 10.0))
+        except (TypeError, ValueError):
+            raise ErroAPI(400, f"Tempo inválido: {dados.get('tempo')}")
+        if not 0 < tempo <= TEMPO_MAXIMO:
+            raise ErroAPI(400, f"Tempo fora do intervalo: {tempo:g} (entre 0 e {TEMPO_MAXIMO:g} s)")
+        horarios = dados.get('horarios', len(HORARIOS_REAIS))
+        if type(horarios) is not int or not 1 <= horarios <= MAX_HORARIOS_DIA:
+            raise ErroAPI(400, f"Horários por dia inválidos: {horarios} (inteiro entre 1 e {MAX_HORARIOS_DIA})")
+        situacao = submeter_solve(escola, dados.get('motor', 'simple_scheduler'), tempo, horarios)
+        return self._json(202, dict(situacao, url=f"/tarefas/{situacao['id']}"))
+
+    def ler_tarefa(self, tarefa: str) -> int:
+        with _lock_tarefas:
+            encontrada = _tarefas.get(tarefa)
+        if encontrada is None:
+            raise ErroAPI(404, f"Tarefa não encontrada: {tarefa}")
+        return self._json(200, situacao_tarefa(encontrada))
+
+    def ler_grade(self, escola: str) -> int:
+        escola = self._escola(escola)
+        campo = self.consulta.get('campo')
+        if campo and campo not in ('turma', 'professor', 'sala', 'disciplina'):
+            raise ErroAPI(400, f"Campo inválido: {campo}")
+        nome = self.consulta.get('nome') if campo else None
+        with database.usar_banco(escola.banco):
+            versao = self.consulta.get('versao') or armazem_grades.versao_atual()
+        if not versao:
+            raise ErroAPI(404, "Nenhuma grade gravada")
+        # ETag sai do índice: uma revalidação não lê nem serializa a grade
+        etag = _etag_versao(f"{versao}-{campo or ''}-{nome or ''}")
+        if self._confere(etag):
+            return self._nao_modificado(etag)
+        corpo, comprimido = _corpo_grade(escola.id, versao, campo, nome)
+        return self._enviar(200, corpo, 'application/json; charset=utf-8', etag, comprimido)
+
+# ============================================================================
+# SERVIDOR
+# ============================================================================
+
+def criar_servidor(host: str = HOST, porta: int = PORTA) -> ThreadingHTTPServer:
+    """Servidor com uma thread por requisição (threads daemon: não seguram o encerramento)"""
+    servidor = ThreadingHTTPServer((host, porta), ManipuladorAPI)
+    servidor.daemon_threads = True
+    return servidor
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m api", description="API HTTP/JSON local do GELEIA")
+    parser.add_argument('--host', default=HOST, help="endereço (padrão: só esta máquina)")
+    parser.add_argument('--porta', type=int, default=PORTA)
+    args = parser.parse_args(argv)
+
+    instrumentacao.GRAVAR_LOG = True
+    servidor = criar_servidor(args.host, args.porta)
+    print(f"🚀 API em http://{args.host}:{servidor.server_address[1]}", flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        escolas.gravar_pendentes()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
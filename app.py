@@ -3,22 +3,41 @@ app.py - GELEIA v2.6 - GRADE SEMANAL COM RENDERIZAÇÃO HTML CORRETA
 COM OR-TOOLS, ÍCONES GRANDES E CORES SUAVES
 """
 
+import io
 import streamlit as st
 import pandas as pd
+import plotly.express as px
 from datetime import datetime
 
-from models import Turma, Professor, Disciplina, Sala, GradeHoraria, DIAS_SEMANA, HORARIOS_REAIS
+from models import (Turma, Professor, Disciplina, Sala, GradeHoraria, Registro, DIAS_SEMANA, HORARIOS_REAIS, DIA_IDX,
+                    FREQUENCIAS, MAX_HORARIOS_DIA, rotulo_horario, rotulo_semana)
 from database import (
-    salvar_tudo, carregar_tudo, limpar_banco,
-    dict_para_turma, dict_para_professor, dict_para_disciplina, dict_para_sala
+    limpar_banco, para_dict, geracao, eventos_desde, aplicar_eventos,
+    registrar_alteracao, registrar_grade, desfazer, restaurar, historico
 )
+from diario import UPSERT, REMOVER, ConflitoVersao
+from escolas import escolas, fila, CotaExcedida, ESCOLA_PADRAO
+from session_state import escola_da_sessao, id_sessao
 from simple_scheduler import SimpleGradeHoraria
+from scheduler_intervalos import GradeIntervalos
+from exportacao import exportar_xlsx, exportar_html
+from grade_compacta import GradeCompacta
+from validador import validar_grade
+from importacao import faixa
+from editor_grade import EditorGrade
+from substitutos import IndiceSubstitutos
+from replanejamento import replanejar_dia
+import instrumentacao
+from instrumentacao import cronometrar
+import armazem_grades
+import ajuste_solver
 
 # ============================================================================
 # CONFIG
 # ============================================================================
 
 st.set_page_config(page_title="GELEIA v2.6", page_icon="🎓", layout="wide")
+instrumentacao.GRAVAR_LOG = True  # métricas em disco só no app (e na API)
 
 # CSS para aumentar ícones das abas
 st.markdown("""
@@ -37,40 +56,66 @@ st.markdown("""
 st.title("🎓 GELEIA - Grade Horária com OR-Tools")
 st.markdown("---")
 
+# ============================================================================
+# ESCOLA
+# ============================================================================
+
+# ?escola=<id> escolhe a escola; trocar de escola descarta os dados da sessão
+escola_pedida = st.query_params.get('escola') or st.session_state.get('escola') or ESCOLA_PADRAO
+if st.session_state.get('escola') not in (None, escola_pedida):
+    for chave in list(st.session_state.keys()):
+        del st.session_state[chave]
+st.session_state.escola = escola_pedida
+try:
+    escola = escola_da_sessao()
+except (KeyError, ValueError) as e:
+    st.error(f"❌ {e}")
+    st.session_state.pop('escola', None)
+    st.stop()
+gravador = escola.gravador
+
 # ============================================================================
 # INIT
 # ============================================================================
 
-def validar_dados():
-    turmas_json, profs_json, discs_json, salas_json = carregar_tudo()
-    
-    turmas = [dict_para_turma(t) for t in turmas_json if isinstance(t, dict)]
-    turmas += [t for t in turmas_json if isinstance(t, Turma)]
-    turmas = [t for t in turmas if t]
-    
-    profs = [dict_para_professor(p) for p in profs_json if isinstance(p, dict)]
-    profs += [p for p in profs_json if isinstance(p, Professor)]
-    profs = [p for p in profs if p]
-    
-    discs = [dict_para_disciplina(d) for d in discs_json if isinstance(d, dict)]
-    discs += [d for d in discs_json if isinstance(d, Disciplina)]
-    discs = [d for d in discs if d]
-    
-    salas = [dict_para_sala(s) for s in salas_json if isinstance(s, dict)]
-    salas += [s for s in salas_json if isinstance(s, Sala)]
-    salas = [s for s in salas if s]
-    
-    return turmas, profs, discs, salas
+# Motores de geração: nome gravado nas opções → (rótulo, classe)
+MOTORES = {
+    'simple_scheduler': ("Booleano por célula", SimpleGradeHoraria),
+    'intervalos': ("Intervalos (aulas geminadas)", GradeIntervalos),
+}
+
+def horarios_dia():
+    """Horários por dia escolhidos na aba Grade"""
+    return st.session_state.get('horarios_dia', len(HORARIOS_REAIS))
+
+def opcoes_solver():
+    """Opções do solver que entram na chave da grade gravada"""
+    return armazem_grades.opcoes_chave(st.session_state.get('motor_grade', 'simple_scheduler'), horarios_dia())
 
 def init():
     if 'turmas' not in st.session_state:
-        t, p, d, s = validar_dados()
+        registro = escola.registro()
+        t, p, d, s = registro.listas()
         st.session_state.turmas = t
         st.session_state.professores = p
         st.session_state.disciplinas = d
         st.session_state.salas = s
+        st.session_state.geracao = registro.geracao
+        st.session_state.versoes = registro.versoes
+        carregar_grade_atual()
+
+def carregar_grade_atual(versao_id=None):
+    """Carrega a grade gravada (atual ou uma versão) sem rodar o solver"""
+    compacta = armazem_grades.carregar_compacta(versao_id)
+    if compacta is None:
         st.session_state.grade_horaria = GradeHoraria()
         st.session_state.grade_gerada = False
+        return False
+    grade = compacta.para_grade()
+    st.session_state.grade_horaria = grade
+    st.session_state.grade_gerada = bool(grade.aulas)
+    st.session_state.indice_grade = (grade.id, compacta)
+    return True
 
 init()
 
@@ -78,6 +123,7 @@ init()
 # VALIDAÇÃO PRÉ-GERAÇÃO
 # ============================================================================
 
+@cronometrar('app.validar_antes_gerar')
 def validar_antes_gerar(turmas_v, profs_v, discs_v, salas_v):
     erros = []
     warnings = []
@@ -128,49 +174,267 @@ def validar_antes_gerar(turmas_v, profs_v, discs_v, salas_v):
 # HELPERS
 # ============================================================================
 
-def salvar(): 
-    return salvar_tudo(st.session_state.turmas, st.session_state.professores, 
-                      st.session_state.disciplinas, st.session_state.salas)
+def progresso_streamlit(nivel, mensagem):
+    """Callback de progresso dos solvers → mensagens do Streamlit"""
+    {'info': st.info, 'sucesso': st.success, 'aviso': st.warning, 'erro': st.error}.get(nivel, st.write)(mensagem)
+
+def criar_scheduler(turmas_v, profs_v, discs_v, salas_v, progresso=progresso_streamlit):
+    """Instancia o motor escolhido na aba Grade (exportando o modelo, se pedido no diagnóstico)"""
+    classe = MOTORES[opcoes_solver()['motor']][1]
+    exportar = ajuste_solver.MODELOS_DIR if st.session_state.get('exportar_modelo') else None
+    chave = armazem_grades.chave_entrada(turmas_v, profs_v, discs_v, salas_v, opcoes_solver()) if exportar else None
+    return classe(turmas_v, profs_v, discs_v, salas_v, progresso=progresso,
+                  exportar=exportar, chave=chave, n_horarios=horarios_dia())
+
+def gerar_na_fila(turmas_v, profs_v, discs_v, salas_v, fixadas=None):
+    """
+    Gera a grade pela fila de solves compartilhada (cota por escola)
+    O solve roda numa thread de trabalho: o progresso é mostrado ao final
+    Retorna: o scheduler (grade em st.session_state.grade_horaria)
+    """
+    mensagens = []
+    scheduler = criar_scheduler(turmas_v, profs_v, discs_v, salas_v,
+                                progresso=lambda nivel, mensagem: mensagens.append((nivel, mensagem)))
+    perfilar = st.session_state.get('perfilar_geracao', False)
+
+    def gerar():
+        with instrumentacao.perfilar(perfilar):
+            with instrumentacao.medir('solver.gerar_grade'):
+                return scheduler.gerar_grade(fixadas)
+
+    try:
+        st.session_state.grade_horaria = fila.submeter(escola, gerar).result()
+    finally:
+        for nivel, mensagem in mensagens:
+            progresso_streamlit(nivel, mensagem)
+    return scheduler
+
+def usar_compacta(scheduler):
+    """Aproveita a forma compacta montada na extração (evita refazer de_grade)"""
+    if scheduler.compacta is not None:
+        st.session_state.indice_grade = (st.session_state.grade_horaria.id, scheduler.compacta)
+
+def salvar(imediato=False):
+    """Agenda a gravação (agrupada em segundo plano); imediato=True grava já"""
+    gravador.agendar(st.session_state.turmas, st.session_state.professores,
+                     st.session_state.disciplinas, st.session_state.salas,
+                     st.session_state.get('geracao'), id_sessao())
+    return gravador.flush() if imediato else True
+
+def recarregar():
+    """Recarrega as listas da sessão a partir do banco (snapshot + diário)"""
+    registro = escola.registro()
+    t, p, d, s = registro.listas()
+    st.session_state.turmas = t
+    st.session_state.professores = p
+    st.session_state.disciplinas = d
+    st.session_state.salas = s
+    st.session_state.geracao = registro.geracao
+    st.session_state.versoes = registro.versoes
+
+def sincronizar():
+    """
+    Traz para a sessão só as alterações feitas por outras sessões desde a
+    geração que ela viu (sem reler o banco). Retorna: eventos aplicados
+    """
+    vista = st.session_state.get('geracao', 0)
+    if geracao() == vista:
+        return 0
+    eventos = eventos_desde(vista)
+    registro = Registro(st.session_state.turmas, st.session_state.professores,
+                        st.session_state.disciplinas, st.session_state.salas)
+    registro.geracao = vista
+    registro.versoes = st.session_state.get('versoes', {})
+    if eventos is None or not aplicar_eventos(registro, eventos):
+        recarregar()
+        return len(eventos or []) or 1
+    st.session_state.turmas, st.session_state.professores, st.session_state.disciplinas, \
+        st.session_state.salas = registro.listas()
+    st.session_state.geracao = registro.geracao
+    st.session_state.versoes = registro.versoes
+    return len(eventos)
+
+def registrar(entidade, op, obj, antes=None):
+    """
+    Registra a alteração com a versão que a sessão editou (compare-and-swap)
+    Mesclada com outra sessão: sincroniza (versões e campos mesclados)
+    Conflito com outra sessão: avisa e sincroniza (a edição local é descartada)
+    """
+    versoes = st.session_state.setdefault('versoes', {})
+    try:
+        seq = registrar_alteracao(entidade, op, obj, antes, versao=versoes.get(entidade, {}).get(obj.id, 0))
+    except ConflitoVersao as conflito:
+        campos = f" ({', '.join(conflito.campos)})" if conflito.campos else ""
+        st.session_state.aviso_conflito = (f"⚠️ {getattr(obj, 'nome', obj.id)} foi alterado(a) por outra sessão"
+                                           f"{campos}; a sua alteração não foi gravada")
+        sincronizar()
+        return None
+    if seq == st.session_state.get('geracao', 0) + 1:
+        st.session_state.geracao = seq
+        versoes.setdefault(entidade, {})[obj.id] = seq
+    else:
+        sincronizar()
+    return seq
+
+def obter_indice():
+    """Índice compacto da grade atual, construído uma vez por grade gerada"""
+    grade = st.session_state.grade_horaria
+    cache = st.session_state.get('indice_grade')
+    if cache is None or cache[0] != grade.id:
+        cache = (grade.id, GradeCompacta.de_grade(grade, horarios_dia()))
+        st.session_state.indice_grade = cache
+    return cache[1]
+
+def obter_editor():
+    """Editor (índices de ocupação) da grade atual, construído uma vez por grade"""
+    grade = st.session_state.grade_horaria
+    editor = st.session_state.get('editor_grade')
+    if editor is None or editor.grade is not grade:
+        editor = EditorGrade(grade, st.session_state.salas, st.session_state.turmas, obter_indice().n_horarios)
+        st.session_state.editor_grade = editor
+        st.session_state.html_grade = {}
+    return editor
+
+def obter_substitutos():
+    """Índice de substitutos da grade atual; refeito após edições ou mudanças nos professores"""
+    grade = st.session_state.grade_horaria
+    chave = (grade.id, sum(obter_editor().versoes.values()),
+             tuple((p.nome, tuple(p.disciplinas), p.carga_maxima) for p in st.session_state.professores))
+    cache = st.session_state.get('indice_substitutos')
+    if cache is None or cache[0] != chave:
+        cache = (chave, IndiceSubstitutos(grade, st.session_state.professores))
+        st.session_state.indice_substitutos = cache
+    return cache[1]
+
+def html_grade_cache(campo, nome):
+    """HTML da grade de uma entidade; refeito só quando ela foi alterada no editor"""
+    editor = obter_editor()
+    destaques = frozenset(editor.celulas_alteradas(campo, nome))
+    chave = (campo, nome)
+    versao = (editor.versoes.get(chave, 0), destaques)
+    cache = st.session_state.setdefault('html_grade', {})
+    if chave not in cache or cache[chave][0] != versao:
+        html = gerar_html_grade(st.session_state.grade_horaria, nome, campo, obter_indice(), destaques)
+        cache[chave] = (versao, html)
+    return cache[chave][1]
+
+def validar_grade_atual(turmas_v, profs_v, discs_v, salas_v):
+    """Relatório de validação da grade da sessão (refeito só quando a grade muda)"""
+    indice = obter_indice()
+    n_horarios = horarios_dia()
+    cache = st.session_state.get('validacao')
+    if cache is None or cache[0] is not indice or cache[1] != n_horarios:
+        with instrumentacao.medir('validador.validar_grade', aulas=len(indice)):
+            cache = (indice, n_horarios, validar_grade(indice, turmas_v, profs_v, discs_v, salas_v,
+                                                       n_horarios=n_horarios))
+        st.session_state.validacao = cache
+    return cache[2]
+
+def gravar_grade(turmas_v, profs_v, discs_v, salas_v, opcoes, tornar_atual=True, **metadados):
+    """
+    Grava a grade da sessão como nova versão, se passar na validação
+    tornar_atual: False grava à parte (ex.: conserto de um dia), sem trocar a grade da semana
+    Retorna: id da versão ou None (grade com choques não é gravada)
+    """
+    relatorio = validar_grade_atual(turmas_v, profs_v, discs_v, salas_v)
+    if not relatorio.valido:
+        return None
+    grade = st.session_state.grade_horaria
+    chave = armazem_grades.chave_entrada(turmas_v, profs_v, discs_v, salas_v, opcoes)
+    versao = armazem_grades.salvar_grade(grade, chave, opcoes, compacta=obter_indice(),
+                                         tornar_atual=tornar_atual, validacao=relatorio.contagem())
+    registrar_grade(grade, chave=chave, versao=versao, **metadados)
+    return versao
+
+def conserto_exibido():
+    """Dia cujo conserto está na sessão no lugar da grade da semana (ou None)"""
+    conserto = st.session_state.get('conserto_dia')
+    return conserto[1] if conserto and conserto[0] == st.session_state.grade_horaria.id else None
+
+def paginar(itens, chave, texto_busca, tamanho=20):
+    """
+    Filtra por busca e devolve apenas a página atual
+    Só os itens da página são renderizados e convertidos em DataFrame
+    """
+    c1, c2 = st.columns([3, 1])
+    with c1:
+        busca = st.text_input("🔍 Buscar", key=f"busca_{chave}").strip().lower()
+    if busca:
+        itens = [i for i in itens if busca in texto_busca(i).lower()]
+    
+    n_paginas = max(1, -(-len(itens) // tamanho))
+    if st.session_state.get(f"pagina_{chave}", 1) > n_paginas:
+        st.session_state[f"pagina_{chave}"] = n_paginas
+    with c2:
+        pagina = st.number_input("Página", min_value=1, max_value=n_paginas, key=f"pagina_{chave}")
+    
+    inicio = (pagina - 1) * tamanho
+    st.caption(f"{len(itens)} itens · página {pagina}/{n_paginas}")
+    return itens[inicio:inicio + tamanho]
+
+def selecionar_para_editar(pagina, chave):
+    """Selectbox da página atual; apenas a entidade escolhida ganha formulário"""
+    opcoes = [None] + pagina
+    return st.selectbox(
+        "✏️ Editar:", opcoes, key=f"editar_{chave}",
+        format_func=lambda e: "—" if e is None else e.nome
+    )
+
+def numero(rotulo, entidade, coluna, valor, **kwargs):
+    """number_input com os limites de importacao.LIMITES (valor antigo fora da faixa vem para dentro)"""
+    minimo, maximo = faixa(entidade, coluna)
+    return st.number_input(rotulo, minimo, maximo, max(minimo, min(maximo, int(valor))), **kwargs)
 
 def val_multiselect(defaults, options):
     if not defaults: return []
     return [v for v in (defaults if isinstance(defaults, list) else [defaults]) if v in options]
 
-def gerar_html_grade(grade, turma_nome=None):
+@cronometrar('app.gerar_html_grade')
+def gerar_html_grade(grade, nome=None, campo='turma', indice=None, destaques=None):
     """
     Gera HTML da grade semanal com cores suaves
+    campo: 'turma', 'professor' ou 'sala' (tipo da visão)
+    indice: GradeCompacta da grade, evita percorrer todas as aulas
+    destaques: (dia_idx, horario) alterados no editor, realçados
     Retorna: string HTML
     """
     if not grade or not grade.aulas:
         return "<p>Nenhuma aula</p>"
     
     DIAS = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta"]
-    HORARIOS = ["08:00-10:00", "10:30-12:30"]
+    n_horarios = indice.n_horarios if indice is not None else \
+        max([len(HORARIOS_REAIS)] + [a.horario + 1 for a in grade.aulas])
+    HORARIOS = list(range(n_horarios))
     
     # Estrutura: {horario: {dia: [aulas]}}
     grade_data = {h: {d: [] for d in DIAS} for h in HORARIOS}
     
+    if nome and indice is not None:
+        aulas_visao = [grade.aulas[i] for i in indice.aulas_de(campo, nome)]
+    elif nome:
+        aulas_visao = [a for a in grade.aulas if getattr(a, campo) == nome]
+    else:
+        aulas_visao = grade.aulas
+    
+    detalhes = {
+        'turma': (('👨‍🏫', 'professor'), ('🚪', 'sala')),
+        'professor': (('🎓', 'turma'), ('🚪', 'sala')),
+        'sala': (('🎓', 'turma'), ('👨‍🏫', 'professor')),
+    }[campo]
+    
     # Preencher grade
-    for aula in grade.aulas:
-        if turma_nome and aula.turma != turma_nome:
-            continue
+    for aula in aulas_visao:
+        dia_idx = DIA_IDX.get(aula.dia.lower())
+        dia = DIAS[dia_idx] if dia_idx is not None else ''
+        horario = aula.horario
         
-        dia_map = {
-            'segunda': 'Segunda', 'seg': 'Segunda',
-            'terça': 'Terça', 'ter': 'Terça',
-            'quarta': 'Quarta', 'qua': 'Quarta',
-            'quinta': 'Quinta', 'qui': 'Quinta',
-            'sexta': 'Sexta', 'sex': 'Sexta',
-        }
-        
-        dia = dia_map.get(aula.dia.lower(), '')
-        horario = HORARIOS_REAIS.get(aula.horario, '')
-        
-        if horario and dia in DIAS:
+        if horario in grade_data and dia in DIAS:
+            semana = getattr(aula, 'semana', None)
             grade_data[horario][dia].append({
-                'disciplina': aula.disciplina,
-                'professor': aula.professor,
-                'sala': aula.sala
+                'disciplina': aula.disciplina + (f" · Sem. {rotulo_semana(semana)}" if semana is not None else ''),
+                'semana': semana,
+                'linha1': f"{detalhes[0][0]} {getattr(aula, detalhes[0][1])}",
+                'linha2': f"{detalhes[1][0]} {getattr(aula, detalhes[1][1])}"
             })
     
     # ===== GERAR HTML =====
@@ -213,6 +477,14 @@ def gerar_html_grade(grade, turma_nome=None):
         .grade-celula:hover {
             background: #f8fafc;
         }
+        .grade-celula.alterada {
+            background: #fff8e1;
+            box-shadow: inset 0 0 0 2px #f5b942;
+        }
+        .grade-celula.conflito {
+            background: #fdecec;
+            box-shadow: inset 0 0 0 2px #e57373;
+        }
         .aula {
             background: linear-gradient(135deg, #c8dff8 0%, #d5e8f7 100%);
             color: #1e3a5f;
@@ -259,19 +531,25 @@ def gerar_html_grade(grade, turma_nome=None):
     
     # Linhas de horários
     for horario in HORARIOS:
-        html += f'<tr><td class="grade-horario">{horario}</td>'
+        html += f'<tr><td class="grade-horario">{rotulo_horario(horario)}</td>'
         
         for dia in DIAS:
-            html += '<td class="grade-celula">'
             aulas = grade_data[horario].get(dia, [])
+            classe = "grade-celula"
+            semanas = [a['semana'] for a in aulas]
+            if len(aulas) > 1 and (None in semanas or len(set(semanas)) < len(semanas)):
+                classe += " conflito"
+            elif destaques and (DIAS.index(dia), horario) in destaques:
+                classe += " alterada"
+            html += f'<td class="{classe}">'
             
             if aulas:
                 for aula in aulas:
                     html += f'''
                         <div class="aula">
                             <div class="aula-disciplina">{aula['disciplina']}</div>
-                            <div class="aula-prof">👨‍🏫 {aula['professor']}</div>
-                            <div class="aula-sala">🚪 {aula['sala']}</div>
+                            <div class="aula-prof">{aula['linha1']}</div>
+                            <div class="aula-sala">{aula['linha2']}</div>
                         </div>
                     '''
             else:
@@ -283,11 +561,112 @@ def gerar_html_grade(grade, turma_nome=None):
     html += '</table></div>'
     return html
 
+def rotulo_slot(dia, horario):
+    return f"{DIAS_SEMANA[dia].capitalize()} {rotulo_horario(horario)}"
+
+def aplicar_edicao(conflitos):
+    """Mostra o resultado de um movimento/troca e invalida os índices derivados"""
+    if conflitos:
+        for c in conflitos:
+            st.error(f"❌ Choque de {c['campo']} {c['nome']} ({len(c['aulas'])} aula(s))")
+        return False
+    st.session_state.indice_grade = None
+    st.rerun()
+
+def editar_aulas(campo, nome, indice):
+    """Mover/trocar aulas da entidade exibida, com conflitos checados pelo EditorGrade"""
+    editor = obter_editor()
+    aulas = sorted((st.session_state.grade_horaria.aulas[i] for i in indice.aulas_de(campo, nome)),
+                   key=lambda a: (DIA_IDX.get(a.dia, 0), a.horario))
+    if not aulas:
+        return
+    rotulos = {a.id: f"{a.disciplina} · {a.turma} · {a.dia} {HORARIOS_REAIS.get(a.horario, '')} · {a.sala}"
+               for a in aulas}
+    
+    with st.expander("✋ Mover / trocar aulas"):
+        aula_id = st.selectbox("Aula", list(rotulos), format_func=rotulos.get, key=f"editor_aula_{campo}")
+        
+        sugestoes = editor.sugerir(aula_id, k=5)
+        if sugestoes:
+            st.caption("Melhores horários livres:")
+            cols = st.columns(len(sugestoes))
+            for col, sug in zip(cols, sugestoes):
+                with col:
+                    if st.button(f"{rotulo_slot(sug['dia'], sug['horario'])}\n🚪 {sug['sala']}",
+                                 key=f"sug_{aula_id}_{sug['dia']}_{sug['horario']}", use_container_width=True):
+                        aplicar_edicao(editor.mover(aula_id, sug['dia'], sug['horario'], sug['sala']))
+        else:
+            st.caption("Nenhum horário livre para turma e professor")
+        
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            dia = st.selectbox("Dia", range(len(DIAS_SEMANA)), format_func=lambda d: DIAS_SEMANA[d].capitalize(),
+                               key=f"editor_dia_{campo}")
+        with c2:
+            horario = st.selectbox("Horário", range(editor.n_horarios), format_func=rotulo_horario,
+                                   key=f"editor_horario_{campo}")
+        with c3:
+            salas = [s.nome for s in st.session_state.salas if isinstance(s, Sala)]
+            atual = editor.aulas[aula_id].sala
+            sala = st.selectbox("Sala", salas, index=salas.index(atual) if atual in salas else 0,
+                                key=f"editor_sala_{campo}")
+        
+        conflitos = editor.conflitos(aula_id, dia, horario, sala)
+        if conflitos:
+            st.warning("⚠️ " + "; ".join(f"{c['campo']} {c['nome']} ocupado(a)" for c in conflitos))
+        c1, c2 = st.columns(2)
+        with c1:
+            if st.button("➡️ Mover", use_container_width=True, disabled=bool(conflitos), key=f"mover_{campo}"):
+                aplicar_edicao(editor.mover(aula_id, dia, horario, sala))
+        with c2:
+            outras = [a.id for a in aulas if a.id != aula_id]
+            if outras:
+                outra = st.selectbox("Trocar com", outras, format_func=rotulos.get, key=f"editor_troca_{campo}")
+                if st.button("🔄 Trocar", use_container_width=True, key=f"trocar_{campo}"):
+                    aplicar_edicao(editor.trocar(aula_id, outra))
+        
+        if editor.alteradas:
+            st.caption("Células alteradas ficam realçadas; use 💾 para gravar a grade editada")
+            if st.button("🧽 Limpar realce", key=f"limpar_realce_{campo}"):
+                editor.limpar_alteradas()
+                st.rerun()
+
+# ============================================================================
+# SINCRONIZAÇÃO ENTRE SESSÕES
+# ============================================================================
+
+novas_alteracoes = sincronizar()
+if novas_alteracoes:
+    st.toast(f"🔄 {novas_alteracoes} alteração(ões) de outra sessão")
+if st.session_state.get('aviso_conflito'):
+    st.warning(st.session_state.pop('aviso_conflito'))
+
 # ============================================================================
 # SIDEBAR
 # ============================================================================
 
 with st.sidebar:
+    st.header("🏫 Escola")
+    ids_escolas = escolas.listar()
+    escolhida = st.selectbox("Escola", ids_escolas, label_visibility="collapsed",
+                             index=ids_escolas.index(escola.id) if escola.id in ids_escolas else 0)
+    if escolhida != escola.id:
+        st.query_params['escola'] = escolhida
+        st.rerun()
+    with st.expander("➕ Nova escola"):
+        novo_id = st.text_input("Id (minúsculas, dígitos, - e _)", key="id_nova_escola")
+        if st.button("Criar", use_container_width=True) and novo_id:
+            try:
+                st.query_params['escola'] = escolas.criar(novo_id).id
+                st.rerun()
+            except ValueError as e:
+                st.error(f"❌ {e}")
+    uso = fila.situacao(escola.id)
+    st.caption(f"⚙️ Solver: {uso['segundos_ultima_hora']:.0f}s de {uso['cota_segundos']:.0f}s na última hora"
+               + (f" · {uso['aguardando']} na fila" if uso['aguardando'] else ""))
+    
+    st.divider()
+    
     st.header("📊 Status")
     
     c1, c2 = st.columns(2)
@@ -303,16 +682,57 @@ with st.sidebar:
     c1, c2, c3 = st.columns(3)
     with c1:
         if st.button("💾", use_container_width=True):
-            salvar()
-            st.success("✅")
+            if salvar(imediato=True):
+                st.success("✅")
+            else:
+                st.error("❌")
+            if escola.banco.ultimos_conflitos:
+                st.warning("⚠️ Alterados por outra sessão (não sobrescritos): "
+                           + ", ".join(str(c['nome']) for c in escola.banco.ultimos_conflitos))
     with c2:
         if st.button("🔄", use_container_width=True):
             st.rerun()
     with c3:
         if st.button("🧹", use_container_width=True):
+            gravador.descartar()
             limpar_banco()
+            escola.descarregar()
             init()
             st.rerun()
+    
+    if gravador.ultimo_erro:
+        st.error(f"❌ Falha ao gravar ({gravador.ultimo_erro:%H:%M:%S}); "
+                 "as alterações continuam pendentes - 💾 tenta de novo")
+    if gravador.pendente:
+        st.caption("⏳ Alterações aguardando gravação")
+    
+    if st.button("↩️ Desfazer última alteração", use_container_width=True):
+        gravador.flush()
+        if desfazer():
+            recarregar()
+            st.rerun()
+        else:
+            st.info("Nada para desfazer")
+    
+    with st.expander("🕒 Histórico"):
+        eventos = historico(30)
+        if eventos:
+            st.dataframe(pd.DataFrame([{
+                'Seq': ev['seq'], 'Quando': ev['ts'], 'Operação': ev['op'],
+                'Entidade': ev['entidade'] or '',
+                'Nome': ((ev['dados'] or ev['antes'] or {}).get('nome', '') if ev['entidade'] != 'grades' else '')
+            } for ev in eventos]), use_container_width=True, hide_index=True)
+            seq_alvo = st.selectbox("Restaurar estado após o evento:", [ev['seq'] for ev in eventos],
+                                    key="seq_restaurar")
+            if st.button("⏪ Restaurar", use_container_width=True):
+                gravador.flush()
+                if restaurar(seq_alvo):
+                    recarregar()
+                    st.rerun()
+                else:
+                    st.error("❌ Não foi possível restaurar")
+        else:
+            st.caption("Sem alterações registradas")
 
 # ============================================================================
 # ABAS - COM ÍCONES MAIORES
@@ -363,47 +783,63 @@ with aba_disc:
             c1, c2 = st.columns(2)
             with c1:
                 nome = st.text_input("Nome*")
-                carga = st.number_input("Carga", 1, 10, 2, key="carga_new_disc")
+                carga = numero("Carga", 'disciplinas', 'carga_semanal', 2, key="carga_new_disc")
+                frequencia = st.selectbox("Frequência", list(FREQUENCIAS), format_func=FREQUENCIAS.get,
+                                          key="freq_new_disc", help="Quinzenal: a carga acontece em semanas alternadas (A/B)")
+                duracao = numero("Duração da aula (horários)", 'disciplinas', 'duracao', 1, key="dur_new_disc",
+                                 help="2 = aula geminada (motor de intervalos)")
             with c2:
                 turmas_opt = [t.nome for t in st.session_state.turmas if isinstance(t, Turma)]
                 turmas = st.multiselect("Turmas*", turmas_opt, key="turmas_new_disc") if turmas_opt else []
             
             if st.form_submit_button("✅"):
                 if nome and turmas:
-                    st.session_state.disciplinas.append(Disciplina(nome, carga, turmas))
-                    salvar()
+                    nova = Disciplina(nome, carga, turmas, frequencia=frequencia, duracao=int(duracao))
+                    st.session_state.disciplinas.append(nova)
+                    registrar('disciplinas', UPSERT, nova)
                     st.rerun()
     
     discs = [d for d in st.session_state.disciplinas if isinstance(d, Disciplina)]
     if discs:
-        df = pd.DataFrame([{'Nome': d.nome, 'Carga': d.carga_semanal, 'Turmas': ', '.join(d.turmas)} for d in discs])
+        pagina = paginar(discs, "disc", lambda d: f"{d.nome} {' '.join(d.turmas)}")
+        df = pd.DataFrame([{'Nome': d.nome, 'Carga': d.carga_semanal, 'Frequência': FREQUENCIAS.get(d.frequencia, d.frequencia),
+                            'Duração': getattr(d, 'duracao', 1), 'Turmas': ', '.join(d.turmas)} for d in pagina])
         st.dataframe(df, use_container_width=True, hide_index=True)
         
-        for d in discs:
-            with st.expander(f"{d.nome}"):
-                with st.form(f"edit_disc_{d.id}"):
-                    c1, c2 = st.columns(2)
-                    with c1:
-                        novo_nome = st.text_input("Nome", d.nome, key=f"dn_{d.id}")
-                        nova_carga = st.number_input("Carga", 1, 10, d.carga_semanal, key=f"dc_{d.id}")
-                    with c2:
-                        turmas_opt = [t.nome for t in st.session_state.turmas if isinstance(t, Turma)]
-                        turmas_val = val_multiselect(d.turmas, turmas_opt)
-                        novas_turmas = st.multiselect("Turmas", turmas_opt, default=turmas_val, key=f"dt_{d.id}")
-                    
-                    c1, c2 = st.columns(2)
-                    with c1:
-                        if st.form_submit_button("💾", key=f"sd_{d.id}"):
-                            d.nome = novo_nome
-                            d.carga_semanal = nova_carga
-                            d.turmas = novas_turmas
-                            salvar()
-                            st.rerun()
-                    with c2:
-                        if st.form_submit_button("🗑️", key=f"dd_{d.id}"):
-                            st.session_state.disciplinas.remove(d)
-                            salvar()
-                            st.rerun()
+        d = selecionar_para_editar(pagina, "disc")
+        if d:
+            with st.form(f"edit_disc_{d.id}"):
+                c1, c2 = st.columns(2)
+                with c1:
+                    novo_nome = st.text_input("Nome", d.nome, key=f"dn_{d.id}")
+                    nova_carga = numero("Carga", 'disciplinas', 'carga_semanal', d.carga_semanal, key=f"dc_{d.id}")
+                    nova_freq = st.selectbox("Frequência", list(FREQUENCIAS), format_func=FREQUENCIAS.get,
+                                             index=list(FREQUENCIAS).index(d.frequencia) if d.frequencia in FREQUENCIAS else 0,
+                                             key=f"df_{d.id}")
+                    nova_duracao = numero("Duração da aula (horários)", 'disciplinas', 'duracao',
+                                          getattr(d, 'duracao', 1), key=f"du_{d.id}")
+                with c2:
+                    turmas_opt = [t.nome for t in st.session_state.turmas if isinstance(t, Turma)]
+                    turmas_val = val_multiselect(d.turmas, turmas_opt)
+                    novas_turmas = st.multiselect("Turmas", turmas_opt, default=turmas_val, key=f"dt_{d.id}")
+                
+                c1, c2 = st.columns(2)
+                with c1:
+                    if st.form_submit_button("💾", key=f"sd_{d.id}"):
+                        antes = para_dict('disciplinas', d)
+                        d.nome = novo_nome
+                        d.carga_semanal = nova_carga
+                        d.frequencia = nova_freq
+                        d.duracao = int(nova_duracao)
+                        d.turmas = novas_turmas
+                        registrar('disciplinas', UPSERT, d, antes)
+                        st.rerun()
+                with c2:
+                    if st.form_submit_button("🗑️", key=f"dd_{d.id}"):
+                        st.session_state.disciplinas.remove(d)
+                        registrar('disciplinas', REMOVER, d)
+                        st.rerun()
+
 
 # ============================================================================
 # ABA: PROFESSORES
@@ -417,38 +853,48 @@ with aba_prof:
             nome = st.text_input("Nome*", key="nome_new_prof")
             disc_opt = [d.nome for d in st.session_state.disciplinas if isinstance(d, Disciplina)]
             disc = st.multiselect("Disciplinas*", disc_opt, key="disc_new_prof") if disc_opt else []
+            maxima = numero("Carga máxima (aulas/semana, 0 = sem limite)", 'professores', 'carga_maxima', 0,
+                            key="max_new_prof")
             
             if st.form_submit_button("✅"):
                 if nome and disc:
-                    st.session_state.professores.append(Professor(nome, disc))
-                    salvar()
+                    novo = Professor(nome, disc, carga_maxima=int(maxima))
+                    st.session_state.professores.append(novo)
+                    registrar('professores', UPSERT, novo)
                     st.rerun()
     
     profs = [p for p in st.session_state.professores if isinstance(p, Professor)]
     if profs:
-        df = pd.DataFrame([{'Nome': p.nome, 'Disciplinas': ', '.join(p.disciplinas)} for p in profs])
+        pagina = paginar(profs, "prof", lambda p: f"{p.nome} {' '.join(p.disciplinas)}")
+        df = pd.DataFrame([{'Nome': p.nome, 'Disciplinas': ', '.join(p.disciplinas),
+                            'Carga máx.': getattr(p, 'carga_maxima', 0) or '—'} for p in pagina])
         st.dataframe(df, use_container_width=True, hide_index=True)
         
-        for p in profs:
-            with st.expander(f"{p.nome}"):
-                with st.form(f"edit_prof_{p.id}"):
-                    novo_nome = st.text_input("Nome", p.nome, key=f"pn_{p.id}")
-                    disc_opt = [d.nome for d in st.session_state.disciplinas if isinstance(d, Disciplina)]
-                    disc_val = val_multiselect(p.disciplinas, disc_opt)
-                    novas_disc = st.multiselect("Disciplinas", disc_opt, default=disc_val, key=f"pd_{p.id}")
-                    
-                    c1, c2 = st.columns(2)
-                    with c1:
-                        if st.form_submit_button("💾", key=f"sp_{p.id}"):
-                            p.nome = novo_nome
-                            p.disciplinas = novas_disc
-                            salvar()
-                            st.rerun()
-                    with c2:
-                        if st.form_submit_button("🗑️", key=f"dp_{p.id}"):
-                            st.session_state.professores.remove(p)
-                            salvar()
-                            st.rerun()
+        p = selecionar_para_editar(pagina, "prof")
+        if p:
+            with st.form(f"edit_prof_{p.id}"):
+                novo_nome = st.text_input("Nome", p.nome, key=f"pn_{p.id}")
+                disc_opt = [d.nome for d in st.session_state.disciplinas if isinstance(d, Disciplina)]
+                disc_val = val_multiselect(p.disciplinas, disc_opt)
+                novas_disc = st.multiselect("Disciplinas", disc_opt, default=disc_val, key=f"pd_{p.id}")
+                nova_maxima = numero("Carga máxima (aulas/semana, 0 = sem limite)", 'professores', 'carga_maxima',
+                                     getattr(p, 'carga_maxima', 0), key=f"pm_{p.id}")
+                
+                c1, c2 = st.columns(2)
+                with c1:
+                    if st.form_submit_button("💾", key=f"sp_{p.id}"):
+                        antes = para_dict('professores', p)
+                        p.nome = novo_nome
+                        p.disciplinas = novas_disc
+                        p.carga_maxima = int(nova_maxima)
+                        registrar('professores', UPSERT, p, antes)
+                        st.rerun()
+                with c2:
+                    if st.form_submit_button("🗑️", key=f"dp_{p.id}"):
+                        st.session_state.professores.remove(p)
+                        registrar('professores', REMOVER, p)
+                        st.rerun()
+
 
 # ============================================================================
 # ABA: TURMAS
@@ -462,47 +908,51 @@ with aba_turmas:
             c1, c2 = st.columns(2)
             with c1:
                 nome = st.text_input("Nome*", key="nome_new_turma")
-                sem = st.number_input("Semestre*", 1, 8, 1, key="sem_new_turma")
+                sem = numero("Semestre*", 'turmas', 'semestre', 1, key="sem_new_turma")
             with c2:
                 curso = st.text_input("Curso*", key="curso_new_turma")
-                alunos = st.number_input("Alunos*", 1, 100, 30, key="alunos_new_turma")
+                alunos = numero("Alunos*", 'turmas', 'quantidade_alunos', 30, key="alunos_new_turma")
             
             if st.form_submit_button("✅"):
                 if nome and curso:
-                    st.session_state.turmas.append(Turma(nome, sem, curso, alunos))
-                    salvar()
+                    nova = Turma(nome, sem, curso, alunos)
+                    st.session_state.turmas.append(nova)
+                    registrar('turmas', UPSERT, nova)
                     st.rerun()
     
     turmas = [t for t in st.session_state.turmas if isinstance(t, Turma)]
     if turmas:
-        df = pd.DataFrame([{'Nome': t.nome, 'Curso': t.curso, 'Sem': t.semestre, 'Alunos': t.quantidade_alunos} for t in turmas])
+        pagina = paginar(turmas, "turma", lambda t: f"{t.nome} {t.curso}")
+        df = pd.DataFrame([{'Nome': t.nome, 'Curso': t.curso, 'Sem': t.semestre, 'Alunos': t.quantidade_alunos} for t in pagina])
         st.dataframe(df, use_container_width=True, hide_index=True)
         
-        for t in turmas:
-            with st.expander(f"{t.nome}"):
-                with st.form(f"edit_turma_{t.id}"):
-                    c1, c2 = st.columns(2)
-                    with c1:
-                        novo_nome = st.text_input("Nome", t.nome, key=f"tn_{t.id}")
-                        novo_sem = st.number_input("Semestre", 1, 8, max(1, min(8, t.semestre)), key=f"ts_{t.id}")
-                    with c2:
-                        novo_curso = st.text_input("Curso", t.curso, key=f"tc_{t.id}")
-                        novo_alunos = st.number_input("Alunos", 1, 100, max(1, min(100, t.quantidade_alunos)), key=f"ta_{t.id}")
-                    
-                    c1, c2 = st.columns(2)
-                    with c1:
-                        if st.form_submit_button("💾", key=f"st_{t.id}"):
-                            t.nome = novo_nome
-                            t.semestre = novo_sem
-                            t.curso = novo_curso
-                            t.quantidade_alunos = novo_alunos
-                            salvar()
-                            st.rerun()
-                    with c2:
-                        if st.form_submit_button("🗑️", key=f"dt_{t.id}"):
-                            st.session_state.turmas.remove(t)
-                            salvar()
-                            st.rerun()
+        t = selecionar_para_editar(pagina, "turma")
+        if t:
+            with st.form(f"edit_turma_{t.id}"):
+                c1, c2 = st.columns(2)
+                with c1:
+                    novo_nome = st.text_input("Nome", t.nome, key=f"tn_{t.id}")
+                    novo_sem = numero("Semestre", 'turmas', 'semestre', t.semestre, key=f"ts_{t.id}")
+                with c2:
+                    novo_curso = st.text_input("Curso", t.curso, key=f"tc_{t.id}")
+                    novo_alunos = numero("Alunos", 'turmas', 'quantidade_alunos', t.quantidade_alunos, key=f"ta_{t.id}")
+                
+                c1, c2 = st.columns(2)
+                with c1:
+                    if st.form_submit_button("💾", key=f"st_{t.id}"):
+                        antes = para_dict('turmas', t)
+                        t.nome = novo_nome
+                        t.semestre = novo_sem
+                        t.curso = novo_curso
+                        t.quantidade_alunos = novo_alunos
+                        registrar('turmas', UPSERT, t, antes)
+                        st.rerun()
+                with c2:
+                    if st.form_submit_button("🗑️", key=f"dt_{t.id}"):
+                        st.session_state.turmas.remove(t)
+                        registrar('turmas', REMOVER, t)
+                        st.rerun()
+
 
 # ============================================================================
 # ABA: SALAS
@@ -516,47 +966,51 @@ with aba_salas:
             c1, c2 = st.columns(2)
             with c1:
                 nome = st.text_input("Nome*", key="nome_new_sala")
-                cap = st.number_input("Capacidade*", 10, 100, 40, key="cap_new_sala")
+                cap = numero("Capacidade*", 'salas', 'capacidade', 40, key="cap_new_sala")
             with c2:
                 pred = st.text_input("Prédio*", key="pred_new_sala")
-                and_s = st.number_input("Andar*", 0, 10, 1, key="and_new_sala")
+                and_s = numero("Andar*", 'salas', 'andar', 1, key="and_new_sala")
             
             if st.form_submit_button("✅"):
                 if nome and pred:
-                    st.session_state.salas.append(Sala(nome, cap, pred, and_s))
-                    salvar()
+                    nova = Sala(nome, cap, pred, and_s)
+                    st.session_state.salas.append(nova)
+                    registrar('salas', UPSERT, nova)
                     st.rerun()
     
     salas = [s for s in st.session_state.salas if isinstance(s, Sala)]
     if salas:
-        df = pd.DataFrame([{'Nome': s.nome, 'Cap': s.capacidade, 'Prédio': s.predio, 'Andar': s.andar} for s in salas])
+        pagina = paginar(salas, "sala", lambda s: f"{s.nome} {s.predio}")
+        df = pd.DataFrame([{'Nome': s.nome, 'Cap': s.capacidade, 'Prédio': s.predio, 'Andar': s.andar} for s in pagina])
         st.dataframe(df, use_container_width=True, hide_index=True)
         
-        for s in salas:
-            with st.expander(f"{s.nome}"):
-                with st.form(f"edit_sala_{s.id}"):
-                    c1, c2 = st.columns(2)
-                    with c1:
-                        novo_nome = st.text_input("Nome", s.nome, key=f"sn_{s.id}")
-                        nova_cap = st.number_input("Cap", 10, 100, max(10, min(100, s.capacidade)), key=f"sc_{s.id}")
-                    with c2:
-                        novo_pred = st.text_input("Prédio", s.predio, key=f"sp_{s.id}")
-                        novo_and = st.number_input("Andar", 0, 10, max(0, min(10, s.andar)), key=f"sa_{s.id}")
-                    
-                    c1, c2 = st.columns(2)
-                    with c1:
-                        if st.form_submit_button("💾", key=f"ss_{s.id}"):
-                            s.nome = novo_nome
-                            s.capacidade = nova_cap
-                            s.predio = novo_pred
-                            s.andar = novo_and
-                            salvar()
-                            st.rerun()
-                    with c2:
-                        if st.form_submit_button("🗑️", key=f"ds_{s.id}"):
-                            st.session_state.salas.remove(s)
-                            salvar()
-                            st.rerun()
+        s = selecionar_para_editar(pagina, "sala")
+        if s:
+            with st.form(f"edit_sala_{s.id}"):
+                c1, c2 = st.columns(2)
+                with c1:
+                    novo_nome = st.text_input("Nome", s.nome, key=f"sn_{s.id}")
+                    nova_cap = numero("Cap", 'salas', 'capacidade', s.capacidade, key=f"sc_{s.id}")
+                with c2:
+                    novo_pred = st.text_input("Prédio", s.predio, key=f"sp_{s.id}")
+                    novo_and = numero("Andar", 'salas', 'andar', s.andar, key=f"sa_{s.id}")
+                
+                c1, c2 = st.columns(2)
+                with c1:
+                    if st.form_submit_button("💾", key=f"ss_{s.id}"):
+                        antes = para_dict('salas', s)
+                        s.nome = novo_nome
+                        s.capacidade = nova_cap
+                        s.predio = novo_pred
+                        s.andar = novo_and
+                        registrar('salas', UPSERT, s, antes)
+                        st.rerun()
+                with c2:
+                    if st.form_submit_button("🗑️", key=f"ds_{s.id}"):
+                        st.session_state.salas.remove(s)
+                        registrar('salas', REMOVER, s)
+                        st.rerun()
+
 
 # ============================================================================
 # ABA: GRADE - COM OR-TOOLS E HTML st.html()
@@ -582,6 +1036,12 @@ with aba_grade:
     c1, c2, c3 = st.columns([2, 1, 1])
     
     with c1:
+        st.selectbox("Motor", list(MOTORES), format_func=lambda m: MOTORES[m][0], key="motor_grade",
+                     help="Intervalos: modelo menor, com aulas geminadas (duração > 1)")
+        st.session_state.setdefault('horarios_dia', len(HORARIOS_REAIS))
+        st.number_input("Horários por dia", min_value=1, max_value=MAX_HORARIOS_DIA, key="horarios_dia",
+                        help="Aulas geminadas com duração maior são limitadas a este número")
+        forcar = st.checkbox("Forçar nova geração", help="Ignora a grade já gerada para os mesmos dados")
         if st.button("🚀 Gerar Grade (OR-Tools)", use_container_width=True):
             sucesso, erros, warnings = validar_antes_gerar(turmas_v, profs_v, discs_v, salas_v)
             
@@ -596,26 +1056,43 @@ with aba_grade:
                     for warn in warnings:
                         st.warning(warn)
             
-            if sucesso:
+            chave = armazem_grades.chave_entrada(turmas_v, profs_v, discs_v, salas_v, opcoes_solver())
+            existente = None if forcar else armazem_grades.buscar_por_chave(chave)
+            if sucesso and existente:
+                armazem_grades.definir_atual(existente['id'])
+                carregar_grade_atual(existente['id'])
+                st.success(f"✅ Dados sem alteração - grade reaproveitada ({existente['aulas']} aulas, {existente['criado_em']})")
+            elif sucesso:
                 with st.spinner("⏳ OR-Tools processando..."):
                     try:
-                        scheduler = SimpleGradeHoraria(turmas_v, profs_v, discs_v, salas_v)
-                        st.session_state.grade_horaria = scheduler.gerar_grade()
+                        scheduler = gerar_na_fila(turmas_v, profs_v, discs_v, salas_v)
+                        usar_compacta(scheduler)
                         st.session_state.grade_gerada = True
+                        versao = gravar_grade(turmas_v, profs_v, discs_v, salas_v, opcoes_solver())
                         
-                        if st.session_state.grade_horaria.aulas:
-                            st.success(f"✅ Grade gerada com {len(st.session_state.grade_horaria.aulas)} aulas!")
-                        else:
+                        if not st.session_state.grade_horaria.aulas:
                             st.warning("⚠️ Grade vazia")
+                        elif versao is None:
+                            st.error("❌ Grade gerada com choques - não foi gravada (veja a validação abaixo)")
+                        else:
+                            st.success(f"✅ Grade gerada com {len(st.session_state.grade_horaria.aulas)} aulas!")
                     
+                    except CotaExcedida as e:
+                        st.error(f"⏳ Cota de geração da escola atingida: {e}")
                     except Exception as e:
                         st.error(f"❌ Erro: {str(e)}")
                         st.info("💡 Tente reduzir a carga ou adicionar mais turmas/salas")
     
     with c2:
         if st.session_state.grade_gerada and st.button("💾", use_container_width=True):
-            salvar()
-            st.success("✅")
+            dia_conserto = conserto_exibido()
+            opcoes = dict(opcoes_solver(), replanejamento=dia_conserto) if dia_conserto else opcoes_solver()
+            versao = gravar_grade(turmas_v, profs_v, discs_v, salas_v, opcoes, tornar_atual=not dia_conserto,
+                                  manual=True)
+            if salvar(imediato=True) and versao:
+                st.success("✅")
+            else:
+                st.error("❌")
     
     with c3:
         if st.session_state.grade_gerada and st.session_state.grade_horaria.aulas:
@@ -625,41 +1102,258 @@ with aba_grade:
                 'Disciplina': a.disciplina,
                 'Professor': a.professor,
                 'Sala': a.sala,
-                'Turma': a.turma
+                'Turma': a.turma,
+                'Semana': rotulo_semana(a.semana)
             } for a in st.session_state.grade_horaria.aulas]
             df = pd.DataFrame(dados)
             csv = df.to_csv(index=False, encoding='utf-8-sig')
             st.download_button("📥", csv, f"grade.csv", "text/csv", use_container_width=True)
-    
+
+    # ===== VALIDAÇÃO =====
+    if st.session_state.grade_gerada and st.session_state.grade_horaria.aulas:
+        relatorio = validar_grade_atual(turmas_v, profs_v, discs_v, salas_v)
+        titulo = "✅ Validação: sem problemas" if not relatorio.problemas else \
+            f"{'✅' if relatorio.valido else '❌'} Validação: " + \
+            ", ".join(f"{n} {tipo}" for tipo, n in relatorio.contagem().items())
+        with st.expander(titulo, expanded=not relatorio.valido):
+            if relatorio.problemas:
+                st.dataframe(pd.DataFrame(relatorio.problemas)[['tipo', 'campo', 'nome', 'detalhe']],
+                             use_container_width=True, hide_index=True)
+            else:
+                st.write("Nenhum choque, carga divergente ou problema de cadastro.")
+
+    # ===== VERSÕES =====
+    versoes = armazem_grades.listar_versoes()
+    if versoes:
+        with st.expander(f"🗂️ Versões da grade ({len(versoes)})"):
+            for v in versoes[:20]:
+                dia_conserto = v['opcoes'].get('replanejamento')
+                c1, c2 = st.columns([4, 1])
+                with c1:
+                    marca = "⭐ " if v['atual'] else ""
+                    conserto = f" · 🚨 conserto de {dia_conserto}" if dia_conserto else ""
+                    st.write(f"{marca}**{v['criado_em']}** · {v['aulas']} aulas{conserto} · `{v['chave']}`")
+                with c2:
+                    if not v['atual'] and st.button("📂", key=f"versao_{v['id']}", use_container_width=True):
+                        # O conserto de um dia abre só na sessão: a grade da semana continua a atual
+                        if not dia_conserto:
+                            armazem_grades.definir_atual(v['id'])
+                        carregar_grade_atual(v['id'])
+                        if dia_conserto:
+                            st.session_state.conserto_dia = (st.session_state.grade_horaria.id, dia_conserto)
+                        st.rerun()
+
+    # ===== FIXAR E REGERAR =====
+    if st.session_state.grade_gerada and st.session_state.grade_horaria.aulas:
+        grade = st.session_state.grade_horaria
+        with st.expander(f"📌 Fixar aulas e regerar o restante ({len(grade.fixadas())} fixadas)"):
+            c1, c2, c3 = st.columns(3)
+            with c1:
+                fix_turmas = st.multiselect("Turmas", sorted({a.turma for a in grade.aulas}), key="fix_turmas")
+            with c2:
+                fix_profs = st.multiselect("Professores", sorted({a.professor for a in grade.aulas}), key="fix_profs")
+            with c3:
+                fix_dias = st.multiselect("Dias", DIAS_SEMANA, key="fix_dias")
+            rotulos = {a.id: f"{a.turma} · {a.disciplina} · {a.dia} {HORARIOS_REAIS.get(a.horario, '')}"
+                       for a in sorted(grade.aulas, key=lambda a: (a.turma, DIA_IDX.get(a.dia, 0), a.horario))}
+            fix_aulas = st.multiselect("Aulas", list(rotulos), format_func=rotulos.get, key="fix_aulas")
+            
+            c1, c2, c3 = st.columns(3)
+            with c1:
+                if st.button("📌 Fixar", use_container_width=True):
+                    grade.fixar(fix_aulas, turma=fix_turmas, professor=fix_profs, dia=fix_dias)
+                    st.session_state.indice_grade = None
+                    st.rerun()
+            with c2:
+                if st.button("🔓 Desfixar todas", use_container_width=True):
+                    grade.desfixar()
+                    st.session_state.indice_grade = None
+                    st.rerun()
+            with c3:
+                if st.button("🔁 Regerar não fixadas", use_container_width=True, disabled=not grade.fixadas()):
+                    with st.spinner("⏳ Resolvendo apenas o restante..."):
+                        fixadas = grade.fixadas()
+                        try:
+                            scheduler = gerar_na_fila(turmas_v, profs_v, discs_v, salas_v, fixadas)
+                        except CotaExcedida as e:
+                            st.error(f"⏳ Cota de geração da escola atingida: {e}")
+                            st.stop()
+                        usar_compacta(scheduler)
+                        gravar_grade(turmas_v, profs_v, discs_v, salas_v,
+                                     dict(opcoes_solver(), parcial=len(fixadas)), fixadas=len(fixadas))
+                    st.rerun()
+
+    # ===== EXPORTAÇÃO EM LOTE =====
+    if st.session_state.grade_gerada and st.session_state.grade_horaria.aulas:
+        with st.expander("📦 Exportar todas as grades (turmas, professores, salas)"):
+            grade_id = st.session_state.grade_horaria.id
+            if st.session_state.get('exportacao_grade_id') != grade_id:
+                st.session_state.exportacao = None
+
+            if st.button("⚙️ Preparar arquivos", use_container_width=True):
+                xlsx = io.BytesIO()
+                n_planilhas = exportar_xlsx(st.session_state.grade_horaria, xlsx)
+                doc = io.StringIO()
+                exportar_html(st.session_state.grade_horaria, doc)
+                st.session_state.exportacao = (xlsx.getvalue(), doc.getvalue().encode('utf-8'), n_planilhas)
+                st.session_state.exportacao_grade_id = grade_id
+
+            if st.session_state.get('exportacao'):
+                xlsx_bytes, html_bytes, n_planilhas = st.session_state.exportacao
+                st.caption(f"{n_planilhas} visões geradas")
+                c1, c2 = st.columns(2)
+                with c1:
+                    st.download_button("📊 XLSX", xlsx_bytes, "grades.xlsx",
+                                       "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                                       use_container_width=True)
+                with c2:
+                    st.download_button("🌐 HTML (imprimir/PDF)", html_bytes, "grades.html", "text/html",
+                                       use_container_width=True)
+
+    # ===== SUBSTITUIÇÕES =====
+    if st.session_state.grade_gerada and st.session_state.grade_horaria.aulas:
+        with st.expander("🔁 Substituições (professores ausentes)"):
+            substitutos = obter_substitutos()
+            c1, c2 = st.columns([3, 1])
+            with c1:
+                ausentes = st.multiselect("Ausentes", sorted({a.professor for a in st.session_state.grade_horaria.aulas}),
+                                          key="substituicao_ausentes")
+            with c2:
+                dia_ausencia = st.selectbox("Dia", DIAS_SEMANA, format_func=str.capitalize,
+                                            key="substituicao_dia")
+            if ausentes:
+                cobertura = substitutos.cobrir_ausencias(ausentes, dia_ausencia)
+                if cobertura:
+                    st.dataframe(pd.DataFrame([{
+                        'Horário': HORARIOS_REAIS.get(c['aula'].horario, c['aula'].horario + 1),
+                        'Semana': rotulo_semana(c['aula'].semana),
+                        'Turma': c['aula'].turma,
+                        'Disciplina': c['aula'].disciplina,
+                        'Sala': c['aula'].sala,
+                        'Ausente': c['ausente'],
+                        'Substituto': c['substituto'] or "⚠️ ninguém livre",
+                        'Outras opções': ', '.join(x['professor'] for x in c['candidatos'][1:]),
+                    } for c in cobertura]), use_container_width=True, hide_index=True)
+                else:
+                    st.info("Nenhuma aula dos ausentes neste dia")
+
+    # ===== REPLANEJAMENTO DO DIA =====
+    if conserto_exibido():
+        c1, c2 = st.columns([4, 1])
+        with c1:
+            st.info(f"🚨 Exibindo o conserto de {conserto_exibido()} - a grade da semana não mudou")
+        with c2:
+            if st.button("↩️ Grade da semana", use_container_width=True):
+                st.session_state.conserto_dia = None
+                carregar_grade_atual()
+                st.rerun()
+
+    if st.session_state.grade_gerada and st.session_state.grade_horaria.aulas:
+        with st.expander("🚨 Replanejar um dia (professores/salas indisponíveis)"):
+            grade = st.session_state.grade_horaria
+            c1, c2, c3 = st.columns([1, 2, 2])
+            with c1:
+                dia_replan = st.selectbox("Dia", DIAS_SEMANA, format_func=str.capitalize, key="replan_dia")
+            with c2:
+                profs_fora = st.multiselect("Professores indisponíveis", sorted({a.professor for a in grade.aulas}),
+                                            key="replan_profs")
+            with c3:
+                salas_fora = st.multiselect("Salas indisponíveis", sorted({a.sala for a in grade.aulas}),
+                                            key="replan_salas")
+            if st.button("🚨 Replanejar", use_container_width=True, disabled=not (profs_fora or salas_fora)):
+                st.session_state.replanejamento = (grade.id, replanejar_dia(
+                    grade, dia_replan, profs_v, salas_v, turmas_v, profs_fora, salas_fora,
+                    n_horarios=obter_indice().n_horarios))
+
+            replan = st.session_state.get('replanejamento')
+            if replan and replan[0] == grade.id:
+                r = replan[1]
+                st.caption(f"{r['deslocadas']} aula(s) deslocada(s) · {r['status']} · {r['segundos'] * 1000:.0f} ms")
+                if r['alteracoes']:
+                    st.dataframe(pd.DataFrame([{
+                        'Turma': m['turma'],
+                        'Disciplina': m['disciplina'],
+                        'Semana': rotulo_semana(m['semana']),
+                        'Horário': f"{HORARIOS_REAIS.get(m['de']['horario'], '')} → "
+                                   f"{HORARIOS_REAIS.get(m['para']['horario'], '')}",
+                        'Professor': f"{m['de']['professor']} → {m['para']['professor']}",
+                        'Sala': f"{m['de']['sala']} → {m['para']['sala']}",
+                    } for m in r['alteracoes']]), use_container_width=True, hide_index=True)
+                for a in r['descobertas']:
+                    st.warning(f"⚠️ Sem conserto (cancelada no dia): {a.turma} · {a.disciplina} · "
+                               f"{HORARIOS_REAIS.get(a.horario, '')} · {a.professor}")
+                if r['alteracoes'] or r['descobertas']:
+                    st.caption(f"O conserto vale só para {dia_replan}: é gravado como versão à parte e a "
+                               "grade da semana continua a atual (⭐ em Versões)")
+                    if st.button(f"✅ Aplicar a {dia_replan}", use_container_width=True):
+                        original = st.session_state.grade_horaria
+                        st.session_state.grade_horaria = r['grade']
+                        st.session_state.indice_grade = None
+                        versao = gravar_grade(turmas_v, profs_v, discs_v, salas_v,
+                                              dict(opcoes_solver(), replanejamento=dia_replan), tornar_atual=False,
+                                              replanejamento=dia_replan, deslocadas=r['deslocadas'])
+                        if versao is None:
+                            st.session_state.grade_horaria = original
+                            st.session_state.indice_grade = None
+                            st.error("❌ Conserto com choques - não foi gravado (a grade não mudou)")
+                        else:
+                            st.session_state.replanejamento = None
+                            st.session_state.conserto_dia = (r['grade'].id, dia_replan)
+                            st.rerun()
+
     st.divider()
     
     # ===== EXIBIÇÃO COM st.html() =====
     if st.session_state.grade_gerada:
-        st.subheader("📊 Grade por Turma")
+        indice = obter_indice()
+        
+        visoes = {"🎓 Turma": 'turma', "👨‍🏫 Professor": 'professor', "🏛️ Sala": 'sala'}
+        visao = st.radio("Visualizar por:", list(visoes), horizontal=True, key="visao_grade_selector")
+        campo = visoes[visao]
         
-        turmas_com_aulas = sorted(set(a.turma for a in st.session_state.grade_horaria.aulas))
+        st.subheader(f"📊 Grade por {visao.split(' ', 1)[1]}")
         
-        if turmas_com_aulas:
-            turma_selecionada = st.selectbox(
-                "Selecione a turma:",
-                turmas_com_aulas,
-                key="turma_grade_selector"
+        nomes_com_aulas = sorted(indice.nomes[campo])
+        
+        if nomes_com_aulas:
+            nome_selecionado = st.selectbox(
+                "Selecione:",
+                nomes_com_aulas,
+                key=f"{campo}_grade_selector"
             )
             
             # ===== RENDERIZAR COM st.html() =====
-            html_grade = gerar_html_grade(st.session_state.grade_horaria, turma_selecionada)
+            html_grade = html_grade_cache(campo, nome_selecionado)
             st.html(html_grade)
             
+            editar_aulas(campo, nome_selecionado, indice)
+            
             # Resumo
             with st.expander("📈 Resumo"):
-                aulas_turma = [a for a in st.session_state.grade_horaria.aulas if a.turma == turma_selecionada]
-                c1, c2, c3, c4 = st.columns(4)
-                with c1: st.metric("Aulas", len(aulas_turma))
-                with c2: st.metric("Disciplinas", len(set(a.disciplina for a in aulas_turma)))
-                with c3: st.metric("Professores", len(set(a.professor for a in aulas_turma)))
-                with c4: st.metric("Salas", len(set(a.sala for a in aulas_turma)))
+                resumo = indice.resumo(campo, nome_selecionado)
+                outros = [c for c in ('turma', 'disciplina', 'professor', 'sala') if c != campo]
+                rotulos = {'turma': "Turmas", 'disciplina': "Disciplinas", 'professor': "Professores", 'sala': "Salas"}
+                cols = st.columns(5)
+                with cols[0]: st.metric("Aulas", resumo['aulas'])
+                for col, outro in zip(cols[1:4], outros):
+                    with col: st.metric(rotulos[outro], resumo[outro])
+                with cols[4]: st.metric("Ocupação", f"{resumo['ocupacao']:.0%}")
+            
+            with st.expander("🔥 Ocupação"):
+                ocup = indice.ocupacao(campo)
+                ordem = [indice.indices[campo][n] for n in nomes_com_aulas]
+                slots = [f"{d[:3].capitalize()} {HORARIOS_REAIS.get(h, h + 1)}"
+                         for d in DIAS_SEMANA for h in range(indice.n_horarios)]
+                fig = px.imshow(
+                    ocup[ordem].reshape(len(ordem), -1),
+                    x=slots, y=nomes_com_aulas,
+                    color_continuous_scale="Blues", aspect="auto",
+                    labels={'color': "Aulas"}
+                )
+                fig.update_layout(height=max(250, 28 * len(ordem)), margin=dict(l=0, r=0, t=10, b=0))
+                st.plotly_chart(fig, use_container_width=True)
         else:
-            st.info("Nenhuma turma com aulas")
+            st.info("Nenhuma aula nesta visão")
     else:
         st.info("Clique em 'Gerar Grade' para criar")
 
@@ -687,5 +1381,38 @@ with aba_rel:
                 for d in p.disciplinas:
                     st.write(f"📖 {d}")
 
+    # ===== DIAGNÓSTICO =====
+    st.divider()
+    st.subheader("🩺 Diagnóstico")
+    st.checkbox("Perfilar a próxima geração (cProfile)", key="perfilar_geracao")
+    st.checkbox(f"Exportar o modelo CP-SAT das gerações ({ajuste_solver.MODELOS_DIR})", key="exportar_modelo",
+                help="Para reproduzir offline: python -m ajuste_solver")
+    
+    metricas = instrumentacao.resumo()
+    if metricas:
+        df_metricas = pd.DataFrame(metricas)[['nome', 'chamadas', 'total_ms', 'media_ms', 'max_ms', 'ultimo_ms']]
+        st.dataframe(df_metricas.round(2), use_container_width=True, hide_index=True)
+    else:
+        st.caption("Nenhuma medição nesta sessão do servidor")
+    
+    c1, c2 = st.columns(2)
+    with c1:
+        st.write("**Último CP-SAT**")
+        if instrumentacao.ultimo_solver:
+            st.json(instrumentacao.ultimo_solver)
+        else:
+            st.caption("Solver ainda não executado")
+    with c2:
+        st.write("**Contadores**")
+        st.json(instrumentacao.contadores() or {})
+        if st.button("🧽 Zerar métricas"):
+            instrumentacao.limpar()
+            st.rerun()
+    
+    if instrumentacao.ultimo_perfil:
+        with st.expander("🔬 Último perfil (cProfile)"):
+            st.code(instrumentacao.ultimo_perfil)
+    st.caption(f"Log: {instrumentacao.LOG_FILE}")
+
 st.markdown("---")
 st.markdown("<div style='text-align: center;'>🎓 GELEIA v2.6 | OR-Tools ✅</div>", unsafe_allow_html=True)
@@ -0,0 +1,171 @@
+"""
+armazem_grades.py - Persistência das grades horárias geradas
+Cada grade é gravada em colunas (.npz) e identificada pela chave
+(hash do conjunto de dados de entrada + opções do solver).
+Um índice JSON guarda as versões e qual delas é a atual.
+As grades ficam no diretório do banco ativo (uma pasta por escola).
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from models import GradeHoraria, HORARIOS_REAIS
+from grade_compacta import GradeCompacta
+import database
+
+# ============================================================================
+# CONFIGURAÇÃO
+# ============================================================================
+
+def _dir_grades() -> Path:
+    return database.banco_atual().diretorio / "grades"
+
+def _indice_file() -> Path:
+    return _dir_grades() / "indice.json"
+
+# ============================================================================
+# CHAVE DE ENTRADA
+# ============================================================================
+
+def chave_entrada(turmas: List, professores: List, disciplinas: List, salas: List,
+                  opcoes: Dict = None) -> str:
+    """
+    Hash do conjunto de dados + opções do solver
+    Ids e ordem das listas não entram: o mesmo cadastro gera a mesma chave
+    """
+    dados = database.serializar_tudo(turmas, professores, disciplinas, salas)
+    canonico = {}
+    for entidade in ('turmas', 'professores', 'disciplinas', 'salas'):
+        itens = [{k: v for k, v in d.items() if k != 'id'} for d in dados[entidade]]
+        for item in itens:
+            for k, v in item.items():
+                if isinstance(v, list):
+                    item[k] = sorted(v)
+        canonico[entidade] = sorted(itens, key=lambda d: json.dumps(d, sort_keys=True, ensure_ascii=False))
+    canonico['opcoes'] = opcoes or {}
+    texto = json.dumps(canonico, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()[:16]
+
+def opcoes_chave(motor: str, n_horarios: Optional[int] = None) -> Dict:
+    """Opções da chave; os horários por dia só entram fora do padrão (chaves antigas continuam valendo)"""
+    opcoes = {'motor': motor}
+    if n_horarios and n_horarios != len(HORARIOS_REAIS):
+        opcoes['horarios'] = n_horarios
+    return opcoes
+
+# ============================================================================
+# ÍNDICE
+# ============================================================================
+
+def _ler_indice() -> Dict:
+    if not _indice_file().exists():
+        return {'atual': None, 'versoes': []}
+    with open(_indice_file(), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _gravar_indice(indice: Dict) -> None:
+    _dir_grades().mkdir(parents=True, exist_ok=True)
+    temporario = _indice_file().with_suffix('.json.tmp')
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(indice, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, _indice_file())
+
+def listar_versoes() -> List[Dict]:
+    """Versões gravadas (mais recentes primeiro), com a marca 'atual'"""
+    indice = _ler_indice()
+    versoes = []
+    for v in reversed(indice['versoes']):
+        v = dict(v)
+        v['atual'] = v['id'] == indice['atual']
+        versoes.append(v)
+    return versoes
+
+def versao_atual() -> Optional[str]:
+    """Id da versão marcada como atual (None sem grade gravada)"""
+    return _ler_indice()['atual']
+
+def buscar_por_chave(chave: str) -> Optional[Dict]:
+    """Versão mais recente gerada a partir da mesma chave de entrada"""
+    for v in reversed(_ler_indice()['versoes']):
+        if v['chave'] == chave:
+            return v
+    return None
+
+# ============================================================================
+# GRAVAÇÃO / LEITURA
+# ============================================================================
+
+def salvar_grade(grade: GradeHoraria, chave: str, opcoes: Dict = None,
+                 compacta: GradeCompacta = None, tornar_atual: bool = True,
+                 validacao: Dict[str, int] = None) -> str:
+    """
+    Grava a grade e registra a versão no índice
+    Retorna: id da versão
+    """
+    compacta = compacta if compacta is not None else GradeCompacta.de_grade(grade)
+    _dir_grades().mkdir(parents=True, exist_ok=True)
+
+    versao_id = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{grade.id}"
+    arquivo = _dir_grades() / f"{versao_id}.npz"
+    compacta.salvar(arquivo)
+
+    indice = _ler_indice()
+    indice['versoes'].append({
+        'id': versao_id,
+        'chave': chave,
+        'opcoes': opcoes or {},
+        'criado_em': datetime.now().isoformat(timespec='seconds'),
+        'aulas': len(compacta),
+        'arquivo': arquivo.name,
+        'validacao': validacao or {},
+    })
+    if tornar_atual:
+        indice['atual'] = versao_id
+    _gravar_indice(indice)
+    return versao_id
+
+def carregar_compacta(versao_id: str = None) -> Optional[GradeCompacta]:
+    """Lê uma versão (ou a atual) na forma compacta, sem passar pelo solver"""
+    indice = _ler_indice()
+    versao_id = versao_id or indice['atual']
+    if not versao_id:
+        return None
+    for v in indice['versoes']:
+        if v['id'] == versao_id:
+            try:
+                return GradeCompacta.carregar(_dir_grades() / v['arquivo'])
+            except Exception as e:
+                print(f"❌ Erro carregar grade {versao_id}: {e}")
+                return None
+    return None
+
+def carregar_grade(versao_id: str = None) -> Optional[GradeHoraria]:
+    """Lê uma versão (ou a atual) como GradeHoraria"""
+    compacta = carregar_compacta(versao_id)
+    return compacta.para_grade() if compacta is not None else None
+
+def definir_atual(versao_id: str) -> bool:
+    """Marca uma versão existente como a grade atual"""
+    indice = _ler_indice()
+    if not any(v['id'] == versao_id for v in indice['versoes']):
+        return False
+    indice['atual'] = versao_id
+    _gravar_indice(indice)
+    return True
+
+def remover_versao(versao_id: str) -> bool:
+    """Apaga uma versão (arquivo + entrada no índice)"""
+    indice = _ler_indice()
+    restantes = [v for v in indice['versoes'] if v['id'] != versao_id]
+    if len(restantes) == len(indice['versoes']):
+        return False
+    (_dir_grades() / f"{versao_id}.npz").unlink(missing_ok=True)
+    indice['versoes'] = restantes
+    if indice['atual'] == versao_id:
+        indice['atual'] = restantes[-1]['id'] if restantes else None
+    _gravar_indice(indice)
+    return True
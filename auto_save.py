@@ -1,43 +1,163 @@
 """
 auto_save.py - Função de auto-salvamento
+Gravação adiada: edições próximas viram uma única escrita em segundo plano
 """
 
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
 import database
-import streamlit as st
+from instrumentacao import cronometrar
 from datetime import datetime
 
+# ============================================================================
+# GRAVAÇÃO ADIADA
+# ============================================================================
+
+JANELA_SEGUNDOS = 1.0
+ATRASO_MAXIMO_SEGUNDOS = 5.0
+
+
+class GravadorAdiado:
+    """
+    Agrupa pedidos de salvamento dentro de uma janela e grava uma única vez
+    A serialização (objetos → dicts) acontece na thread que pede o salvamento;
+    apenas a escrita em disco roda na thread do temporizador.
+    Um estado pendente por sessão: cada sessão grava o seu com a própria geração
+    """
+
+    def __init__(self, gravar: Callable[[Dict[str, List[Dict]]], bool],
+                 janela: float = JANELA_SEGUNDOS, atraso_maximo: float = ATRASO_MAXIMO_SEGUNDOS):
+        self._gravar = gravar
+        self.janela = janela
+        self.atraso_maximo = atraso_maximo
+
+        self._lock = threading.Lock()
+        self._lock_escrita = threading.Lock()
+        self._pendentes: 'OrderedDict[Optional[str], Dict]' = OrderedDict()  # sessão → estado
+        self._primeiro_pedido = None
+        self._timer = None
+
+        self.gravacoes = 0
+        self.pedidos = 0
+        self.ultimo_erro = None
+
+    def agendar(self, turmas: List, professores: List, disciplinas: List, salas: List,
+                geracao: int = None, sessao: str = None) -> None:
+        """
+        Registra o estado atual; a escrita acontece após `janela` sem novos pedidos
+        geracao: geração do banco vista pela sessão (não sobrescreve alterações de outras)
+        sessao: o estado substitui só o pendente da mesma sessão
+        """
+        dados = database.serializar_tudo(turmas, professores, disciplinas, salas, geracao)
+        with self._lock:
+            self._pendentes[sessao] = dados
+            self.pedidos += 1
+            agora = time.monotonic()
+            if self._primeiro_pedido is None:
+                self._primeiro_pedido = agora
+
+            # Debounce limitado: nunca adia além do atraso máximo
+            espera = min(self.janela, self._primeiro_pedido + self.atraso_maximo - agora)
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(max(espera, 0.0), self._executar)
+            self._timer.daemon = True
+            self._timer.start()
 
-def salvar_tudo() -> bool:
+    def _retirar_pendentes(self) -> 'OrderedDict[Optional[str], Dict]':
+        with self._lock:
+            pendentes, self._pendentes = self._pendentes, OrderedDict()
+            self._primeiro_pedido = None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            return pendentes
+
+    def _executar(self) -> bool:
+        """
+        Grava o estado pendente de cada sessão, na ordem dos pedidos
+        Falha: o estado volta para a fila (se a sessão não pediu outro depois)
+        """
+        with self._lock_escrita:
+            sucesso = True
+            for sessao, dados in self._retirar_pendentes().items():
+                if self._gravar(dados):
+                    self.gravacoes += 1
+                    self.ultimo_erro = None
+                else:
+                    self.ultimo_erro = datetime.now()
+                    sucesso = False
+                    with self._lock:
+                        self._pendentes.setdefault(sessao, dados)
+            return sucesso
+
+    def flush(self) -> bool:
+        """Grava imediatamente o que estiver pendente (botão 💾 e encerramento)"""
+        return self._executar()
+
+    def descartar(self) -> None:
+        """Cancela o que estiver pendente sem gravar (ex.: antes de limpar o banco)"""
+        with self._lock_escrita:
+            self._retirar_pendentes()
+
+    @property
+    def pendente(self) -> bool:
+        return bool(self._pendentes)
+
+
+gravador = GravadorAdiado(database.gravar_serializado)
+atexit.register(gravador.flush)
+
+# ============================================================================
+# SESSÃO
+# ============================================================================
+
+@cronometrar('sessao.salvar_tudo')
+def salvar_tudo(imediato: bool = False) -> bool:
     """
     Salva todos os dados da sessão no banco de dados
+    imediato: grava agora em vez de esperar a janela de agrupamento
     Retorna True se bem-sucedido, False caso contrário
     """
+    import streamlit as st
+    from session_state import escola_da_sessao, id_sessao
     try:
-        # Salvar cada tipo de dado
-        sucesso = True
-        
-        sucesso = sucesso and database.salvar_turmas(st.session_state.turmas)
-        sucesso = sucesso and database.salvar_professores(st.session_state.professores)
-        sucesso = sucesso and database.salvar_disciplinas(st.session_state.disciplinas)
-        sucesso = sucesso and database.salvar_salas(st.session_state.salas)
-        
+        gravador = escola_da_sessao().gravador
+        gravador.agendar(
+            st.session_state.turmas,
+            st.session_state.professores,
+            st.session_state.disciplinas,
+            st.session_state.salas,
+            st.session_state.get('geracao'),
+            id_sessao()
+        )
+        sucesso = gravador.flush() if imediato else True
+
         if sucesso:
             st.session_state.timestamp_ultima_atualizacao = datetime.now()
-        
+
         return sucesso
-    
+
     except Exception as e:
         st.error(f"❌ Erro ao salvar: {str(e)}")
         return False
 
 
+@cronometrar('sessao.carregar_tudo')
 def carregar_tudo() -> bool:
     """Carrega todos os dados do banco de dados"""
+    import streamlit as st
+    from session_state import escola_da_sessao
     try:
-        st.session_state.turmas = database.carregar_turmas()
-        st.session_state.professores = database.carregar_professores()
-        st.session_state.disciplinas = database.carregar_disciplinas()
-        st.session_state.salas = database.carregar_salas()
+        registro = escola_da_sessao().registro()
+        st.session_state.turmas = registro.turmas
+        st.session_state.professores = registro.professores
+        st.session_state.disciplinas = registro.disciplinas
+        st.session_state.salas = registro.salas
         return True
     except Exception as e:
         st.error(f"❌ Erro ao carregar: {str(e)}")
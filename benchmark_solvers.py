@@ -0,0 +1,135 @@
+"""
+benchmark_solvers.py - Compara as formulações CP-SAT em dias de 6 a 8 horários
+Uso:
+    python -m benchmark_solvers --turmas 6 --horarios 6 7 8 --tempo 20
+Para cada instância sintética mede o tamanho do modelo (variáveis e
+restrições), o tempo de montagem e de solve, e valida a grade obtida
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import instrumentacao
+from models import Turma, Professor, Disciplina, Sala, DIAS_SEMANA
+from simple_scheduler import SimpleGradeHoraria
+from scheduler_intervalos import GradeIntervalos
+from validador import validar_grade
+
+# ============================================================================
+# CONFIGURAÇÃO
+# ============================================================================
+
+MOTORES = {
+    'simples': SimpleGradeHoraria,
+    'intervalos': GradeIntervalos,
+}
+
+OCUPACAO = 0.8         # fração dos horários da turma preenchida com aulas
+TURMAS_POR_PROF = 3    # turmas que cada professor atende por disciplina
+
+# ============================================================================
+# INSTÂNCIAS
+# ============================================================================
+
+def instancia(n_turmas: int, n_horarios: int, semente: int = 0) -> Dict[str, List]:
+    """Escola sintética: todas as turmas com as mesmas disciplinas, parte delas geminadas"""
+    rng = random.Random(semente)
+    turmas = [Turma(f"T{i + 1}", 1, "Benchmark", 30) for i in range(n_turmas)]
+    nomes_turmas = [t.nome for t in turmas]
+
+    disciplinas = []
+    alvo = int(len(DIAS_SEMANA) * n_horarios * OCUPACAO)
+    while alvo > 0:
+        carga = min(alvo, rng.choice([2, 3, 4]))
+        duracao = 2 if carga % 2 == 0 and rng.random() < 0.5 else 1
+        disciplinas.append(Disciplina(f"D{len(disciplinas) + 1}", carga, nomes_turmas, duracao=duracao))
+        alvo -= carga
+
+    professores = []
+    for d in disciplinas:
+        for k in range(math.ceil(n_turmas / TURMAS_POR_PROF)):
+            professores.append(Professor(f"P{d.nome}_{k + 1}", [d.nome]))
+
+    salas = [Sala(f"S{i + 1}", 40, "Bloco A", 0) for i in range(n_turmas)]
+    return {'turmas': turmas, 'professores': professores, 'disciplinas': disciplinas, 'salas': salas}
+
+# ============================================================================
+# EXECUÇÃO
+# ============================================================================
+
+def medir_motor(motor: str, dados: Dict[str, List], n_horarios: int, tempo: float) -> Dict:
+    """Gera a grade com um motor e devolve uma linha do relatório"""
+    instrumentacao.limpar()
+    scheduler = MOTORES[motor](dados['turmas'], dados['professores'], dados['disciplinas'], dados['salas'],
+                               tempo_maximo=tempo, progresso=lambda nivel, msg: None, n_horarios=n_horarios)
+    inicio = time.perf_counter()
+    grade = scheduler.gerar_grade()
+    total = time.perf_counter() - inicio
+
+    tempos = {linha['nome']: linha['ultimo_ms'] for linha in instrumentacao.resumo()}
+    proto = scheduler.modelo.Proto() if scheduler.modelo is not None else None
+    solver = instrumentacao.ultimo_solver or {}
+    relatorio = validar_grade(grade, dados['turmas'], dados['professores'], dados['disciplinas'], dados['salas'],
+                              n_horarios=n_horarios)
+    return {
+        'motor': motor,
+        'horarios': n_horarios,
+        'variaveis': len(proto.variables) if proto else 0,
+        'restricoes': len(proto.constraints) if proto else 0,
+        'montagem_ms': round(tempos.get('solver.modelo', 0.0), 1),
+        'solve_s': round(tempos.get('solver.solve', 0.0) / 1000, 3),
+        'total_s': round(total, 3),
+        'status': solver.get('status'),
+        'fallback': instrumentacao.contadores().get('solver.fallback', 0),
+        'aulas': len(grade.aulas),
+        'choques': relatorio.contagem().get('choque', 0),
+        'bloqueantes': len(relatorio.bloqueantes()),
+    }
+
+def executar(n_turmas: int, horarios: List[int], motores: List[str], tempo: float,
+             semente: int = 0) -> List[Dict]:
+    linhas = []
+    for n_horarios in horarios:
+        dados = instancia(n_turmas, n_horarios, semente)
+        for motor in motores:
+            linhas.append(medir_motor(motor, dados, n_horarios, tempo))
+            _imprimir(linhas[-1])
+    return linhas
+
+def _imprimir(linha: Dict) -> None:
+    print(f"{linha['motor']:>10} | {linha['horarios']} horários | {linha['variaveis']:>7} var | "
+          f"{linha['restricoes']:>7} restr | montagem {linha['montagem_ms']:>8.1f} ms | "
+          f"solve {linha['solve_s']:>7.3f} s | {linha['status']} | {linha['aulas']} aulas, "
+          f"{linha['choques']} choque(s), {linha['bloqueantes']} bloqueante(s)"
+          f"{' (fallback)' if linha['fallback'] else ''}", flush=True)
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmark_solvers",
+                                     description="Compara as formulações CP-SAT da grade")
+    parser.add_argument('--turmas', type=int, default=6)
+    parser.add_argument('--horarios', type=int, nargs='+', default=[6, 7, 8], help="horários por dia")
+    parser.add_argument('--motores', nargs='+', choices=sorted(MOTORES), default=list(MOTORES))
+    parser.add_argument('-t', '--tempo', type=float, default=20.0, help="tempo máximo do solver (s)")
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--saida', type=Path, default=None, help="grava os resultados em JSON")
+    args = parser.parse_args(argv)
+
+    linhas = executar(args.turmas, args.horarios, args.motores, args.tempo, args.semente)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(linhas, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""
+cenarios.py - Simulação de cenários ("e se...?") sobre o cadastro da escola
+Cada cenário é o cadastro base + uma lista de alterações (contratar
+professor, fechar sala, mudar carga...). A base é resolvida primeiro; as
+variantes rodam em paralelo com a grade base como dica, dentro de um
+orçamento de tempo comum, e saem numa tabela comparativa
+Uso:
+    python -m cenarios escola.json cenarios.json -t 120 -p 4 --saida comparacao.csv
+Arquivo de cenários:
+    {"cenarios": [{"nome": "Mais um de Matemática",
+                   "alteracoes": [{"tipo": "contratar_professor", "nome": "Novo",
+                                   "disciplinas": ["Matemática"]}]}]}
+"""
+
+import argparse
+import copy
+import csv
+import json
+import math
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from models import Aula, GradeHoraria, Professor, Registro, Sala, HORARIOS_REAIS, MAX_HORARIOS_DIA
+
+# ============================================================================
+# CONFIGURAÇÃO
+# ============================================================================
+
+NOME_BASE = "(base)"
+RESOLVIDO = ('OPTIMAL', 'FEASIBLE')
+
+COLUNAS = ('cenario', 'status', 'objetivo', 'aulas', 'problemas', 'janelas', 'janelas_max',
+           'delta_janelas', 'mudancas', 'segundos', 'erro')
+
+# ============================================================================
+# ALTERAÇÕES
+# ============================================================================
+
+def _buscar(registro: Registro, entidade: str, nome: str):
+    obj = registro.por_nome[entidade].get(nome)
+    if obj is None:
+        raise ValueError(f"{entidade[:-1].capitalize()} '{nome}' não encontrado(a)")
+    return obj
+
+def _contratar_professor(registro: Registro, alteracao: Dict) -> None:
+    if alteracao['nome'] in registro.por_nome['professores']:
+        raise ValueError(f"Professor '{alteracao['nome']}' já existe")
+    registro.professores.append(Professor(alteracao['nome'], list(alteracao.get('disciplinas', [])),
+                                          carga_maxima=int(alteracao.get('carga_maxima', 0))))
+
+def _remover_professor(registro: Registro, alteracao: Dict) -> None:
+    registro.professores.remove(_buscar(registro, 'professores', alteracao['nome']))
+
+def _habilitar_professor(registro: Registro, alteracao: Dict) -> None:
+    professor = _buscar(registro, 'professores', alteracao['nome'])
+    professor.disciplinas = professor.disciplinas + [d for d in alteracao.get('disciplinas', [])
+                                                     if d not in professor.disciplinas]
+
+def _limitar_professor(registro: Registro, alteracao: Dict) -> None:
+    _buscar(registro, 'professores', alteracao['nome']).carga_maxima = int(alteracao['carga_maxima'])
+
+def _fechar_sala(registro: Registro, alteracao: Dict) -> None:
+    registro.salas.remove(_buscar(registro, 'salas', alteracao['nome']))
+
+def _abrir_sala(registro: Registro, alteracao: Dict) -> None:
+    if alteracao['nome'] in registro.por_nome['salas']:
+        raise ValueError(f"Sala '{alteracao['nome']}' já existe")
+    registro.salas.append(Sala(alteracao['nome'], int(alteracao.get('capacidade', 30)),
+                               alteracao.get('predio', ''), int(alteracao.get('andar', 0))))
+
+def _alterar_carga(registro: Registro, alteracao: Dict) -> None:
+    _buscar(registro, 'disciplinas', alteracao['disciplina']).carga_semanal = int(alteracao['carga'])
+
+
+# tipo → função (registro, alteração) que modifica o registro no lugar
+ALTERACOES: Dict[str, Callable[[Registro, Dict], None]] = {
+    'contratar_professor': _contratar_professor,
+    'remover_professor': _remover_professor,
+    'habilitar_professor': _habilitar_professor,
+    'limitar_professor': _limitar_professor,
+    'fechar_sala': _fechar_sala,
+    'abrir_sala': _abrir_sala,
+    'alterar_carga': _alterar_carga,
+}
+
+def aplicar_alteracoes(registro: Registro, alteracoes: List[Dict]) -> Registro:
+    """Cópia do registro com as alterações aplicadas em ordem (a base não muda)"""
+    variante = copy.deepcopy(registro)
+    for alteracao in alteracoes:
+        funcao = ALTERACOES.get(alteracao.get('tipo'))
+        if funcao is None:
+            raise ValueError(f"Alteração desconhecida: {alteracao.get('tipo')}")
+        funcao(variante, alteracao)
+        variante.reindexar()
+    return variante
+
+def carregar_cenarios(arquivo: Path) -> List[Dict]:
+    """Lista de {'nome', 'alteracoes'} (aceita a lista pura ou {'cenarios': [...]})"""
+    with open(arquivo, 'r', encoding='utf-8') as f:
+        doc = json.load(f)
+    cenarios = doc.get('cenarios', []) if isinstance(doc, dict) else doc
+    return [{'nome': c.get('nome') or f"Cenário {i + 1}", 'alteracoes': c.get('alteracoes', [])}
+            for i, c in enumerate(cenarios)]
+
+# ============================================================================
+# RESOLUÇÃO
+# ============================================================================
+
+def tempo_por_variante(orcamento: float, n_cenarios: int, processos: int) -> float:
+    """Divide o orçamento entre a base e as rodadas de variantes em paralelo"""
+    rodadas = 1 + math.ceil(n_cenarios / max(processos, 1))
+    return orcamento / rodadas
+
+def _mudancas(referencia: List[Aula], grade: GradeHoraria) -> int:
+    """Aulas da referência que não estão mais no mesmo (turma, disciplina, dia, horário, semana)"""
+    def chave(a):
+        return a.turma, a.disciplina, a.dia, a.horario, a.semana
+    return sum((Counter(map(chave, referencia)) - Counter(map(chave, grade.aulas))).values())
+
+def _gerar(registro: Registro, motor: str, tempo: float, dicas: Optional[List[Aula]] = None,
+           horarios: Optional[int] = None) -> Tuple[GradeHoraria, Dict]:
+    """Resolve um cadastro e mede a grade (status, objetivo, problemas, janelas)"""
+    import instrumentacao
+    from cli import MOTORES
+    from grade_compacta import GradeCompacta
+    from validador import validar_grade
+
+    instrumentacao.limpar()
+    inicio = time.perf_counter()
+    grade = MOTORES[motor](registro, {'tempo': tempo, 'dicas': dicas, 'horarios': horarios})
+    solver = instrumentacao.ultimo_solver or {}
+    relatorio = validar_grade(grade, *registro.listas(), n_horarios=horarios)
+    janelas = GradeCompacta.de_grade(grade).janelas('professor')
+    return grade, {
+        'status': solver.get('status') or 'SEM_SOLVER',
+        'objetivo': solver.get('objetivo') if solver.get('status') in RESOLVIDO else None,
+        'aulas': len(grade.aulas),
+        'problemas': len(relatorio.problemas),
+        'janelas': int(janelas.sum()),
+        'janelas_max': int(janelas.max()) if len(janelas) else 0,
+        'mudancas': _mudancas(dicas, grade) if dicas else 0,
+        'segundos': round(time.perf_counter() - inicio, 2),
+        'erro': None,
+    }
+
+def resolver_variante(nome: str, registro: Registro, motor: str, tempo: float,
+                      dicas: List[Aula], horarios: Optional[int] = None) -> Dict:
+    """Resolve um cenário (roda em processo separado)"""
+    try:
+        _, linha = _gerar(registro, motor, tempo, dicas, horarios)
+    except Exception as e:
+        linha = {'status': 'ERRO', 'erro': str(e)}
+    return {'cenario': nome, **linha}
+
+def simular(registro: Registro, cenarios: List[Dict], motor: str = 'simples', orcamento: float = 60.0,
+            processos: Optional[int] = None, horarios: Optional[int] = None) -> List[Dict]:
+    """
+    Resolve a base e depois as variantes em paralelo, com a grade base como dica
+    Retorna: linhas da comparação, a base primeiro
+    """
+    processos = processos or os.cpu_count() or 1
+    tempo = tempo_por_variante(orcamento, len(cenarios), processos)
+    print(f"🚀 {len(cenarios)} cenário(s), motor '{motor}', {tempo:.1f}s por resolução", flush=True)
+
+    grade_base, base = _gerar(registro, motor, tempo, horarios=horarios)
+    linhas = [{'cenario': NOME_BASE, **base}]
+    _imprimir(linhas[0])
+
+    variantes, resultados = [], []
+    for c in cenarios:
+        try:
+            variantes.append((c['nome'], aplicar_alteracoes(registro, c['alteracoes'])))
+        except (ValueError, KeyError) as e:
+            resultados.append({'cenario': c['nome'], 'status': 'ERRO', 'erro': f"alteração inválida: {e}"})
+            _imprimir(resultados[-1])
+
+    if variantes:
+        with ProcessPoolExecutor(max_workers=min(processos, len(variantes))) as executor:
+            futuros = [executor.submit(resolver_variante, nome, variante, motor, tempo, grade_base.aulas, horarios)
+                       for nome, variante in variantes]
+            for futuro in as_completed(futuros):
+                resultados.append(futuro.result())
+                _imprimir(resultados[-1])
+
+    ordem = {c['nome']: i for i, c in enumerate(cenarios)}
+    linhas += sorted(resultados, key=lambda l: ordem.get(l['cenario'], len(ordem)))
+    return comparar(linhas)
+
+def comparar(linhas: List[Dict]) -> List[Dict]:
+    """Completa as colunas e acrescenta a diferença de janelas em relação à base"""
+    base = linhas[0].get('janelas') if linhas else None
+    tabela = []
+    for linha in linhas:
+        linha = {coluna: linha.get(coluna) for coluna in COLUNAS}
+        if base is not None and linha['janelas'] is not None:
+            linha['delta_janelas'] = linha['janelas'] - base
+        tabela.append(linha)
+    return tabela
+
+# ============================================================================
+# SAÍDA
+# ============================================================================
+
+def _imprimir(linha: Dict) -> None:
+    if linha.get('erro'):
+        print(f"❌ {linha['cenario']}: {linha['erro']}", flush=True)
+    else:
+        marca = "✅" if linha['status'] in RESOLVIDO and not linha['problemas'] else "⚠️"
+        print(f"{marca} {linha['cenario']}: {linha['status']}, {linha['aulas']} aulas, "
+              f"{linha['problemas']} problema(s), {linha['janelas']} janela(s), {linha['segundos']}s", flush=True)
+
+def formatar_tabela(tabela: List[Dict]) -> str:
+    """Tabela de texto alinhada (uma linha por cenário)"""
+    cabecalho = ('Cenário', 'Status', 'Objetivo', 'Aulas', 'Problemas', 'Janelas', 'Δ janelas', 'Mudanças')
+    linhas = [cabecalho]
+    for l in tabela:
+        delta = l['delta_janelas']
+        linhas.append((l['cenario'], l['status'] or '', '' if l['objetivo'] is None else f"{l['objetivo']:g}",
+                       str(l['aulas'] if l['aulas'] is not None else ''),
+                       str(l['problemas'] if l['problemas'] is not None else ''),
+                       str(l['janelas'] if l['janelas'] is not None else ''),
+                       '' if delta is None else f"{delta:+d}", str(l['mudancas'] or 0)))
+    larguras = [max(len(linha[i]) for linha in linhas) for i in range(len(cabecalho))]
+    return '\n'.join(' | '.join(c.ljust(w) for c, w in zip(linha, larguras)) for linha in linhas)
+
+def gravar_tabela(tabela: List[Dict], destino: Path) -> None:
+    """CSV ou JSON, pela extensão"""
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    if destino.suffix.lower() == '.json':
+        with open(destino, 'w', encoding='utf-8') as f:
+            json.dump(tabela, f, ensure_ascii=False, indent=2)
+        return
+    with open(destino, 'w', encoding='utf-8-sig', newline='') as f:
+        escritor = csv.DictWriter(f, fieldnames=COLUNAS)
+        escritor.writeheader()
+        escritor.writerows(tabela)
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+def main(argv: List[str] = None) -> int:
+    from cli import MOTORES, carregar_dataset
+
+    parser = argparse.ArgumentParser(prog="python -m cenarios", description="Compara cenários do cadastro")
+    parser.add_argument('entrada', type=Path, help="cadastro base (.json/.xlsx ou pasta de dados)")
+    parser.add_argument('cenarios', type=Path, help="arquivo JSON com os cenários")
+    parser.add_argument('-m', '--motor', choices=sorted(MOTORES), default='simples', help="solver")
+    parser.add_argument('-t', '--orcamento', type=float, default=60.0, help="tempo total para todos os cenários (s)")
+    parser.add_argument('-p', '--processos', type=int, default=None, help="cenários em paralelo (padrão: núcleos)")
+    parser.add_argument('--horarios', type=int, default=len(HORARIOS_REAIS),
+                        help=f"horários por dia (1 a {MAX_HORARIOS_DIA}; padrão: {len(HORARIOS_REAIS)})")
+    parser.add_argument('--saida', type=Path, default=None, help="grava a comparação (.csv ou .json)")
+    args = parser.parse_args(argv)
+
+    if not 1 <= args.horarios <= MAX_HORARIOS_DIA:
+        print(f"❌ Horários por dia fora do intervalo: {args.horarios} (entre 1 e {MAX_HORARIOS_DIA})")
+        return 2
+
+    for caminho in (args.entrada, args.cenarios):
+        if not caminho.exists():
+            print(f"❌ Arquivo não encontrado: {caminho}")
+            return 2
+
+    tabela = simular(carregar_dataset(args.entrada), carregar_cenarios(args.cenarios), args.motor,
+                     args.orcamento, args.processos, args.horarios)
+    print()
+    print(formatar_tabela(tabela))
+    if args.saida:
+        gravar_tabela(tabela, args.saida)
+        print(f"💾 {args.saida}")
+    return 0 if all(not l['erro'] for l in tabela) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""
+cli.py - Geração de grades em lote, sem Streamlit
+Uso:
+    python -m cli escola.json -o saida/ -f json,csv,xlsx
+    python -m cli escolas/ -o saida/ --processos 8 --tempo 30
+Entrada: arquivo .json (qualquer versão do esquema), .xlsx no formato da
+importação, ou uma pasta com vários deles (e subpastas com escola.json)
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from models import GradeHoraria, Registro, HORARIOS_REAIS, MAX_HORARIOS_DIA, rotulo_semana
+
+# ============================================================================
+# CONFIGURAÇÃO
+# ============================================================================
+
+FORMATOS = ('json', 'csv', 'xlsx', 'html')
+EXTENSOES_ENTRADA = ('.json', '.xlsx')
+ARQUIVO_ESCOLA = "escola.json"
+
+
+def _motor_simples(registro: Registro, opcoes: Dict) -> GradeHoraria:
+    from simple_scheduler import SimpleGradeHoraria
+    return SimpleGradeHoraria(*registro.listas(), tempo_maximo=opcoes['tempo'], exportar=opcoes.get('exportar'),
+                              chave=opcoes.get('chave'), dicas=opcoes.get('dicas'),
+                              n_horarios=opcoes.get('horarios')).gerar_grade()
+
+def _motor_intervalos(registro: Registro, opcoes: Dict) -> GradeHoraria:
+    from scheduler_intervalos import GradeIntervalos
+    return GradeIntervalos(*registro.listas(), tempo_maximo=opcoes['tempo'], exportar=opcoes.get('exportar'),
+                           chave=opcoes.get('chave'), dicas=opcoes.get('dicas'),
+                           n_horarios=opcoes.get('horarios')).gerar_grade()
+
+
+# nome → função (registro, opcoes) → GradeHoraria
+MOTORES = {
+    'simples': _motor_simples,
+    'intervalos': _motor_intervalos,
+}
+
+# ============================================================================
+# ENTRADA
+# ============================================================================
+
+def listar_entradas(caminho: Path) -> List[Path]:
+    """Um arquivo, ou todos os conjuntos de dados de uma pasta"""
+    if caminho.is_file():
+        return [caminho]
+    if (caminho / ARQUIVO_ESCOLA).exists():
+        return [caminho]
+    entradas = []
+    for item in sorted(caminho.iterdir()):
+        if item.is_file() and item.suffix.lower() in EXTENSOES_ENTRADA:
+            entradas.append(item)
+        elif item.is_dir() and (item / ARQUIVO_ESCOLA).exists():
+            entradas.append(item)
+    return entradas
+
+def nome_escola(entrada: Path) -> str:
+    return entrada.name if entrada.is_dir() else entrada.stem
+
+def carregar_dataset(entrada: Path) -> Registro:
+    """Lê um conjunto de dados (JSON de qualquer versão, XLSX ou pasta de dados)"""
+    from esquema import migrar, montar_registro
+
+    if entrada.is_dir():
+        from diario import Diario
+        with open(entrada / ARQUIVO_ESCOLA, 'r', encoding='utf-8') as f:
+            doc = migrar(json.load(f))
+        doc = Diario(entrada, seq_snapshot=lambda: int(doc.get('seq', 0))).atualizar(doc)
+        return montar_registro(doc)
+
+    if entrada.suffix.lower() == '.xlsx':
+        from importacao import ler_arquivos, importar
+        tabelas = ler_arquivos([(entrada.name, entrada.read_bytes())])
+        resultado, erros = importar(tabelas, {}, 'substituir')
+        if resultado is None:
+            raise ValueError(f"{len(erros)} erro(s) de validação na planilha")
+        return Registro(resultado['turmas'], resultado['professores'],
+                        resultado['disciplinas'], resultado['salas'])
+
+    with open(entrada, 'r', encoding='utf-8') as f:
+        return montar_registro(migrar(json.load(f)))
+
+# ============================================================================
+# SAÍDA
+# ============================================================================
+
+def aula_para_dict(aula) -> Dict:
+    return {
+        'dia': aula.dia,
+        'horario': aula.horario,
+        'horario_texto': HORARIOS_REAIS.get(aula.horario, ''),
+        'turma': aula.turma,
+        'disciplina': aula.disciplina,
+        'professor': aula.professor,
+        'sala': aula.sala,
+        'semana': aula.semana,
+    }
+
+def gravar_saidas(grade: GradeHoraria, destino: Path, escola: str, formatos: List[str],
+                  metadados: Dict) -> List[str]:
+    """Grava a grade nos formatos pedidos; retorna os arquivos criados"""
+    destino.mkdir(parents=True, exist_ok=True)
+    arquivos = []
+
+    if 'json' in formatos:
+        arquivo = destino / f"{escola}.json"
+        with open(arquivo, 'w', encoding='utf-8') as f:
+            json.dump({**metadados, 'aulas': [aula_para_dict(a) for a in grade.aulas]},
+                      f, ensure_ascii=False, indent=2)
+        arquivos.append(str(arquivo))
+
+    if 'csv' in formatos:
+        arquivo = destino / f"{escola}.csv"
+        with open(arquivo, 'w', encoding='utf-8-sig', newline='') as f:
+            escritor = csv.writer(f)
+            escritor.writerow(['Dia', 'Horário', 'Disciplina', 'Professor', 'Sala', 'Turma', 'Semana'])
+            for a in grade.aulas:
+                escritor.writerow([a.dia.upper(), HORARIOS_REAIS.get(a.horario, ''),
+                                   a.disciplina, a.professor, a.sala, a.turma, rotulo_semana(a.semana)])
+        arquivos.append(str(arquivo))
+
+    if 'xlsx' in formatos:
+        from exportacao import exportar_xlsx
+        arquivo = destino / f"{escola}.xlsx"
+        with open(arquivo, 'wb') as f:
+            exportar_xlsx(grade, f)
+        arquivos.append(str(arquivo))
+
+    if 'html' in formatos:
+        from exportacao import exportar_html
+        arquivo = destino / f"{escola}.html"
+        with open(arquivo, 'w', encoding='utf-8') as f:
+            exportar_html(grade, f)
+        arquivos.append(str(arquivo))
+
+    return arquivos
+
+# ============================================================================
+# PROCESSAMENTO
+# ============================================================================
+
+def processar(entrada: str, saida: str, motor: str, opcoes: Dict, formatos: List[str]) -> Dict:
+    """Carrega, resolve, valida e grava uma escola (roda em processo separado)"""
+    entrada = Path(entrada)
+    escola = nome_escola(entrada)
+    inicio = time.perf_counter()
+    try:
+        registro = carregar_dataset(entrada)
+        from armazem_grades import chave_entrada, opcoes_chave
+        chave = chave_entrada(*registro.listas(), opcoes_chave(motor, opcoes.get('horarios')))
+        grade = MOTORES[motor](registro, dict(opcoes, chave=chave))
+
+        from validador import validar_grade
+        relatorio = validar_grade(grade, *registro.listas(), n_horarios=opcoes.get('horarios'))
+        metadados = {
+            'escola': escola,
+            'gerado_em': datetime.now().isoformat(timespec='seconds'),
+            'motor': motor,
+            'chave': chave,
+            'opcoes': opcoes,
+            'validacao': relatorio.contagem(),
+        }
+        arquivos = gravar_saidas(grade, Path(saida), escola, formatos, metadados)
+        return {'escola': escola, 'aulas': len(grade.aulas), 'valido': relatorio.valido,
+                'problemas': len(relatorio.problemas), 'segundos': round(time.perf_counter() - inicio, 2),
+                'arquivos': arquivos, 'erro': None}
+    except Exception as e:
+        return {'escola': escola, 'aulas': 0, 'valido': False, 'problemas': 0,
+                'segundos': round(time.perf_counter() - inicio, 2), 'arquivos': [], 'erro': str(e)}
+
+def processar_lote(entradas: List[Path], saida: Path, motor: str, opcoes: Dict,
+                   formatos: List[str], processos: Optional[int] = None) -> List[Dict]:
+    """Processa várias escolas em paralelo (um processo por núcleo, por padrão)"""
+    processos = processos or os.cpu_count() or 1
+    resultados = []
+    if processos == 1 or len(entradas) == 1:
+        for e in entradas:
+            resultados.append(processar(str(e), str(saida), motor, opcoes, formatos))
+            _imprimir(resultados[-1])
+        return resultados
+
+    with ProcessPoolExecutor(max_workers=min(processos, len(entradas))) as executor:
+        futuros = [executor.submit(processar, str(e), str(saida), motor, opcoes, formatos) for e in entradas]
+        for futuro in as_completed(futuros):
+            resultado = futuro.result()
+            _imprimir(resultado)
+            resultados.append(resultado)
+    return sorted(resultados, key=lambda r: r['escola'])
+
+def _imprimir(resultado: Dict) -> None:
+    if resultado['erro']:
+        print(f"❌ {resultado['escola']}: {resultado['erro']}", flush=True)
+    else:
+        marca = "✅" if resultado['valido'] else "⚠️"
+        print(f"{marca} {resultado['escola']}: {resultado['aulas']} aulas, "
+              f"{resultado['problemas']} problema(s), {resultado['segundos']}s", flush=True)
+
+# ============================================================================
+# LINHA DE COMANDO
+# ============================================================================
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Gera grades horárias em lote")
+    parser.add_argument('entrada', type=Path, help="arquivo .json/.xlsx ou pasta com várias escolas")
+    parser.add_argument('-o', '--saida', type=Path, default=Path("grades_geradas"), help="pasta de saída")
+    parser.add_argument('-f', '--formatos', default="json,csv",
+                        help=f"formatos separados por vírgula ({', '.join(FORMATOS)})")
+    parser.add_argument('-m', '--motor', choices=sorted(MOTORES), default='simples', help="solver")
+    parser.add_argument('-t', '--tempo', type=float, default=10.0, help="tempo máximo do solver por escola (s)")
+    parser.add_argument('-p', '--processos', type=int, default=None, help="processos em paralelo (padrão: núcleos)")
+    parser.add_argument('--horarios', type=int, default=len(HORARIOS_REAIS),
+                        help=f"horários por dia (1 a {MAX_HORARIOS_DIA}; padrão: {len(HORARIOS_REAIS)})")
+    parser.add_argument('--resumo', type=Path, default=None, help="grava o resumo do lote em JSON")
+    parser.add_argument('--exportar-modelos', type=Path, default=None,
+                        help="grava o modelo CP-SAT de cada escola (replay: python -m ajuste_solver)")
+    return parser
+
+def main(argv: List[str] = None) -> int:
+    args = criar_parser().parse_args(argv)
+
+    formatos = [f.strip().lower() for f in args.formatos.split(',') if f.strip()]
+    invalidos = [f for f in formatos if f not in FORMATOS]
+    if invalidos:
+        print(f"❌ Formato(s) desconhecido(s): {', '.join(invalidos)}")
+        return 2
+    if not 1 <= args.horarios <= MAX_HORARIOS_DIA:
+        print(f"❌ Horários por dia fora do intervalo: {args.horarios} (entre 1 e {MAX_HORARIOS_DIA})")
+        return 2
+    if not args.entrada.exists():
+        print(f"❌ Entrada não encontrada: {args.entrada}")
+        return 2
+
+    entradas = listar_entradas(args.entrada)
+    if not entradas:
+        print(f"⚠️ Nenhum conjunto de dados em {args.entrada}")
+        return 1
+
+    print(f"🚀 {len(entradas)} escola(s), motor '{args.motor}', saída em {args.saida}", flush=True)
+    inicio = time.perf_counter()
+    opcoes = {'tempo': args.tempo, 'horarios': args.horarios}
+    if args.exportar_modelos:
+        opcoes['exportar'] = str(args.exportar_modelos)
+    resultados = processar_lote(entradas, args.saida, args.motor, opcoes, formatos, args.processos)
+
+    falhas = sum(1 for r in resultados if r['erro'])
+    print(f"🏁 {len(resultados) - falhas}/{len(resultados)} concluída(s) em "
+          f"{time.perf_counter() - inicio:.1f}s", flush=True)
+    if args.resumo:
+        args.resumo.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.resumo, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
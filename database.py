@@ -1,25 +1,108 @@
 """
 database.py - Gerenciamento de persistência de dados
 VERSÃO FINAL - Tratamento robusto com validação completa
+Documento único versionado (data/escola.json); formatos antigos são
+migrados na leitura por esquema.py
+Cada escola tem seu Banco (diretório, diário e trava); as funções do módulo
+usam o banco ativo no contexto (o padrão é data/, ver escolas.py)
 """
 
+import contextvars
 import json
+import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional
 
-from models import Turma, Professor, Disciplina, Sala
+from models import Turma, Professor, Disciplina, Sala, Registro
+from esquema import ESQUEMA_VERSAO, migrar, montar_registro
+from diario import Diario, ConflitoVersao, ENTIDADES, UPSERT, REMOVER, GRADE, RESTAURAR, reaplicar
+from instrumentacao import cronometrar
+
+try:
+    import orjson
+    ORJSON_DISPONIVEL = True
+except ImportError:
+    ORJSON_DISPONIVEL = False
 
 # ============================================================================
 # CONFIGURAÇÃO
 # ============================================================================
 
-DB_DIR = Path("data")
-DB_DIR.mkdir(exist_ok=True)
+DB_DIR = Path("data")  # criado na primeira gravação
+
+# ============================================================================
+# CLASSE: Banco
+# ============================================================================
+
+class Banco:
+    """Armazenamento de uma escola: documento, diário e trava num diretório próprio"""
+
+    def __init__(self, diretorio: Path, legado: List[Path] = None):
+        self.diretorio = Path(diretorio)
+        self.escola_file = self.diretorio / "escola.json"
+        # Formato antigo (versão 0): um arquivo por entidade
+        self.arquivos_v0 = {e: self.diretorio / f"{e}.json" for e in ENTIDADES}
+        # Formato antigo (versão 1): documento único sem versão, em ordem de preferência
+        self.legado = [self.diretorio / "escola_data.json"] + list(legado or [])
+        # Serializa escritas do snapshot (gravação adiada x compactação do diário)
+        self.lock = threading.RLock()
+        # Entidades que a última gravação em lote deixou de gravar (alteradas por outra sessão)
+        self.ultimos_conflitos: List[Dict] = []
+        # Documento da gravação em lote, mantido em dia com os eventos novos do diário
+        self.documento: Optional[Dict] = None
+        self.diario = Diario(self.diretorio, seq_snapshot=lambda: _seq_snapshot(self),
+                             ler_snapshot=lambda: _ler_snapshot(self))
+
+    def __repr__(self):
+        return f"Banco({self.diretorio})"
+
+# Banco da instalação de uma escola só (inclui o formato antigo na raiz)
+PADRAO = Banco(DB_DIR, legado=[Path("escola_db.json")])
+
+_banco = contextvars.ContextVar('banco', default=PADRAO)
+
+def banco_atual() -> Banco:
+    """Banco usado pelas funções do módulo no contexto atual"""
+    return _banco.get()
 
-TURMAS_FILE = DB_DIR / "turmas.json"
-PROFESSORES_FILE = DB_DIR / "professores.json"
-DISCIPLINAS_FILE = DB_DIR / "disciplinas.json"
-SALAS_FILE = DB_DIR / "salas.json"
+def ativar(banco: Banco) -> contextvars.Token:
+    """Troca o banco do contexto atual (cada sessão do Streamlit roda na sua thread)"""
+    return _banco.set(banco)
+
+@contextmanager
+def usar_banco(banco: Banco):
+    """Usa `banco` dentro do bloco (threads de trabalho, CLI)"""
+    token = _banco.set(banco)
+    try:
+        yield banco
+    finally:
+        _banco.reset(token)
+
+# ============================================================================
+# JSON
+# ============================================================================
+
+def _ler_json(arquivo: Path):
+    """Lê e decodifica um arquivo JSON em uma única passada (orjson se instalado)"""
+    with open(arquivo, 'rb') as f:
+        conteudo = f.read()
+    if ORJSON_DISPONIVEL:
+        return orjson.loads(conteudo)
+    return json.loads(conteudo)
+
+def _gravar_json(arquivo: Path, dados) -> None:
+    """Grava em arquivo temporário e substitui o original de uma vez"""
+    arquivo.parent.mkdir(parents=True, exist_ok=True)
+    temporario = arquivo.with_suffix(arquivo.suffix + '.tmp')
+    if ORJSON_DISPONIVEL:
+        with open(temporario, 'wb') as f:
+            f.write(orjson.dumps(dados, option=orjson.OPT_INDENT_2))
+    else:
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, arquivo)
 
 # ============================================================================
 # CONVERSÃO: OBJETO → DICT
@@ -44,7 +127,8 @@ def professor_para_dict(professor: Professor) -> Dict[str, Any]:
     return {
         'id': professor.id,
         'nome': professor.nome,
-        'disciplinas': professor.disciplinas if isinstance(professor.disciplinas, list) else []
+        'disciplinas': professor.disciplinas if isinstance(professor.disciplinas, list) else [],
+        'carga_maxima': getattr(professor, 'carga_maxima', 0)
     }
 
 def disciplina_para_dict(disciplina: Disciplina) -> Dict[str, Any]:
@@ -55,7 +139,9 @@ def disciplina_para_dict(disciplina: Disciplina) -> Dict[str, Any]:
         'id': disciplina.id,
         'nome': disciplina.nome,
         'carga_semanal': disciplina.carga_semanal,
-        'turmas': disciplina.turmas if isinstance(disciplina.turmas, list) else []
+        'turmas': disciplina.turmas if isinstance(disciplina.turmas, list) else [],
+        'frequencia': getattr(disciplina, 'frequencia', 1),
+        'duracao': getattr(disciplina, 'duracao', 1)
     }
 
 def sala_para_dict(sala: Sala) -> Dict[str, Any]:
@@ -70,6 +156,17 @@ def sala_para_dict(sala: Sala) -> Dict[str, Any]:
         'andar': sala.andar
     }
 
+PARA_DICT = {
+    'turmas': turma_para_dict,
+    'professores': professor_para_dict,
+    'disciplinas': disciplina_para_dict,
+    'salas': sala_para_dict,
+}
+
+def para_dict(entidade: str, obj) -> Dict[str, Any]:
+    """Converte qualquer entidade ('turmas', 'professores', ...) para Dict"""
+    return PARA_DICT[entidade](obj)
+
 # ============================================================================
 # RECONVERSÃO: DICT → OBJETO
 # ============================================================================
@@ -83,7 +180,8 @@ def dict_para_turma(data: Dict) -> Turma:
             nome=str(data.get('nome', 'Turma Sem Nome')),
             semestre=int(data.get('semestre', 1)),
             curso=str(data.get('curso', 'Curso Padrão')),
-            quantidade_alunos=int(data.get('quantidade_alunos', 0))
+            quantidade_alunos=int(data.get('quantidade_alunos', 0)),
+            id=data.get('id')
         )
     except Exception as e:
         print(f"❌ Erro reconverter Turma: {e}")
@@ -99,7 +197,9 @@ def dict_para_professor(data: Dict) -> Professor:
             disciplinas = []
         return Professor(
             nome=str(data.get('nome', 'Professor Sem Nome')),
-            disciplinas=disciplinas
+            disciplinas=disciplinas,
+            id=data.get('id'),
+            carga_maxima=int(data.get('carga_maxima', 0))
         )
     except Exception as e:
         print(f"❌ Erro reconverter Professor: {e}")
@@ -116,7 +216,10 @@ def dict_para_disciplina(data: Dict) -> Disciplina:
         return Disciplina(
             nome=str(data.get('nome', 'Disciplina Sem Nome')),
             carga_semanal=int(data.get('carga_semanal', 0)),
-            turmas=turmas
+            turmas=turmas,
+            id=data.get('id'),
+            frequencia=int(data.get('frequencia', 1)),
+            duracao=int(data.get('duracao', 1))
         )
     except Exception as e:
         print(f"❌ Erro reconverter Disciplina: {e}")
@@ -131,165 +234,382 @@ def dict_para_sala(data: Dict) -> Sala:
             nome=str(data.get('nome', 'Sala Sem Nome')),
             capacidade=int(data.get('capacidade', 0)),
             predio=str(data.get('predio', 'Prédio Padrão')),
-            andar=int(data.get('andar', 0))
+            andar=int(data.get('andar', 0)),
+            id=data.get('id')
         )
     except Exception as e:
         print(f"❌ Erro reconverter Sala: {e}")
         return None
 
+DICT_PARA = {
+    'turmas': dict_para_turma,
+    'professores': dict_para_professor,
+    'disciplinas': dict_para_disciplina,
+    'salas': dict_para_sala,
+}
+
 # ============================================================================
 # SALVAMENTO
 # ============================================================================
 
-def salvar_turmas(turmas: List[Turma]) -> bool:
-    """Salva turmas em JSON"""
+def serializar_tudo(turmas: List, professores: List, disciplinas: List, salas: List,
+                    geracao: int = None) -> Dict[str, List[Dict]]:
+    """
+    Converte todas as listas para dicts (sem tocar no disco)
+    geracao: geração do banco que a sessão viu (None = sobrescrever sem checar)
+    """
+    return {
+        'turmas': [turma_para_dict(t) for t in turmas if isinstance(t, Turma)],
+        'professores': [professor_para_dict(p) for p in professores if isinstance(p, Professor)],
+        'disciplinas': [disciplina_para_dict(d) for d in disciplinas if isinstance(d, Disciplina)],
+        'salas': [sala_para_dict(s) for s in salas if isinstance(s, Sala)],
+        'seq': banco_atual().diario.seq,
+        'geracao': geracao,
+    }
+
+@cronometrar('db.gravar')
+def gravar_serializado(dados: Dict[str, List[Dict]], banco: Banco = None) -> bool:
+    """
+    Grava dados já serializados por serializar_tudo no documento único
+    Cada entidade diferente do banco vira um evento do diário (com a versão
+    lida como compare-and-swap); o snapshot só é regravado na compactação.
+    Com dados['geracao'], entidades alteradas por outra sessão depois dessa
+    geração não são sobrescritas: ficam em banco.ultimos_conflitos e o
+    restante é gravado
+    banco: explícito quando chamado fora da sessão (gravação adiada)
+    """
+    banco = banco or banco_atual()
+    diario = banco.diario
     try:
-        dados = []
-        for t in turmas:
-            if isinstance(t, Turma):
-                d = turma_para_dict(t)
-                if d:
-                    dados.append(d)
-        
-        with open(TURMAS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(dados, f, ensure_ascii=False, indent=2)
+        geracao = dados.get('geracao')
+        conflitos = []
+        criadas = None
+        with banco.lock:
+            doc = _documento_corrente(banco)
+            versoes = doc.get('versoes', {})
+            for entidade in ENTIDADES:
+                armazenados = {item.get('id'): item for item in doc.get(entidade, [])}
+                da_sessao = {item.get('id'): item for item in dados.get(entidade, [])}
+                for id_ in list(armazenados) + [i for i in da_sessao if i not in armazenados]:
+                    minha, atual = da_sessao.get(id_), armazenados.get(id_)
+                    if minha == atual:
+                        continue
+                    versao = versoes.get(entidade, {}).get(id_, 0)
+                    if minha is None and geracao is not None and versao > geracao:
+                        # Ausente na sessão porque outra sessão a incluiu depois: não é remoção
+                        if criadas is None:
+                            criadas = _criadas_desde(diario, geracao)
+                        if (entidade, id_) in criadas:
+                            continue
+                    try:
+                        if geracao is not None and versao > geracao:
+                            raise ConflitoVersao(entidade, id_, geracao, versao)
+                        if minha is None:
+                            diario.registrar(REMOVER, entidade, None, atual, id=id_, versao=versao)
+                        else:
+                            diario.registrar(UPSERT, entidade, minha, atual, versao=versao)
+                    except ConflitoVersao as conflito:
+                        conflitos.append({'entidade': entidade, 'id': id_, 'nome': (minha or atual).get('nome'),
+                                          'versao': conflito.atual})
+        banco.ultimos_conflitos = conflitos
+        if conflitos:
+            print(f"⚠️ {len(conflitos)} entidade(s) alterada(s) por outra sessão não foram sobrescritas")
+        if diario.precisa_compactar():
+            diario.compactar_em_segundo_plano(lambda: compactar(banco))
         return True
+    except Exception as e:
+        print(f"❌ Erro gravar dados: {e}")
+        return False
+
+def _criadas_desde(diario: Diario, geracao: int) -> set:
+    """(entidade, id) incluídas depois da geração (vazio se esses eventos já foram compactados)"""
+    return {(ev['entidade'], ev['id']) for ev in diario.eventos_desde(geracao) or []
+            if ev['op'] == UPSERT and ev.get('antes') is None}
+
+def _salvar_secao(secao: str, dados: List[Dict]) -> bool:
+    """Substitui uma única seção do documento, mantendo as demais"""
+    doc = carregar_documento()
+    doc[secao] = dados
+    return gravar_serializado(doc)
+
+def salvar_turmas(turmas: List[Turma]) -> bool:
+    """Salva turmas"""
+    try:
+        return _salvar_secao('turmas', [turma_para_dict(t) for t in turmas if isinstance(t, Turma)])
     except Exception as e:
         print(f"❌ Erro salvar turmas: {e}")
         return False
 
 def salvar_professores(professores: List[Professor]) -> bool:
-    """Salva professores em JSON"""
+    """Salva professores"""
     try:
-        dados = []
-        for p in professores:
-            if isinstance(p, Professor):
-                d = professor_para_dict(p)
-                if d:
-                    dados.append(d)
-        
-        with open(PROFESSORES_FILE, 'w', encoding='utf-8') as f:
-            json.dump(dados, f, ensure_ascii=False, indent=2)
-        return True
+        return _salvar_secao('professores', [professor_para_dict(p) for p in professores if isinstance(p, Professor)])
     except Exception as e:
         print(f"❌ Erro salvar professores: {e}")
         return False
 
 def salvar_disciplinas(disciplinas: List[Disciplina]) -> bool:
-    """Salva disciplinas em JSON"""
+    """Salva disciplinas"""
     try:
-        dados = []
-        for d in disciplinas:
-            if isinstance(d, Disciplina):
-                dat = disciplina_para_dict(d)
-                if dat:
-                    dados.append(dat)
-        
-        with open(DISCIPLINAS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(dados, f, ensure_ascii=False, indent=2)
-        return True
+        return _salvar_secao('disciplinas', [disciplina_para_dict(d) for d in disciplinas if isinstance(d, Disciplina)])
     except Exception as e:
         print(f"❌ Erro salvar disciplinas: {e}")
         return False
 
 def salvar_salas(salas: List[Sala]) -> bool:
-    """Salva salas em JSON"""
+    """Salva salas"""
     try:
-        dados = []
-        for s in salas:
-            if isinstance(s, Sala):
-                d = sala_para_dict(s)
-                if d:
-                    dados.append(d)
-        
-        with open(SALAS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(dados, f, ensure_ascii=False, indent=2)
-        return True
+        return _salvar_secao('salas', [sala_para_dict(s) for s in salas if isinstance(s, Sala)])
     except Exception as e:
         print(f"❌ Erro salvar salas: {e}")
         return False
 
-def salvar_tudo(turmas: List, professores: List, disciplinas: List, salas: List) -> bool:
-    """Salva todos os dados"""
-    return (
-        salvar_turmas(turmas) and
-        salvar_professores(professores) and
-        salvar_disciplinas(disciplinas) and
-        salvar_salas(salas)
-    )
+def salvar_tudo(turmas: List, professores: List, disciplinas: List, salas: List,
+                geracao: int = None) -> bool:
+    """Salva todos os dados em uma única escrita (com geracao, sem sobrescrever outras sessões)"""
+    return gravar_serializado(serializar_tudo(turmas, professores, disciplinas, salas, geracao))
 
 # ============================================================================
 # CARREGAMENTO
 # ============================================================================
 
-def carregar_turmas() -> List[Dict]:
-    """Carrega turmas de JSON"""
+def _documento_vazio() -> Dict:
+    return {'versao': ESQUEMA_VERSAO, 'turmas': [], 'professores': [], 'disciplinas': [], 'salas': []}
+
+def _ler_legado_v0(banco: Banco) -> Dict:
+    """Junta os arquivos separados do formato antigo em um documento versão 0"""
+    doc = {'versao': 0}
+    for secao, arquivo in banco.arquivos_v0.items():
+        try:
+            dados = _ler_json(arquivo) if arquivo.exists() else []
+        except Exception as e:
+            print(f"❌ Erro carregar {secao}: {e}")
+            dados = []
+        doc[secao] = dados if isinstance(dados, list) else []
+    return doc
+
+def _ler_snapshot(banco: Banco = None) -> Dict:
+    """
+    Lê o snapshot na versão atual do esquema (sem reaplicar o diário)
+    Ordem: escola.json → *.json (v0) → escola_data.json, escola_db.json (v1)
+    """
+    banco = banco or banco_atual()
     try:
-        if not TURMAS_FILE.exists():
-            return []
-        with open(TURMAS_FILE, 'r', encoding='utf-8') as f:
-            dados = json.load(f)
-            return dados if isinstance(dados, list) else []
+        if banco.escola_file.exists():
+            return migrar(_ler_json(banco.escola_file))
+        if any(a.exists() for a in banco.arquivos_v0.values()):
+            return migrar(_ler_legado_v0(banco))
+        for arquivo in banco.legado:
+            if arquivo.exists():
+                return migrar(_ler_json(arquivo))
     except Exception as e:
-        print(f"❌ Erro carregar turmas: {e}")
-        return []
+        print(f"❌ Erro carregar banco: {e}")
+    return _documento_vazio()
 
-def carregar_professores() -> List[Dict]:
-    """Carrega professores de JSON"""
+def _seq_snapshot(banco: Banco = None) -> int:
+    return int(_ler_snapshot(banco).get('seq', 0))
+
+def carregar_documento(banco: Banco = None) -> Dict:
+    """Lê o snapshot e reaplica os eventos do diário posteriores a ele"""
+    banco = banco or banco_atual()
     try:
-        if not PROFESSORES_FILE.exists():
-            return []
-        with open(PROFESSORES_FILE, 'r', encoding='utf-8') as f:
-            dados = json.load(f)
-            return dados if isinstance(dados, list) else []
+        return banco.diario.atualizar(_ler_snapshot(banco))
     except Exception as e:
-        print(f"❌ Erro carregar professores: {e}")
-        return []
+        print(f"❌ Erro reaplicar diário: {e}")
+        return _ler_snapshot(banco)
+
+def _documento_corrente(banco: Banco) -> Dict:
+    """
+    Documento em memória do banco para comparar com a sessão
+    Lido do disco uma vez; depois só os eventos novos do diário são reaplicados
+    """
+    seq = banco.diario.seq
+    doc = banco.documento
+    if doc is None or int(doc.get('seq', 0)) > seq:
+        doc = carregar_documento(banco)
+    elif int(doc.get('seq', 0)) < seq:
+        doc = reaplicar(doc, banco.diario.eventos(desde=int(doc.get('seq', 0))))
+    banco.documento = doc
+    return doc
+
+@cronometrar('db.carregar_registro')
+def carregar_registro() -> Registro:
+    """Carrega o banco direto para objetos indexados"""
+    return montar_registro(carregar_documento())
+
+def carregar_turmas() -> List[Dict]:
+    """Carrega turmas"""
+    return carregar_documento()['turmas']
+
+def carregar_professores() -> List[Dict]:
+    """Carrega professores"""
+    return carregar_documento()['professores']
 
 def carregar_disciplinas() -> List[Dict]:
-    """Carrega disciplinas de JSON"""
-    try:
-        if not DISCIPLINAS_FILE.exists():
-            return []
-        with open(DISCIPLINAS_FILE, 'r', encoding='utf-8') as f:
-            dados = json.load(f)
-            return dados if isinstance(dados, list) else []
-    except Exception as e:
-        print(f"❌ Erro carregar disciplinas: {e}")
-        return []
+    """Carrega disciplinas"""
+    return carregar_documento()['disciplinas']
 
 def carregar_salas() -> List[Dict]:
-    """Carrega salas de JSON"""
-    try:
-        if not SALAS_FILE.exists():
-            return []
-        with open(SALAS_FILE, 'r', encoding='utf-8') as f:
-            dados = json.load(f)
-            return dados if isinstance(dados, list) else []
-    except Exception as e:
-        print(f"❌ Erro carregar salas: {e}")
-        return []
+    """Carrega salas"""
+    return carregar_documento()['salas']
 
 def carregar_tudo() -> Tuple[List[Dict], List[Dict], List[Dict], List[Dict]]:
     """Carrega todos os dados"""
-    return (
-        carregar_turmas(),
-        carregar_professores(),
-        carregar_disciplinas(),
-        carregar_salas()
-    )
+    doc = carregar_documento()
+    return doc['turmas'], doc['professores'], doc['disciplinas'], doc['salas']
 
 # ============================================================================
 # LIMPEZA
 # ============================================================================
 
 def limpar_banco() -> bool:
-    """Limpa todos os arquivos do banco"""
+    """Limpa o banco (grava documento vazio para não reimportar formatos antigos)"""
+    banco = banco_atual()
     try:
-        for arquivo in [TURMAS_FILE, PROFESSORES_FILE, DISCIPLINAS_FILE, SALAS_FILE]:
+        for arquivo in banco.arquivos_v0.values():
             if arquivo.exists():
                 arquivo.unlink()
+        banco.diario.limpar()
+        _gravar_json(banco.escola_file, _documento_vazio())
+        banco.documento = None
         return True
     except Exception as e:
         print(f"❌ Erro limpar banco: {e}")
         return False
+
+# ============================================================================
+# DIÁRIO DE ALTERAÇÕES
+# ============================================================================
+
+def registrar_alteracao(entidade: str, op: str, obj=None, antes: Dict = None, versao: int = None) -> int:
+    """
+    Registra uma alteração de entidade no diário (append de uma linha)
+    op: UPSERT (inclusão/edição) ou REMOVER; antes: dict da entidade antes da edição
+    versao: versão que a sessão editou (compare-and-swap). Se outra sessão
+    alterou a entidade, campos diferentes são mesclados; o mesmo campo
+    alterado dos dois lados (ou entidade removida) levanta ConflitoVersao.
+    Remoção: já removida por outra sessão não grava nada; alterada por outra
+    sessão levanta ConflitoVersao com os campos alterados
+    """
+    banco = banco_atual()
+    diario = banco.diario
+    dados = para_dict(entidade, obj) if (obj is not None and op == UPSERT) else None
+    if op == REMOVER and antes is None and obj is not None:
+        antes = para_dict(entidade, obj)
+    try:
+        seq = diario.registrar(op, entidade, dados, antes, versao=versao)
+    except ConflitoVersao as conflito:
+        atual = next((item for item in carregar_documento(banco)[entidade] if item.get('id') == conflito.id), None)
+        if op == REMOVER and antes is not None:
+            if atual is None:
+                return diario.seq
+            campos = sorted(c for c in set(antes) | set(atual) if antes.get(c) != atual.get(c))
+            if campos:
+                raise ConflitoVersao(entidade, conflito.id, versao, conflito.atual, campos)
+            seq = diario.registrar(REMOVER, entidade, None, atual, id=conflito.id, versao=conflito.atual)
+        elif op != UPSERT or atual is None or antes is None:
+            raise
+        else:
+            mesclado, campos = mesclar(antes, dados, atual)
+            if campos:
+                raise ConflitoVersao(entidade, conflito.id, versao, conflito.atual, campos)
+            seq = diario.registrar(UPSERT, entidade, mesclado, atual, versao=conflito.atual)
+    if diario.precisa_compactar():
+        diario.compactar_em_segundo_plano(lambda: compactar(banco))
+    return seq
+
+def mesclar(base: Dict, minha: Dict, atual: Dict) -> Tuple[Dict, List[str]]:
+    """
+    Mescla em três vias, campo a campo: vale o lado que mudou em relação à base
+    Retorna: (mesclado, campos alterados dos dois lados com valores diferentes)
+    """
+    mesclado, conflitos = dict(atual), []
+    for campo in set(base) | set(minha) | set(atual):
+        b, m, a = base.get(campo), minha.get(campo), atual.get(campo)
+        if m == b or m == a:
+            continue
+        if a == b:
+            mesclado[campo] = m
+        else:
+            conflitos.append(campo)
+    return mesclado, sorted(conflitos)
+
+def registrar_grade(grade, **metadados) -> int:
+    """Registra no diário a geração de uma grade horária"""
+    dados = {'id': grade.id, 'aulas': len(grade.aulas)}
+    dados.update(metadados)
+    return banco_atual().diario.registrar(GRADE, 'grades', dados)
+
+def compactar(banco: Banco = None) -> int:
+    """Incorpora o diário ao snapshot (arquivando o anterior)"""
+    banco = banco or banco_atual()
+    with banco.lock:
+        return banco.diario.compactar(lambda: _ler_snapshot(banco),
+                                      lambda doc: _gravar_json(banco.escola_file, doc))
+
+def desfazer() -> bool:
+    """Desfaz a última alteração de entidade ainda não desfeita"""
+    return banco_atual().diario.desfazer() is not None
+
+def restaurar(seq: int) -> bool:
+    """Volta o banco ao estado logo após o evento `seq` (registrado como novo evento)"""
+    banco = banco_atual()
+    try:
+        with banco.lock:
+            doc = banco.diario.documento_em(seq, _ler_snapshot(banco))
+        banco.diario.registrar_restauracao(doc, seq)
+        return True
+    except Exception as e:
+        print(f"❌ Erro restaurar: {e}")
+        return False
+
+def historico(limite: int = 50) -> List[Dict]:
+    """Últimos eventos do diário (mais recentes primeiro)"""
+    return banco_atual().diario.historico(limite)
+
+# ============================================================================
+# SINCRONIZAÇÃO DE SESSÕES
+# ============================================================================
+
+def geracao() -> int:
+    """Geração atual do banco (seq do último evento); comparar é O(1)"""
+    return banco_atual().diario.seq
+
+def eventos_desde(geracao_vista: int) -> Optional[List[Dict]]:
+    """Eventos que a sessão ainda não viu (None = compactados, recarregar tudo)"""
+    return banco_atual().diario.eventos_desde(geracao_vista)
+
+def aplicar_eventos(registro: Registro, eventos: List[Dict]) -> bool:
+    """
+    Aplica eventos de entidades direto nos objetos do registro (sem reler o banco)
+    Atualiza registro.versoes e registro.geracao
+    Retorna: False se houver restauração (a sessão deve recarregar tudo)
+    """
+    indices = {e: {obj.id: i for i, obj in enumerate(getattr(registro, e))} for e in ENTIDADES}
+    removidos = False
+    for ev in eventos:
+        if ev['op'] == RESTAURAR:
+            return False
+        entidade = ev.get('entidade')
+        if entidade in indices and ev['op'] in (UPSERT, REMOVER):
+            itens, indice = getattr(registro, entidade), indices[entidade]
+            pos = indice.get(ev['id'])
+            if ev['op'] == UPSERT:
+                obj = DICT_PARA[entidade](ev['dados'])
+                if pos is None:
+                    indice[ev['id']] = len(itens)
+                    itens.append(obj)
+                else:
+                    itens[pos] = obj
+            elif pos is not None:
+                itens[pos] = None
+                del indice[ev['id']]
+                removidos = True
+            registro.versoes.setdefault(entidade, {})[ev['id']] = ev['seq']
+        registro.geracao = ev['seq']
+    if removidos:
+        for entidade in ENTIDADES:
+            itens = getattr(registro, entidade)
+            itens[:] = [obj for obj in itens if obj is not None]
+    registro.reindexar()
+    return True
@@ -0,0 +1,400 @@
+"""
+diario.py - Diário de alterações (append-only) com compactação em snapshots
+Cada edição vira uma linha JSON em data/diario.jsonl; o documento
+data/escola.json guarda o snapshot e o número (seq) do último evento
+já incorporado. Na leitura, só os eventos posteriores são reaplicados.
+O seq também é a geração do banco e a versão de cada entidade é o seq
+do último evento que a alterou (controle de concorrência otimista).
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+# ============================================================================
+# CONFIGURAÇÃO
+# ============================================================================
+
+LIMITE_COMPACTACAO = 500      # eventos no diário antes de compactar
+MANTER_SNAPSHOTS = 20         # snapshots arquivados mantidos para restauração
+
+ENTIDADES = ('turmas', 'professores', 'disciplinas', 'salas')
+
+# Operações
+UPSERT = 'upsert'
+REMOVER = 'remover'
+GRADE = 'grade'
+RESTAURAR = 'restaurar'
+
+# ============================================================================
+# CONFLITOS
+# ============================================================================
+
+class ConflitoVersao(Exception):
+    """A entidade mudou (outra sessão) desde a versão em que a edição se baseou"""
+
+    def __init__(self, entidade: str, id: str, esperada: int, atual: int, campos: List[str] = None):
+        self.entidade = entidade
+        self.id = id
+        self.esperada = esperada
+        self.atual = atual
+        self.campos = campos or []
+        detalhe = f" ({', '.join(self.campos)})" if self.campos else ""
+        super().__init__(f"{entidade} {id}: versão {esperada}, atual {atual}{detalhe}")
+
+# ============================================================================
+# REAPLICAÇÃO
+# ============================================================================
+
+def reaplicar(doc: Dict, eventos: List[Dict]) -> Dict:
+    """
+    Aplica eventos de entidades sobre um documento (versão atual do esquema)
+    Monta um índice id → posição por entidade uma vez, então cada evento é O(1)
+    doc['versoes'][entidade][id] recebe o seq do evento (removidas mantêm a versão)
+    """
+    if not eventos:
+        return doc
+
+    indices = {}
+    versoes = doc.setdefault('versoes', {})
+    for entidade in ENTIDADES:
+        itens = doc.setdefault(entidade, [])
+        indices[entidade] = {item.get('id'): i for i, item in enumerate(itens)}
+        versoes.setdefault(entidade, {})
+
+    removidos = False
+    for ev in eventos:
+        entidade = ev.get('entidade')
+        if ev['op'] == RESTAURAR:
+            for e in ENTIDADES:
+                for id_ in list(indices[e]) + [item.get('id') for item in ev['dados'].get(e, [])]:
+                    versoes[e][id_] = ev['seq']
+                doc[e] = list(ev['dados'].get(e, []))
+                indices[e] = {item.get('id'): i for i, item in enumerate(doc[e])}
+        elif entidade in indices:
+            itens, indice = doc[entidade], indices[entidade]
+            pos = indice.get(ev['id'])
+            if ev['op'] in (UPSERT, REMOVER):
+                versoes[entidade][ev['id']] = ev['seq']
+            if ev['op'] == UPSERT:
+                if pos is None or itens[pos] is None:
+                    indice[ev['id']] = len(itens)
+                    itens.append(ev['dados'])
+                else:
+                    itens[pos] = ev['dados']
+            elif ev['op'] == REMOVER and pos is not None:
+                itens[pos] = None
+                del indice[ev['id']]
+                removidos = True
+        doc['seq'] = ev['seq']
+
+    if removidos:
+        for entidade in ENTIDADES:
+            doc[entidade] = [item for item in doc[entidade] if item is not None]
+    return doc
+
+# ============================================================================
+# CLASSE: Diario
+# ============================================================================
+
+class Diario:
+    """Diário de alterações de um diretório de dados"""
+
+    def __init__(self, diretorio: Path, seq_snapshot: Callable[[], int] = None,
+                 ler_snapshot: Callable[[], Dict] = None):
+        """ler_snapshot: lê o snapshot atual (necessário para checar versões)"""
+        self.diretorio = Path(diretorio)
+        self._seq_snapshot = seq_snapshot or (lambda: 0)
+        self._ler_snapshot = ler_snapshot
+        self.arquivo = self.diretorio / "diario.jsonl"
+        self.dir_snapshots = self.diretorio / "snapshots"
+        self._lock = threading.RLock()
+        self._seq = None
+        self._base = 0          # seq do snapshot: eventos até ele já não estão no diário
+        self._pendentes = None
+        self._versoes: Optional[Dict[str, Dict[str, int]]] = None
+        self._compactando = False
+
+    # ========================================================================
+    # ESCRITA
+    # ========================================================================
+
+    def _inicializar(self, seq_snapshot: int = None) -> None:
+        """Descobre o último seq e quantos eventos há no diário (uma vez)"""
+        if self._seq is not None:
+            return
+        if seq_snapshot is None:
+            seq_snapshot = self._seq_snapshot()
+        ultimo, n = seq_snapshot, 0
+        for ev in self._ler(self.arquivo):
+            ultimo = max(ultimo, ev['seq'])
+            n += 1
+        self._seq, self._pendentes, self._base = ultimo, n, seq_snapshot
+
+    @property
+    def seq(self) -> int:
+        with self._lock:
+            self._inicializar()
+            return self._seq
+
+    @property
+    def pendentes(self) -> int:
+        """Eventos ainda não incorporados ao snapshot"""
+        with self._lock:
+            self._inicializar()
+            return self._pendentes
+
+    def registrar(self, op: str, entidade: str, dados: Dict = None, antes: Dict = None,
+                  id: str = None, desfaz: int = None, versao: int = None) -> int:
+        """
+        Acrescenta um evento ao diário (uma linha, sem reescrever nada)
+        versao: compare-and-swap; se a entidade já não está nessa versão,
+        levanta ConflitoVersao sem gravar (0 = entidade nova)
+        """
+        with self._lock:
+            self._inicializar()
+            id = id or (dados or antes or {}).get('id')
+            if versao is not None:
+                atual = self.versao(entidade, id)
+                if atual != versao:
+                    raise ConflitoVersao(entidade, id, versao, atual)
+            self._seq += 1
+            evento = {
+                'seq': self._seq,
+                'ts': datetime.now().isoformat(timespec='seconds'),
+                'op': op,
+                'entidade': entidade,
+                'id': id,
+                'dados': dados,
+                'antes': antes,
+            }
+            if desfaz is not None:
+                evento['desfaz'] = desfaz
+            self.diretorio.mkdir(parents=True, exist_ok=True)
+            with open(self.arquivo, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(evento, ensure_ascii=False) + '\n')
+            self._pendentes += 1
+            if op == RESTAURAR:
+                self._versoes = None  # entidades que sumiram: relidas do documento
+            elif self._versoes is not None:
+                reaplicar({'versoes': self._versoes}, [evento])
+            return self._seq
+
+    def precisa_compactar(self) -> bool:
+        return self.pendentes >= LIMITE_COMPACTACAO
+
+    # ========================================================================
+    # VERSÕES
+    # ========================================================================
+
+    def versoes(self) -> Dict[str, Dict[str, int]]:
+        """entidade → id → versão (carregadas do snapshot + diário na primeira chamada)"""
+        with self._lock:
+            if self._versoes is None:
+                doc = self._ler_snapshot() if self._ler_snapshot else {}
+                self.atualizar(doc)
+            return self._versoes
+
+    def versao(self, entidade: str, id: str) -> int:
+        """Versão atual da entidade (0 = nunca registrada)"""
+        return self.versoes().get(entidade, {}).get(id, 0)
+
+    def eventos_desde(self, geracao: int) -> Optional[List[Dict]]:
+        """
+        Eventos posteriores à geração (o que uma sessão ainda não viu)
+        None se parte deles já foi compactada: a sessão precisa recarregar tudo
+        """
+        with self._lock:
+            self._inicializar()
+            if geracao >= self._seq:
+                return []
+            if geracao < self._base:
+                return None
+            return self.eventos(desde=geracao)
+
+    # ========================================================================
+    # LEITURA
+    # ========================================================================
+
+    @staticmethod
+    def _ler(arquivo: Path) -> Iterator[Dict]:
+        if not arquivo.exists():
+            return
+        with open(arquivo, 'r', encoding='utf-8') as f:
+            for linha in f:
+                linha = linha.strip()
+                if not linha:
+                    continue
+                try:
+                    yield json.loads(linha)
+                except json.JSONDecodeError:
+                    # Última linha truncada por queda durante a escrita
+                    break
+
+    def eventos(self, desde: int = 0, ate: int = None) -> List[Dict]:
+        """Eventos do diário atual com desde < seq <= ate"""
+        return [ev for ev in self._ler(self.arquivo)
+                if ev['seq'] > desde and (ate is None or ev['seq'] <= ate)]
+
+    def atualizar(self, doc: Dict) -> Dict:
+        """Reaplica sobre o snapshot os eventos posteriores a ele (e guarda as versões)"""
+        with self._lock:
+            seq_doc = int(doc.get('seq', 0))
+            self._inicializar(seq_doc)
+            doc = reaplicar(doc, self.eventos(desde=seq_doc))
+            self._versoes = {e: dict(v) for e, v in doc.get('versoes', {}).items()}
+            return doc
+
+    def historico(self, limite: int = 50) -> List[Dict]:
+        """Últimos eventos (mais recentes primeiro)"""
+        return self.eventos()[-limite:][::-1]
+
+    # ========================================================================
+    # DESFAZER / RESTAURAR
+    # ========================================================================
+
+    def evento_para_desfazer(self) -> Optional[Dict]:
+        """Último evento de entidade ainda não desfeito"""
+        desfeitos = set()
+        for ev in reversed(self.eventos()):
+            if ev['op'] == RESTAURAR:
+                return None
+            if ev.get('desfaz'):
+                desfeitos.add(ev['desfaz'])
+                continue
+            if ev['op'] in (UPSERT, REMOVER) and ev['seq'] not in desfeitos:
+                return ev
+        return None
+
+    def desfazer(self) -> Optional[int]:
+        """Registra o evento inverso do último evento de entidade"""
+        with self._lock:
+            ev = self.evento_para_desfazer()
+            if ev is None:
+                return None
+            if ev['antes'] is None:
+                return self.registrar(REMOVER, ev['entidade'], None, ev['dados'], id=ev['id'], desfaz=ev['seq'])
+            return self.registrar(UPSERT, ev['entidade'], ev['antes'], ev['dados'], id=ev['id'], desfaz=ev['seq'])
+
+    def _snapshots(self) -> List[int]:
+        if not self.dir_snapshots.exists():
+            return []
+        return sorted(int(p.stem.split('-')[1]) for p in self.dir_snapshots.glob("escola-*.json"))
+
+    def _segmentos(self) -> List[Path]:
+        if not self.dir_snapshots.exists():
+            return []
+        return sorted(self.dir_snapshots.glob("diario-*.jsonl"), key=lambda p: int(p.stem.split('-')[1]))
+
+    def documento_em(self, seq: int, doc_atual: Dict) -> Dict:
+        """
+        Reconstrói o documento como era logo após o evento `seq`
+        Usa o snapshot arquivado mais recente anterior a seq + eventos
+        """
+        seq_atual = int(doc_atual.get('seq', 0))
+        if seq >= seq_atual:
+            return reaplicar(json.loads(json.dumps(doc_atual)), self.eventos(seq_atual, seq))
+
+        bases = [s for s in self._snapshots() if s <= seq]
+        if not bases:
+            raise ValueError(f"Nenhum snapshot anterior ao evento {seq}")
+        base = bases[-1]
+        with open(self.dir_snapshots / f"escola-{base}.json", 'r', encoding='utf-8') as f:
+            doc = json.load(f)
+
+        eventos = []
+        for segmento in self._segmentos():
+            eventos.extend(ev for ev in self._ler(segmento) if base < ev['seq'] <= seq)
+        eventos.extend(self.eventos(base, seq))
+        eventos.sort(key=lambda ev: ev['seq'])
+        return reaplicar(doc, eventos)
+
+    def registrar_restauracao(self, doc: Dict, seq_alvo: int) -> int:
+        """Registra uma restauração (estado completo) como um único evento"""
+        dados = {e: doc.get(e, []) for e in ENTIDADES}
+        return self.registrar(RESTAURAR, None, dados, id=str(seq_alvo))
+
+    # ========================================================================
+    # COMPACTAÇÃO
+    # ========================================================================
+
+    def compactar(self, ler_snapshot: Callable[[], Dict], gravar_snapshot: Callable[[Dict], None]) -> int:
+        """
+        Incorpora o diário ao snapshot
+        1. arquiva o snapshot atual (para restauração)
+        2. grava o novo snapshot com seq do último evento
+        3. só então arquiva o trecho do diário (uma queda no meio não perde eventos:
+           os já incorporados são ignorados ao reaplicar)
+        Retorna: seq do novo snapshot
+        """
+        with self._lock:
+            doc = ler_snapshot()
+            seq_anterior = int(doc.get('seq', 0))
+            eventos = self.eventos(desde=seq_anterior)
+            self._inicializar(seq_anterior)
+
+            self.dir_snapshots.mkdir(parents=True, exist_ok=True)
+            arquivado = self.dir_snapshots / f"escola-{seq_anterior}.json"
+            if not arquivado.exists():
+                with open(arquivado, 'w', encoding='utf-8') as f:
+                    json.dump(doc, f, ensure_ascii=False)
+
+            doc = reaplicar(doc, eventos)
+            doc['seq'] = self._seq
+            gravar_snapshot(doc)
+
+            segmento = list(self._ler(self.arquivo)) if self.arquivo.exists() else []
+            if segmento:
+                primeiro, ultimo = segmento[0]['seq'] - 1, max(ev['seq'] for ev in segmento)
+                os.replace(self.arquivo, self.dir_snapshots / f"diario-{primeiro}-{ultimo}.jsonl")
+            if self.arquivo.exists():
+                self.arquivo.unlink()
+            self._pendentes, self._base = 0, doc['seq']
+            self._podar()
+            return doc['seq']
+
+    def compactar_em_segundo_plano(self, compactar: Callable[[], int]) -> None:
+        """Roda `compactar` numa thread, se nenhuma compactação estiver em andamento"""
+        with self._lock:
+            if self._compactando:
+                return
+            self._compactando = True
+
+        def _rodar():
+            try:
+                compactar()
+            except Exception as e:
+                print(f"❌ Erro compactar diário: {e}")
+            finally:
+                self._compactando = False
+
+        threading.Thread(target=_rodar, daemon=True).start()
+
+    def _podar(self) -> None:
+        """Mantém apenas os MANTER_SNAPSHOTS snapshots arquivados mais recentes"""
+        snapshots = self._snapshots()
+        for seq in snapshots[:-MANTER_SNAPSHOTS]:
+            (self.dir_snapshots / f"escola-{seq}.json").unlink(missing_ok=True)
+        if snapshots[:-MANTER_SNAPSHOTS]:
+            limite = snapshots[-MANTER_SNAPSHOTS]
+            for segmento in self._segmentos():
+                if int(segmento.stem.split('-')[2]) <= limite:
+                    segmento.unlink(missing_ok=True)
+
+    def descarregar(self) -> None:
+        """Esquece o estado em memória (seq, versões); relido do disco no próximo acesso"""
+        with self._lock:
+            if not self._compactando:
+                self._seq, self._pendentes, self._versoes = None, None, None
+
+    def limpar(self) -> None:
+        """Apaga diário e snapshots arquivados"""
+        with self._lock:
+            if self.arquivo.exists():
+                self.arquivo.unlink()
+            for p in list(self.dir_snapshots.glob("*")) if self.dir_snapshots.exists() else []:
+                p.unlink()
+            self._seq, self._pendentes, self._versoes, self._base = None, None, None, 0
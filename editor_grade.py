@@ -0,0 +1,204 @@
+"""
+editor_grade.py - Edição manual da grade (mover / trocar aulas)
+Índices de ocupação por slot (turma, professor, sala) mantidos a cada
+alteração: checar um movimento é O(1), sem refazer a grade nem o solver
+"""
+
+import heapq
+from typing import Dict, List, Optional, Set, Tuple
+
+from models import Aula, GradeHoraria, Sala, Turma, DIAS_SEMANA, HORARIOS_REAIS, DIA_IDX
+
+# ============================================================================
+# CONFIGURAÇÃO
+# ============================================================================
+
+CAMPOS_OCUPACAO = ('turma', 'professor', 'sala')
+
+# Pesos das sugestões (menor custo = melhor)
+PESO_TROCA_SALA = 1          # sugerir outra sala que não a atual
+PESO_MESMA_DISCIPLINA_DIA = 3  # turma já tem a disciplina no dia
+PESO_DIA_DIFERENTE = 1       # sair do dia original
+
+# ============================================================================
+# CLASSE: EditorGrade
+# ============================================================================
+
+class EditorGrade:
+    """
+    Mantém, para cada (campo, nome, dia, horário), os ids das aulas no slot
+    As aulas da GradeHoraria são alteradas no lugar
+    """
+
+    def __init__(self, grade: GradeHoraria, salas: List[Sala] = None, turmas: List[Turma] = None,
+                 n_horarios: int = None):
+        self.grade = grade
+        self.n_horarios = max([n_horarios or len(HORARIOS_REAIS)] + [a.horario + 1 for a in grade.aulas])
+        self.aulas: Dict[str, Aula] = {a.id: a for a in grade.aulas}
+        self.ocupacao: Dict[Tuple[str, str, int, int], Set[str]] = {}
+        self.disciplinas_dia: Dict[Tuple[str, str, int], int] = {}  # (turma, disciplina, dia) → aulas
+        self.salas = [s for s in (salas or []) if isinstance(s, Sala)]
+        self.alunos = {t.nome: t.quantidade_alunos for t in (turmas or []) if isinstance(t, Turma)}
+        self.alteradas: Set[Tuple[str, str, int, int]] = set()  # células tocadas desde a última leitura
+        self.versoes: Dict[Tuple[str, str], int] = {}            # (campo, nome) → nº de alterações
+        for aula in grade.aulas:
+            self._indexar(aula, +1)
+
+    # ========================================================================
+    # ÍNDICES
+    # ========================================================================
+
+    @staticmethod
+    def _slot(aula: Aula) -> Tuple[int, int]:
+        return DIA_IDX.get(str(aula.dia).lower(), -1), aula.horario
+
+    def _indexar(self, aula: Aula, sinal: int) -> None:
+        dia, horario = self._slot(aula)
+        for campo in CAMPOS_OCUPACAO:
+            chave = (campo, getattr(aula, campo), dia, horario)
+            if sinal > 0:
+                self.ocupacao.setdefault(chave, set()).add(aula.id)
+            else:
+                ocupantes = self.ocupacao.get(chave)
+                if ocupantes is not None:
+                    ocupantes.discard(aula.id)
+                    if not ocupantes:
+                        del self.ocupacao[chave]
+        chave_dia = (aula.turma, aula.disciplina, dia)
+        self.disciplinas_dia[chave_dia] = self.disciplinas_dia.get(chave_dia, 0) + sinal
+
+    def _marcar(self, aula: Aula) -> None:
+        dia, horario = self._slot(aula)
+        for campo in CAMPOS_OCUPACAO:
+            nome = getattr(aula, campo)
+            self.alteradas.add((campo, nome, dia, horario))
+            self.versoes[(campo, nome)] = self.versoes.get((campo, nome), 0) + 1
+
+    def ocupantes(self, campo: str, nome: str, dia: int, horario: int) -> Set[str]:
+        return self.ocupacao.get((campo, nome, dia, horario), set())
+
+    def ocupado(self, campo: str, nome: str, dia: int, horario: int, semana: Optional[int] = None,
+                fora: Set[str] = frozenset()) -> Set[str]:
+        """
+        Aulas do slot que chocam com uma aula da `semana` (None = toda semana)
+        Quinzenais de semanas diferentes (A/B) dividem o mesmo slot
+        """
+        return {i for i in self.ocupantes(campo, nome, dia, horario) - fora
+                if semana is None or self.aulas[i].semana is None or self.aulas[i].semana == semana}
+
+    def celulas_alteradas(self, campo: str, nome: str) -> Set[Tuple[int, int]]:
+        """(dia, horário) alterados de uma entidade desde a última limpeza"""
+        return {(d, h) for c, n, d, h in self.alteradas if c == campo and n == nome}
+
+    def limpar_alteradas(self) -> None:
+        self.alteradas.clear()
+
+    # ========================================================================
+    # CONFLITOS (O(1) por movimento)
+    # ========================================================================
+
+    def conflitos(self, aula_id: str, dia: int, horario: int, sala: str = None,
+                  ignorar: Tuple[str, ...] = ()) -> List[Dict]:
+        """
+        Choques que a aula teria em (dia, horário[, sala])
+        ignorar: ids que estarão fora do slot (ex.: a outra aula de uma troca)
+        """
+        aula = self.aulas[aula_id]
+        destino = {'turma': aula.turma, 'professor': aula.professor, 'sala': sala or aula.sala}
+        fora = {aula_id, *ignorar}
+        encontrados = []
+        for campo, nome in destino.items():
+            outros = self.ocupado(campo, nome, dia, horario, aula.semana, fora)
+            if outros:
+                encontrados.append({'campo': campo, 'nome': nome, 'aulas': sorted(outros)})
+        return encontrados
+
+    def _validar_slot(self, dia: int, horario: int) -> None:
+        if not 0 <= dia < len(DIAS_SEMANA) or not 0 <= horario < self.n_horarios:
+            raise ValueError(f"Horário inválido: dia {dia}, horário {horario}")
+
+    # ========================================================================
+    # ALTERAÇÕES
+    # ========================================================================
+
+    def mover(self, aula_id: str, dia: int, horario: int, sala: str = None,
+              forcar: bool = False) -> List[Dict]:
+        """
+        Move a aula para (dia, horário[, sala])
+        Com conflitos, só aplica se forcar=True; retorna os conflitos encontrados
+        """
+        self._validar_slot(dia, horario)
+        conflitos = self.conflitos(aula_id, dia, horario, sala)
+        if conflitos and not forcar:
+            return conflitos
+
+        aula = self.aulas[aula_id]
+        self._marcar(aula)
+        self._indexar(aula, -1)
+        aula.dia, aula.horario = DIAS_SEMANA[dia], horario
+        if sala:
+            aula.sala = sala
+        self._indexar(aula, +1)
+        self._marcar(aula)
+        return conflitos
+
+    def trocar(self, aula_a: str, aula_b: str, forcar: bool = False) -> List[Dict]:
+        """Troca dia/horário/sala de duas aulas; retorna os conflitos encontrados"""
+        a, b = self.aulas[aula_a], self.aulas[aula_b]
+        (dia_a, hor_a), (dia_b, hor_b) = self._slot(a), self._slot(b)
+        conflitos = (self.conflitos(aula_a, dia_b, hor_b, b.sala, ignorar=(aula_b,))
+                     + self.conflitos(aula_b, dia_a, hor_a, a.sala, ignorar=(aula_a,)))
+        if conflitos and not forcar:
+            return conflitos
+
+        for aula in (a, b):
+            self._marcar(aula)
+            self._indexar(aula, -1)
+        (a.dia, a.horario, a.sala), (b.dia, b.horario, b.sala) = \
+            (b.dia, b.horario, b.sala), (a.dia, a.horario, a.sala)
+        for aula in (a, b):
+            self._indexar(aula, +1)
+            self._marcar(aula)
+        return conflitos
+
+    # ========================================================================
+    # SUGESTÕES
+    # ========================================================================
+
+    def _sala_livre(self, aula: Aula, dia: int, horario: int) -> Optional[str]:
+        """A sala atual se estiver livre; senão a menor sala livre que comporta a turma"""
+        if not self.ocupado('sala', aula.sala, dia, horario, aula.semana, {aula.id}):
+            return aula.sala
+        alunos = self.alunos.get(aula.turma, 0)
+        livres = [s for s in self.salas
+                  if s.capacidade >= alunos and not self.ocupado('sala', s.nome, dia, horario, aula.semana)]
+        return min(livres, key=lambda s: s.capacidade).nome if livres else None
+
+    def sugerir(self, aula_id: str, k: int = 5) -> List[Dict]:
+        """
+        Os k melhores slots livres para a aula (turma e professor livres)
+        Custo: troca de sala, disciplina repetida no dia, mudança de dia
+        """
+        aula = self.aulas[aula_id]
+        dia_atual, hor_atual = self._slot(aula)
+        candidatos = []
+        for dia in range(len(DIAS_SEMANA)):
+            for horario in range(self.n_horarios):
+                if (dia, horario) == (dia_atual, hor_atual):
+                    continue
+                if self.ocupado('turma', aula.turma, dia, horario, aula.semana) or \
+                   self.ocupado('professor', aula.professor, dia, horario, aula.semana):
+                    continue
+                sala = self._sala_livre(aula, dia, horario)
+                if sala is None:
+                    continue
+                repetidas = self.disciplinas_dia.get((aula.turma, aula.disciplina, dia), 0)
+                if dia == dia_atual:
+                    repetidas -= 1
+                custo = (PESO_TROCA_SALA * (sala != aula.sala)
+                         + PESO_MESMA_DISCIPLINA_DIA * max(repetidas, 0)
+                         + PESO_DIA_DIFERENTE * (dia != dia_atual))
+                candidatos.append((custo, dia, horario, sala))
+
+        return [{'dia': dia, 'horario': horario, 'sala': sala, 'custo': custo}
+                for custo, dia, horario, sala in heapq.nsmallest(k, candidatos)]
@@ -0,0 +1,295 @@
+"""
+escolas.py - Várias escolas (workspaces) num mesmo processo
+Cada escola tem seu diretório (data/escolas/<id>/) com documento, diário e
+grades próprios; a escola 'padrao' é a instalação de uma escola só (data/).
+O cadastro só é lido quando uma sessão abre a escola, as escolas ociosas
+saem da memória (LRU) e os solves passam por uma fila com cota por escola
+"""
+
+import atexit
+import copy
+import functools
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import database
+import instrumentacao
+import auto_save
+from auto_save import GravadorAdiado
+from esquema import montar_registro
+from models import Registro
+
+# ============================================================================
+# CONFIGURAÇÃO
+# ============================================================================
+
+ESCOLAS_DIR = database.DB_DIR / "escolas"
+ESCOLA_PADRAO = 'padrao'
+
+MAX_ABERTAS = 20                 # escolas com cadastro em memória
+OCIOSIDADE_SEGUNDOS = 15 * 60    # sem acesso por esse tempo: sai da memória
+
+TRABALHADORES = 2                # solves simultâneos no processo
+SOLVES_POR_ESCOLA = 1            # solves simultâneos de uma mesma escola
+FILA_POR_ESCOLA = 3              # solves aguardando, por escola
+SEGUNDOS_POR_HORA = 600          # tempo de solver por escola na última hora
+JANELA_COTA = 3600
+
+_ID_VALIDO = re.compile(r'^[a-z0-9][a-z0-9_-]{0,63}$')
+
+class CotaExcedida(Exception):
+    """A escola atingiu a cota de solves (fila cheia ou tempo de solver na última hora)"""
+
+def validar_id(escola_id: str) -> str:
+    """Id vira nome de diretório: só minúsculas, dígitos, '-' e '_'"""
+    escola_id = str(escola_id).strip().lower()
+    if not _ID_VALIDO.match(escola_id):
+        raise ValueError(f"Id de escola inválido: {escola_id!r}")
+    return escola_id
+
+# ============================================================================
+# CLASSE: Escola
+# ============================================================================
+
+class Escola:
+    """Workspace de uma escola: banco, gravação adiada e documento em cache"""
+
+    def __init__(self, id: str, banco: database.Banco, gravador: GravadorAdiado = None):
+        self.id = id
+        self.banco = banco
+        self.gravador = gravador or GravadorAdiado(functools.partial(database.gravar_serializado, banco=banco))
+        self.ultimo_acesso = time.monotonic()
+        self.em_uso = 0          # solves na fila ou rodando (não sai da memória)
+        self._documento = None   # (geração, documento)
+        self._lock = threading.Lock()
+
+    @property
+    def carregada(self) -> bool:
+        return self._documento is not None
+
+    def documento(self) -> Dict:
+        """Snapshot + diário da escola, relido só quando a geração muda"""
+        with self._lock:
+            geracao = self.banco.diario.seq
+            if self._documento is None or self._documento[0] != geracao:
+                self._documento = (geracao, database.carregar_documento(self.banco))
+            return self._documento[1]
+
+    def registro(self) -> Registro:
+        """Cadastro em objetos novos (cada sessão edita os seus)"""
+        return montar_registro(copy.deepcopy(self.documento()))
+
+    def descarregar(self) -> None:
+        """Grava o pendente e solta o cadastro da memória (o diretório continua)"""
+        self.gravador.flush()
+        with self._lock:
+            self._documento = None
+        self.banco.documento = None
+        self.banco.diario.descarregar()
+
+    def __repr__(self):
+        return f"Escola({self.id}, {'carregada' if self.carregada else 'no disco'})"
+
+# ============================================================================
+# CLASSE: Escolas
+# ============================================================================
+
+class Escolas:
+    """
+    Registro das escolas do processo. Um único Banco por diretório (o diário
+    numera os eventos em memória); o que sai por LRU é só o cadastro lido
+    """
+
+    def __init__(self, diretorio: Path = ESCOLAS_DIR, max_abertas: int = MAX_ABERTAS,
+                 ociosidade: float = OCIOSIDADE_SEGUNDOS):
+        self.diretorio = Path(diretorio)
+        self.max_abertas = max_abertas
+        self.ociosidade = ociosidade
+        self._escolas: Dict[str, Escola] = {}
+        self._abertas: 'OrderedDict[str, Escola]' = OrderedDict()  # menos recente primeiro
+        self._lock = threading.Lock()
+        self.despejadas = 0
+
+    def _diretorio(self, escola_id: str) -> Path:
+        return database.DB_DIR if escola_id == ESCOLA_PADRAO else self.diretorio / escola_id
+
+    def existe(self, escola_id: str) -> bool:
+        escola_id = validar_id(escola_id)
+        return escola_id == ESCOLA_PADRAO or self._diretorio(escola_id).is_dir()
+
+    def listar(self) -> List[str]:
+        """Escola padrão + escolas com diretório criado"""
+        ids = sorted(p.name for p in self.diretorio.iterdir()
+                     if p.is_dir() and _ID_VALIDO.match(p.name)) if self.diretorio.exists() else []
+        return [ESCOLA_PADRAO] + [i for i in ids if i != ESCOLA_PADRAO]
+
+    def criar(self, escola_id: str) -> Escola:
+        escola_id = validar_id(escola_id)
+        self._diretorio(escola_id).mkdir(parents=True, exist_ok=True)
+        return self.abrir(escola_id)
+
+    def abrir(self, escola_id: str) -> Escola:
+        """
+        Escola para uma sessão; o cadastro é lido no primeiro uso (Escola.documento)
+        Abrir marca o acesso e tira da memória as menos recentes além do limite
+        """
+        escola_id = validar_id(escola_id)
+        if not self.existe(escola_id):
+            raise KeyError(f"Escola não encontrada: {escola_id}")
+        with self._lock:
+            escola = self._escolas.get(escola_id)
+            if escola is None:
+                if escola_id == ESCOLA_PADRAO:
+                    escola = Escola(escola_id, database.PADRAO, auto_save.gravador)
+                else:
+                    escola = Escola(escola_id, database.Banco(self._diretorio(escola_id)))
+                self._escolas[escola_id] = escola
+            escola.ultimo_acesso = time.monotonic()
+            self._abertas[escola_id] = escola
+            self._abertas.move_to_end(escola_id)
+            despejar = self._selecionar_despejo()
+        self._despejar(despejar)
+        return escola
+
+    def _selecionar_despejo(self) -> List[Escola]:
+        """Ociosas e, acima do limite, as menos recentes (nunca as com solve pendente)"""
+        limite_acesso = time.monotonic() - self.ociosidade
+        candidatas = [e for e in self._abertas.values() if not e.em_uso]
+        excesso = len(self._abertas) - self.max_abertas
+        despejar = []
+        for escola in candidatas:
+            if excesso > 0 or escola.ultimo_acesso < limite_acesso:
+                despejar.append(escola)
+                excesso -= 1
+        for escola in despejar:
+            del self._abertas[escola.id]
+        return despejar
+
+    def _despejar(self, escolas: List[Escola]) -> None:
+        for escola in escolas:
+            try:
+                escola.descarregar()
+                self.despejadas += 1
+            except Exception as e:
+                print(f"❌ Erro descarregar escola {escola.id}: {e}")
+        if escolas:
+            instrumentacao.contar('escolas.despejadas', len(escolas))
+
+    def despejar_ociosas(self) -> int:
+        """Tira da memória as escolas sem acesso há `ociosidade` segundos"""
+        with self._lock:
+            despejar = self._selecionar_despejo()
+        self._despejar(despejar)
+        return len(despejar)
+
+    def abertas(self) -> List[str]:
+        with self._lock:
+            return list(self._abertas)
+
+    def gravar_pendentes(self) -> None:
+        """Grava a gravação adiada de todas as escolas (encerramento)"""
+        for escola in list(self._escolas.values()):
+            escola.gravador.flush()
+
+# ============================================================================
+# CLASSE: FilaSolver
+# ============================================================================
+
+class FilaSolver:
+    """
+    Fila de solves compartilhada pelas escolas: `trabalhadores` solves no
+    processo, no máximo `por_escola` de cada escola ao mesmo tempo e rodízio
+    entre as escolas com pedidos (uma escola não monopoliza os trabalhadores).
+    Cotas por escola: `fila_por_escola` pedidos aguardando e
+    `segundos_por_hora` de solver na última hora
+    """
+
+    def __init__(self, trabalhadores: int = TRABALHADORES, por_escola: int = SOLVES_POR_ESCOLA,
+                 fila_por_escola: int = FILA_POR_ESCOLA, segundos_por_hora: float = SEGUNDOS_POR_HORA):
+        self.trabalhadores = trabalhadores
+        self.por_escola = por_escola
+        self.fila_por_escola = fila_por_escola
+        self.segundos_por_hora = segundos_por_hora
+        self._executor = ThreadPoolExecutor(trabalhadores, thread_name_prefix='solver')
+        self._aguardando: 'OrderedDict[str, deque]' = OrderedDict()  # ordem = rodízio
+        self._rodando: Dict[str, int] = defaultdict(int)
+        self._uso: Dict[str, deque] = defaultdict(deque)  # escola → (fim, segundos)
+        self._lock = threading.Lock()
+
+    def _segundos_recentes(self, escola_id: str) -> float:
+        uso = self._uso[escola_id]
+        inicio = time.monotonic() - JANELA_COTA
+        while uso and uso[0][0] < inicio:
+            uso.popleft()
+        return sum(segundos for _, segundos in uso)
+
+    def submeter(self, escola: Escola, funcao: Callable, *args, **kwargs) -> Future:
+        """
+        Enfileira funcao(*args, **kwargs) com o banco da escola ativo
+        Levanta CotaExcedida se a escola já usou a sua cota
+        """
+        with self._lock:
+            aguardando = len(self._aguardando.get(escola.id, ()))
+            if aguardando >= self.fila_por_escola:
+                raise CotaExcedida(f"{escola.id}: {aguardando} solves já aguardando na fila")
+            usados = self._segundos_recentes(escola.id)
+            if usados >= self.segundos_por_hora:
+                raise CotaExcedida(f"{escola.id}: {usados:.0f}s de solver na última hora "
+                                   f"(cota {self.segundos_por_hora:.0f}s)")
+            futuro = Future()
+            self._aguardando.setdefault(escola.id, deque()).append((escola, futuro, funcao, args, kwargs))
+            escola.em_uso += 1
+            self._despachar()
+        return futuro
+
+    def _despachar(self) -> None:
+        """Com a trava: entrega pedidos aos trabalhadores livres, em rodízio"""
+        while sum(self._rodando.values()) < self.trabalhadores:
+            escola_id = next((i for i, fila in self._aguardando.items()
+                              if self._rodando[i] < self.por_escola), None)
+            if escola_id is None:
+                return
+            fila = self._aguardando[escola_id]
+            tarefa = fila.popleft()
+            if fila:
+                self._aguardando.move_to_end(escola_id)
+            else:
+                del self._aguardando[escola_id]
+            self._rodando[escola_id] += 1
+            self._executor.submit(self._rodar, *tarefa)
+
+    def _rodar(self, escola: Escola, futuro: Future, funcao: Callable, args, kwargs) -> None:
+        inicio = time.monotonic()
+        try:
+            if futuro.set_running_or_notify_cancel():
+                try:
+                    with database.usar_banco(escola.banco):
+                        futuro.set_result(funcao(*args, **kwargs))
+                except BaseException as e:
+                    futuro.set_exception(e)
+        finally:
+            segundos = time.monotonic() - inicio
+            instrumentacao.registrar('fila.solve', segundos, escola=escola.id)
+            with self._lock:
+                self._rodando[escola.id] -= 1
+                self._uso[escola.id].append((time.monotonic(), segundos))
+                escola.em_uso -= 1
+                self._despachar()
+
+    def situacao(self, escola_id: str) -> Dict:
+        """Pedidos aguardando/rodando e uso da cota de tempo da escola"""
+        with self._lock:
+            return {'aguardando': len(self._aguardando.get(escola_id, ())),
+                    'rodando': self._rodando[escola_id],
+                    'segundos_ultima_hora': round(self._segundos_recentes(escola_id), 1),
+                    'cota_segundos': self.segundos_por_hora}
+
+
+escolas = Escolas()
+fila = FilaSolver()
+atexit.register(escolas.gravar_pendentes)
@@ -0,0 +1,177 @@
+"""
+esquema.py - Esquema versionado do banco e migrações
+Versões:
+    0 - arquivos separados em data/ (turmas.json, professores.json, ...)
+    1 - documento único sem versão (escola_db.json: serie/turno/segmento/tipo/cor_*)
+    2 - documento único versionado (data/escola.json), campos de models.py
+    3 - disciplinas com frequência (1 = semanal, 2 = quinzenal)
+    4 - professores com carga máxima semanal (0 = sem limite)
+    5 - disciplinas com duração da aula em horários (2 = geminada)
+"""
+
+import re
+from typing import Any, Dict, List
+
+from models import Turma, Professor, Disciplina, Sala, Registro
+
+# ============================================================================
+# CONFIGURAÇÃO
+# ============================================================================
+
+ESQUEMA_VERSAO = 5
+
+ENTIDADES = ('turmas', 'professores', 'disciplinas', 'salas')
+
+# ============================================================================
+# DETECÇÃO
+# ============================================================================
+
+def detectar_versao(doc: Any) -> int:
+    """Descobre a versão de um documento já decodificado"""
+    if isinstance(doc, dict):
+        if 'versao' in doc:
+            return int(doc['versao'])
+        if any(e in doc for e in ENTIDADES):
+            return 1
+    raise ValueError("Documento em formato desconhecido")
+
+# ============================================================================
+# MIGRAÇÕES
+# ============================================================================
+
+def _lista(valor) -> List:
+    return valor if isinstance(valor, list) else []
+
+def _inteiro(valor, padrao: int) -> int:
+    """Converte para int; aceita textos como '6' ou '1em' (usa os dígitos iniciais)"""
+    if isinstance(valor, bool):
+        return padrao
+    if isinstance(valor, (int, float)):
+        return int(valor)
+    if isinstance(valor, str):
+        m = re.match(r'\s*(\d+)', valor)
+        if m:
+            return int(m.group(1))
+    return padrao
+
+def _v0_para_v1(doc: Dict) -> Dict:
+    """Arquivos separados → documento único (o carregador já junta as listas)"""
+    return {e: _lista(doc.get(e)) for e in ENTIDADES}
+
+def _v1_para_v2(doc: Dict) -> Dict:
+    """Normaliza os campos para os de models.py, preservando os ids"""
+    turmas = []
+    for t in _lista(doc.get('turmas')):
+        if not isinstance(t, dict):
+            continue
+        turmas.append({
+            'id': t.get('id'),
+            'nome': str(t.get('nome', 'Turma Sem Nome')),
+            'semestre': _inteiro(t.get('semestre', t.get('serie')), 1),
+            'curso': str(t.get('curso') or t.get('segmento') or t.get('turno') or 'Curso Padrão'),
+            'quantidade_alunos': _inteiro(t.get('quantidade_alunos', t.get('capacidade')), 0),
+        })
+
+    professores = []
+    for p in _lista(doc.get('professores')):
+        if not isinstance(p, dict):
+            continue
+        professores.append({
+            'id': p.get('id'),
+            'nome': str(p.get('nome', 'Professor Sem Nome')),
+            'disciplinas': [str(d) for d in _lista(p.get('disciplinas'))],
+        })
+
+    disciplinas = []
+    for d in _lista(doc.get('disciplinas')):
+        if not isinstance(d, dict):
+            continue
+        disciplinas.append({
+            'id': d.get('id'),
+            'nome': str(d.get('nome', 'Disciplina Sem Nome')),
+            'carga_semanal': _inteiro(d.get('carga_semanal'), 0),
+            'turmas': [str(t) for t in _lista(d.get('turmas'))],
+        })
+
+    salas = []
+    for s in _lista(doc.get('salas')):
+        if not isinstance(s, dict):
+            continue
+        salas.append({
+            'id': s.get('id'),
+            'nome': str(s.get('nome', 'Sala Sem Nome')),
+            'capacidade': _inteiro(s.get('capacidade'), 0),
+            'predio': str(s.get('predio') or 'Prédio Padrão'),
+            'andar': _inteiro(s.get('andar'), 0),
+        })
+
+    return {
+        'versao': 2,
+        'turmas': turmas,
+        'professores': professores,
+        'disciplinas': disciplinas,
+        'salas': salas,
+    }
+
+def _v2_para_v3(doc: Dict) -> Dict:
+    """Disciplinas ganham frequência; as existentes são semanais"""
+    for d in doc.get('disciplinas', []):
+        d['frequencia'] = _inteiro(d.get('frequencia'), 1) or 1
+    doc['versao'] = 3
+    return doc
+
+def _v3_para_v4(doc: Dict) -> Dict:
+    """Professores ganham carga máxima; as existentes ficam sem limite"""
+    for p in doc.get('professores', []):
+        p['carga_maxima'] = _inteiro(p.get('carga_maxima'), 0)
+    doc['versao'] = 4
+    return doc
+
+def _v4_para_v5(doc: Dict) -> Dict:
+    """Disciplinas ganham duração; as existentes têm aulas de um horário"""
+    for d in doc.get('disciplinas', []):
+        d['duracao'] = _inteiro(d.get('duracao'), 1) or 1
+    doc['versao'] = 5
+    return doc
+
+# versão de origem → função que leva à versão seguinte
+MIGRACOES = {
+    0: (_v0_para_v1, 1),
+    1: (_v1_para_v2, 2),
+    2: (_v2_para_v3, 3),
+    3: (_v3_para_v4, 4),
+    4: (_v4_para_v5, 5),
+}
+
+def migrar(doc: Dict, versao: int = None) -> Dict:
+    """Aplica as migrações em cadeia até ESQUEMA_VERSAO"""
+    versao = detectar_versao(doc) if versao is None else versao
+    if versao > ESQUEMA_VERSAO:
+        raise ValueError(f"Versão {versao} mais nova que a suportada ({ESQUEMA_VERSAO})")
+    while versao < ESQUEMA_VERSAO:
+        passo, versao = MIGRACOES[versao]
+        doc = passo(doc)
+    doc['versao'] = ESQUEMA_VERSAO
+    return doc
+
+# ============================================================================
+# CONSTRUÇÃO DO REGISTRO
+# ============================================================================
+
+def montar_registro(doc: Dict) -> Registro:
+    """Cria os objetos direto de um documento na versão atual (sem revalidação)"""
+    registro = Registro(
+        turmas=[Turma(t['nome'], t['semestre'], t['curso'], t['quantidade_alunos'], id=t.get('id'))
+                for t in doc['turmas']],
+        professores=[Professor(p['nome'], list(p['disciplinas']), id=p.get('id'),
+                               carga_maxima=p.get('carga_maxima', 0))
+                     for p in doc['professores']],
+        disciplinas=[Disciplina(d['nome'], d['carga_semanal'], list(d['turmas']), id=d.get('id'),
+                                frequencia=d.get('frequencia', 1), duracao=d.get('duracao', 1))
+                     for d in doc['disciplinas']],
+        salas=[Sala(s['nome'], s['capacidade'], s['predio'], s['andar'], id=s.get('id'))
+               for s in doc['salas']],
+    )
+    registro.geracao = int(doc.get('seq', 0))
+    registro.versoes = {e: dict(v) for e, v in doc.get('versoes', {}).items()}
+    return registro
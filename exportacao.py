@@ -0,0 +1,161 @@
+"""
+exportacao.py - Exportação em lote da grade horária
+Todas as visões (turma, professor, sala) geradas em uma única passada
+"""
+
+import html
+from typing import Dict, List, Iterator, Tuple, BinaryIO, TextIO
+
+from models import GradeHoraria, HORARIOS_REAIS, DIA_IDX, rotulo_semana
+
+# ============================================================================
+# CONFIGURAÇÃO
+# ============================================================================
+
+DIAS_ROTULOS = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta"]
+
+VISOES = [
+    ('turma', 'Turma'),
+    ('professor', 'Professor'),
+    ('sala', 'Sala'),
+]
+
+# Campos exibidos em cada célula, conforme o tipo de visão
+CAMPOS_CELULA = {
+    'turma': ('disciplina', 'professor', 'sala'),
+    'professor': ('disciplina', 'turma', 'sala'),
+    'sala': ('disciplina', 'turma', 'professor'),
+}
+
+# ============================================================================
+# AGRUPAMENTO
+# ============================================================================
+
+def agrupar_aulas(grade: GradeHoraria) -> Tuple[Dict[str, Dict[str, List[int]]], List[int]]:
+    """
+    Agrupa os índices das aulas por turma, professor e sala em uma única passada
+    Retorna: ({campo: {nome: [índices]}}, horários presentes)
+    """
+    grupos = {campo: {} for campo, _ in VISOES}
+    horarios = set(HORARIOS_REAIS)
+
+    for i, aula in enumerate(grade.aulas):
+        horarios.add(aula.horario)
+        for campo, _ in VISOES:
+            grupos[campo].setdefault(getattr(aula, campo), []).append(i)
+
+    return grupos, sorted(horarios)
+
+def _celulas(grade: GradeHoraria, indices: List[int], campo: str) -> Dict[Tuple[int, int], List[str]]:
+    """Monta {(horario, dia_idx): [textos]} apenas com as aulas da visão"""
+    celulas = {}
+    for i in indices:
+        aula = grade.aulas[i]
+        dia_idx = DIA_IDX.get(aula.dia.lower())
+        if dia_idx is None:
+            continue
+        texto = ' | '.join(str(getattr(aula, c)) for c in CAMPOS_CELULA[campo])
+        if getattr(aula, 'semana', None) is not None:
+            texto += f" (sem. {rotulo_semana(aula.semana)})"
+        celulas.setdefault((aula.horario, dia_idx), []).append(texto)
+    return celulas
+
+def iterar_visoes(grade: GradeHoraria) -> Iterator[Tuple[str, str, Dict, List[int]]]:
+    """
+    Percorre todas as visões, uma de cada vez
+    Rende: (tipo, nome, células, horários)
+    """
+    grupos, horarios = agrupar_aulas(grade)
+    for campo, rotulo in VISOES:
+        for nome in sorted(grupos[campo]):
+            yield rotulo, nome, _celulas(grade, grupos[campo][nome], campo), horarios
+
+# ============================================================================
+# XLSX
+# ============================================================================
+
+def _nome_planilha(rotulo: str, nome: str, usados: set) -> str:
+    """Gera nome de planilha válido (31 caracteres, sem repetição)"""
+    base = f"{rotulo} {nome}"
+    for c in '[]:*?/\\':
+        base = base.replace(c, '_')
+    base = base[:31]
+    candidato, n = base, 2
+    while candidato.lower() in usados:
+        sufixo = f" ({n})"
+        candidato = base[:31 - len(sufixo)] + sufixo
+        n += 1
+    usados.add(candidato.lower())
+    return candidato
+
+def exportar_xlsx(grade: GradeHoraria, destino: BinaryIO) -> int:
+    """
+    Grava todas as visões em um único XLSX, uma planilha por visão
+    Usa o modo write-only do openpyxl para manter a memória limitada
+    Retorna: número de planilhas geradas
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    usados = set()
+    total = 0
+
+    for rotulo, nome, celulas, horarios in iterar_visoes(grade):
+        ws = wb.create_sheet(_nome_planilha(rotulo, nome, usados))
+        ws.append([f"{rotulo}: {nome}"])
+        ws.append(["Horário"] + DIAS_ROTULOS)
+        for h in horarios:
+            linha = [HORARIOS_REAIS.get(h, f"{h + 1}º horário")]
+            for dia_idx in range(len(DIAS_ROTULOS)):
+                linha.append('\n'.join(celulas.get((h, dia_idx), [])))
+            ws.append(linha)
+        total += 1
+
+    wb.save(destino)
+    return total
+
+# ============================================================================
+# HTML
+# ============================================================================
+
+CSS_LOTE = """
+<style>
+    body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; }
+    .visao { page-break-after: always; margin-bottom: 32px; }
+    .visao h2 { color: #2c3e50; }
+    table { width: 100%; border-collapse: collapse; }
+    th { background: #667eea; color: white; padding: 8px; }
+    td { border: 1px solid #e8eef5; padding: 6px; vertical-align: top; font-size: 12px; }
+    td.horario { background: #f0f4f8; font-weight: bold; text-align: center; }
+    .aula { background: #d5e8f7; border-left: 4px solid #667eea; border-radius: 4px; padding: 4px; margin: 2px 0; }
+</style>
+"""
+
+def iterar_html(grade: GradeHoraria) -> Iterator[str]:
+    """Rende o documento HTML combinado em pedaços, uma visão por vez"""
+    yield f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>Grade Horária</title>{CSS_LOTE}</head><body>"
+
+    for rotulo, nome, celulas, horarios in iterar_visoes(grade):
+        partes = [f'<div class="visao"><h2>{rotulo}: {html.escape(str(nome))}</h2><table><tr><th>⏰ Horário</th>']
+        partes.extend(f'<th>{d}</th>' for d in DIAS_ROTULOS)
+        partes.append('</tr>')
+        for h in horarios:
+            partes.append(f'<tr><td class="horario">{HORARIOS_REAIS.get(h, f"{h + 1}º horário")}</td>')
+            for dia_idx in range(len(DIAS_ROTULOS)):
+                aulas = celulas.get((h, dia_idx), [])
+                partes.append('<td>' + ''.join(f'<div class="aula">{html.escape(a)}</div>' for a in aulas) + '</td>')
+            partes.append('</tr>')
+        partes.append('</table></div>')
+        yield ''.join(partes)
+
+    yield "</body></html>"
+
+def exportar_html(grade: GradeHoraria, destino: TextIO) -> int:
+    """
+    Grava o documento HTML combinado diretamente no destino
+    Retorna: número de caracteres escritos
+    """
+    total = 0
+    for pedaco in iterar_html(grade):
+        total += destino.write(pedaco)
+    return total
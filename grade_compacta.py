@@ -0,0 +1,270 @@
+"""
+grade_compacta.py - Representação compacta e índices da grade horária
+Cada aula vira uma linha de códigos inteiros (NumPy); ocupações e
+métricas de resumo são calculadas uma única vez por grade
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+from models import Aula, GradeHoraria, DIAS_SEMANA, HORARIOS_REAIS, DIA_IDX, gerar_ids
+
+# ============================================================================
+# CONFIGURAÇÃO
+# ============================================================================
+
+CAMPOS = ('turma', 'disciplina', 'professor', 'sala')
+
+# ============================================================================
+# CLASSE: GradeCompacta
+# ============================================================================
+
+class GradeCompacta:
+    """
+    Grade em colunas: um vetor de códigos por campo + tabelas de nomes
+    Ocupação de cada entidade: matriz (entidades × dias × horários)
+    """
+
+    def __init__(self, nomes: Dict[str, List[str]], codigos: Dict[str, np.ndarray],
+                 dia: np.ndarray, horario: np.ndarray, n_horarios: int = None,
+                 fixada: np.ndarray = None, semana: np.ndarray = None, ids: List[str] = None):
+        self.nomes = nomes
+        self.codigos = codigos
+        self.dia = dia
+        self.horario = horario
+        self.fixada = fixada if fixada is not None else np.zeros(len(dia), dtype=bool)
+        # -1 = toda semana; 0, 1, ... = semana A, B, ... do ciclo
+        self.semana = semana if semana is not None else np.full(len(dia), -1, dtype=np.int8)
+        # Ids das aulas: gerados uma vez quando faltam (saída do solver) e gravados junto
+        self.ids = list(ids) if ids is not None else None
+        self.n_semanas = int(self.semana.max()) + 1 if len(self.semana) and self.semana.max() >= 0 else 1
+        self.n_dias = len(DIAS_SEMANA)
+        maior = int(horario.max()) + 1 if len(horario) else 0
+        self.n_horarios = max(n_horarios or len(HORARIOS_REAIS), maior)
+
+        self.indices = {c: {nome: i for i, nome in enumerate(nomes[c])} for c in CAMPOS}
+        self._ocupacao = {}
+        self._totais = {}
+        self._distintos = {}
+        self._ordem = {}
+
+    @classmethod
+    def de_grade(cls, grade: GradeHoraria, n_horarios: int = None) -> 'GradeCompacta':
+        """Converte GradeHoraria para a forma compacta (uma passada pelas aulas)"""
+        n = len(grade.aulas)
+        indices = {c: {} for c in CAMPOS}
+        codigos = {c: np.empty(n, dtype=np.int32) for c in CAMPOS}
+        dia = np.empty(n, dtype=np.int16)
+        horario = np.empty(n, dtype=np.int16)
+        fixada = np.zeros(n, dtype=bool)
+        semana = np.full(n, -1, dtype=np.int8)
+        ids = [aula.id for aula in grade.aulas]
+
+        for i, aula in enumerate(grade.aulas):
+            for c in CAMPOS:
+                tabela = indices[c]
+                valor = getattr(aula, c)
+                codigo = tabela.get(valor)
+                if codigo is None:
+                    codigo = tabela[valor] = len(tabela)
+                codigos[c][i] = codigo
+            dia[i] = DIA_IDX.get(str(aula.dia).lower(), -1)
+            horario[i] = aula.horario
+            fixada[i] = getattr(aula, 'fixada', False)
+            if getattr(aula, 'semana', None) is not None:
+                semana[i] = aula.semana
+
+        nomes = {c: list(indices[c]) for c in CAMPOS}
+        return cls(nomes, codigos, dia, horario, n_horarios, fixada, semana, ids)
+
+    @classmethod
+    def de_colunas(cls, nomes: Dict[str, List[str]], codigos: Dict[str, np.ndarray], dia: np.ndarray,
+                   horario: np.ndarray, n_horarios: int = None, semana: np.ndarray = None) -> 'GradeCompacta':
+        """
+        Monta a partir de colunas de códigos sobre tabelas de nomes completas
+        (ex.: saída do solver); só os nomes com aulas ficam nas tabelas
+        """
+        usados, recodificados = {}, {}
+        for c in CAMPOS:
+            unicos, inverso = np.unique(codigos[c], return_inverse=True)
+            usados[c] = [nomes[c][i] for i in unicos.tolist()]
+            recodificados[c] = inverso.astype(np.int32)
+        semana = semana.astype(np.int8) if semana is not None else None
+        return cls(usados, recodificados, dia.astype(np.int16), horario.astype(np.int16), n_horarios, None, semana)
+
+    def juntar(self, outra: 'GradeCompacta') -> 'GradeCompacta':
+        """Aulas desta grade seguidas das da outra (tabelas de nomes unificadas)"""
+        nomes, codigos = {}, {}
+        for c in CAMPOS:
+            tabela = dict(self.indices[c])
+            mapa = np.array([tabela.setdefault(nome, len(tabela)) for nome in outra.nomes[c]], dtype=np.int32)
+            nomes[c] = list(tabela)
+            codigos[c] = np.concatenate([self.codigos[c], mapa[outra.codigos[c]]]).astype(np.int32)
+        return GradeCompacta(nomes, codigos, np.concatenate([self.dia, outra.dia]),
+                             np.concatenate([self.horario, outra.horario]),
+                             max(self.n_horarios, outra.n_horarios),
+                             np.concatenate([self.fixada, outra.fixada]),
+                             np.concatenate([self.semana, outra.semana]),
+                             self.garantir_ids() + outra.garantir_ids())
+
+    def garantir_ids(self) -> List[str]:
+        """Ids das aulas, gerados na primeira vez que faltam (e mantidos)"""
+        if self.ids is None:
+            self.ids = gerar_ids(len(self))
+        return self.ids
+
+    def _dias_validos(self) -> None:
+        invalidos = int(np.count_nonzero(self.dia < 0))
+        if invalidos:
+            raise ValueError(f"{invalidos} aula(s) com dia inválido na grade compacta")
+
+    def para_grade(self) -> GradeHoraria:
+        """
+        Reconstrói a GradeHoraria com objetos Aula (colunas convertidas de uma vez)
+        Aulas mantêm os ids; dia inválido (-1) levanta ValueError
+        """
+        self._dias_validos()
+        colunas = {c: np.array(self.nomes[c], dtype=object)[self.codigos[c]].tolist() for c in CAMPOS}
+        dias = np.array(DIAS_SEMANA, dtype=object)[self.dia].tolist()
+        semanas = [s if s >= 0 else None for s in self.semana.tolist()]
+        return GradeHoraria([
+            Aula(d, p, s, dia, h, t, id=i, fixada=f, semana=w)
+            for d, p, s, dia, h, t, i, f, w in zip(
+                colunas['disciplina'], colunas['professor'], colunas['sala'], dias, self.horario.tolist(),
+                colunas['turma'], self.garantir_ids(), self.fixada.tolist(), semanas)
+        ])
+
+    def aula(self, i: int) -> Aula:
+        """Materializa a i-ésima aula"""
+        if self.dia[i] < 0:
+            raise ValueError(f"Aula {i} com dia inválido na grade compacta")
+        return Aula(
+            disciplina=self.nomes['disciplina'][self.codigos['disciplina'][i]],
+            professor=self.nomes['professor'][self.codigos['professor'][i]],
+            sala=self.nomes['sala'][self.codigos['sala'][i]],
+            dia=DIAS_SEMANA[self.dia[i]],
+            horario=int(self.horario[i]),
+            turma=self.nomes['turma'][self.codigos['turma'][i]],
+            id=self.garantir_ids()[i],
+            fixada=bool(self.fixada[i]),
+            semana=int(self.semana[i]) if self.semana[i] >= 0 else None
+        )
+
+    def __len__(self):
+        return len(self.dia)
+
+    # ========================================================================
+    # ARQUIVO (.npz, sem pickle)
+    # ========================================================================
+
+    def salvar(self, destino) -> None:
+        """Grava as colunas e tabelas de nomes em formato .npz compactado"""
+        arrays = {f"cod_{c}": self.codigos[c] for c in CAMPOS}
+        arrays.update({f"nomes_{c}": np.array(self.nomes[c], dtype=str) for c in CAMPOS})
+        np.savez_compressed(destino, dia=self.dia, horario=self.horario, fixada=self.fixada, semana=self.semana,
+                            n_horarios=np.array(self.n_horarios), ids=np.array(self.garantir_ids(), dtype=str),
+                            **arrays)
+
+    @classmethod
+    def carregar(cls, origem) -> 'GradeCompacta':
+        """Lê um arquivo gravado por salvar()"""
+        with np.load(origem, allow_pickle=False) as z:
+            nomes = {c: z[f"nomes_{c}"].tolist() for c in CAMPOS}
+            codigos = {c: z[f"cod_{c}"] for c in CAMPOS}
+            fixada = z['fixada'] if 'fixada' in z.files else None
+            semana = z['semana'] if 'semana' in z.files else None
+            ids = z['ids'].tolist() if 'ids' in z.files else None
+            return cls(nomes, codigos, z['dia'], z['horario'], int(z['n_horarios']), fixada, semana, ids)
+
+    # ========================================================================
+    # ÍNDICES
+    # ========================================================================
+
+    def ocupacao(self, campo: str) -> np.ndarray:
+        """Matriz (entidades × dias × horários) com o número de aulas por slot"""
+        if campo not in self._ocupacao:
+            n_ent = len(self.nomes[campo])
+            n_slots = self.n_dias * self.n_horarios
+            validas = self.dia >= 0
+            chave = (self.codigos[campo][validas].astype(np.int64) * n_slots
+                     + self.dia[validas] * self.n_horarios + self.horario[validas])
+            contagem = np.bincount(chave, minlength=n_ent * n_slots)
+            self._ocupacao[campo] = contagem.reshape(n_ent, self.n_dias, self.n_horarios)
+        return self._ocupacao[campo]
+
+    def ocupacao_por_semana(self, campo: str) -> np.ndarray:
+        """
+        Matriz (entidades × semanas × dias × horários) do ciclo
+        Aulas semanais (semana -1) contam em todas as semanas
+        """
+        if self.n_semanas == 1:
+            return self.ocupacao(campo)[:, None]
+        n_ent = len(self.nomes[campo])
+        n_slots = self.n_dias * self.n_horarios
+        validas = self.dia >= 0
+        slot = self.dia * self.n_horarios + self.horario
+        cod = self.codigos[campo].astype(np.int64)
+
+        semanais = validas & (self.semana < 0)
+        base = np.bincount(cod[semanais] * n_slots + slot[semanais], minlength=n_ent * n_slots)
+        especificas = validas & (self.semana >= 0)
+        chave = (cod[especificas] * self.n_semanas + self.semana[especificas]) * n_slots + slot[especificas]
+        por_semana = np.bincount(chave, minlength=n_ent * self.n_semanas * n_slots)
+        total = por_semana.reshape(n_ent, self.n_semanas, n_slots) + base.reshape(n_ent, 1, n_slots)
+        return total.reshape(n_ent, self.n_semanas, self.n_dias, self.n_horarios)
+
+    def total_aulas(self, campo: str) -> np.ndarray:
+        """Número de aulas de cada entidade do campo"""
+        if campo not in self._totais:
+            self._totais[campo] = np.bincount(self.codigos[campo], minlength=len(self.nomes[campo]))
+        return self._totais[campo]
+
+    def distintos(self, campo: str, outro: str) -> np.ndarray:
+        """Para cada entidade de `campo`, quantos valores distintos de `outro` ela tem"""
+        chave_cache = (campo, outro)
+        if chave_cache not in self._distintos:
+            n_outro = max(len(self.nomes[outro]), 1)
+            pares = np.unique(self.codigos[campo].astype(np.int64) * n_outro + self.codigos[outro])
+            self._distintos[chave_cache] = np.bincount(pares // n_outro, minlength=len(self.nomes[campo]))
+        return self._distintos[chave_cache]
+
+    def aulas_de(self, campo: str, nome: str) -> np.ndarray:
+        """Índices das aulas de uma entidade (via ordenação estável feita uma vez)"""
+        codigo = self.indices[campo].get(nome)
+        if codigo is None:
+            return np.empty(0, dtype=np.int64)
+        if campo not in self._ordem:
+            ordem = np.argsort(self.codigos[campo], kind='stable')
+            limites = np.searchsorted(self.codigos[campo][ordem], np.arange(len(self.nomes[campo]) + 1))
+            self._ordem[campo] = (ordem, limites)
+        ordem, limites = self._ordem[campo]
+        return ordem[limites[codigo]:limites[codigo + 1]]
+
+    def janelas(self, campo: str = 'professor') -> np.ndarray:
+        """
+        Horários vagos entre a primeira e a última aula do dia, somados no
+        ciclo, para cada entidade do campo
+        """
+        ocupado = self.ocupacao_por_semana(campo) > 0
+        if not ocupado.size:
+            return np.zeros(len(self.nomes[campo]), dtype=np.int64)
+        n_h = ocupado.shape[-1]
+        tem = ocupado.any(axis=-1)
+        primeira = np.argmax(ocupado, axis=-1)
+        ultima = n_h - 1 - np.argmax(ocupado[..., ::-1], axis=-1)
+        vagos = np.where(tem, ultima - primeira + 1 - ocupado.sum(axis=-1), 0)
+        return vagos.reshape(len(vagos), -1).sum(axis=1)
+
+    def resumo(self, campo: str, nome: str) -> Dict[str, int]:
+        """Métricas de uma entidade: aulas e distintos dos demais campos"""
+        codigo = self.indices[campo].get(nome)
+        if codigo is None:
+            return {}
+        metricas = {'aulas': int(self.total_aulas(campo)[codigo])}
+        for outro in CAMPOS:
+            if outro != campo:
+                metricas[outro] = int(self.distintos(campo, outro)[codigo])
+        ocup = self.ocupacao(campo)[codigo]
+        metricas['ocupacao'] = float((ocup > 0).sum()) / max(ocup.size, 1)
+        return metricas
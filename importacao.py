@@ -0,0 +1,297 @@
+"""
+importacao.py - Importação em lote de turmas, professores, disciplinas e salas
+Lê CSV/XLSX, valida tudo de forma vetorizada com pandas e só aplica
+as alterações se nenhuma linha tiver erro
+"""
+
+import io
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from models import Turma, Professor, Disciplina, Sala
+
+# ============================================================================
+# CONFIGURAÇÃO
+# ============================================================================
+
+ENTIDADES = ['turmas', 'professores', 'disciplinas', 'salas']
+
+COLUNAS = {
+    'turmas': ['nome', 'semestre', 'curso', 'quantidade_alunos'],
+    'professores': ['nome', 'disciplinas'],
+    'disciplinas': ['nome', 'carga_semanal', 'turmas'],
+    'salas': ['nome', 'capacidade', 'predio', 'andar'],
+}
+
+# (coluna, mínimo, máximo) - os formulários do app usam estes mesmos limites (faixa)
+LIMITES = {
+    'turmas': [('semestre', 1, 8), ('quantidade_alunos', 1, 100)],
+    'professores': [('carga_maxima', 0, 60)],
+    'disciplinas': [('carga_semanal', 1, 10), ('frequencia', 1, 2), ('duracao', 1, 4)],
+    'salas': [('capacidade', 1, 1000), ('andar', 0, 100)],
+}
+
+# Colunas opcionais → valor quando ausentes
+OPCIONAIS = {'professores': {'carga_maxima': 0}, 'disciplinas': {'frequencia': 1, 'duracao': 1}}
+
+# Colunas com listas de nomes separados por ';' ou ','
+LISTAS = {'professores': 'disciplinas', 'disciplinas': 'turmas'}
+
+SEPARADOR_LISTA = r'\s*[;,]\s*'
+
+# Trechos do nome do arquivo/planilha que identificam a entidade
+PREFIXOS = {'turma': 'turmas', 'prof': 'professores', 'disc': 'disciplinas', 'sala': 'salas'}
+
+# ============================================================================
+# LEITURA
+# ============================================================================
+
+def faixa(entidade: str, coluna: str) -> Tuple[int, int]:
+    """(mínimo, máximo) aceitos para a coluna"""
+    return next((minimo, maximo) for c, minimo, maximo in LIMITES[entidade] if c == coluna)
+
+def _normalizar(df: pd.DataFrame) -> pd.DataFrame:
+    """Padroniza nomes de colunas e remove linhas totalmente vazias"""
+    df = df.rename(columns=lambda c: str(c).strip().lower().replace(' ', '_'))
+    df = df.dropna(how='all')
+    if 'nome' in df.columns:
+        df['nome'] = df['nome'].astype('string').str.strip()
+    return df
+
+def _entidade_do_nome(nome: str) -> str:
+    """Descobre a entidade pelo nome do arquivo ou da planilha"""
+    base = nome.lower().rsplit('/', 1)[-1]
+    for prefixo, entidade in PREFIXOS.items():
+        if prefixo in base:
+            return entidade
+    return None
+
+def ler_arquivos(arquivos: List[Tuple[str, bytes]]) -> Dict[str, pd.DataFrame]:
+    """
+    Lê uma lista de (nome_arquivo, conteúdo)
+    XLSX: uma planilha por entidade; CSV: entidade indicada no nome do arquivo
+    Retorna: {entidade: DataFrame}
+    """
+    tabelas = {}
+    for nome, conteudo in arquivos:
+        if nome.lower().endswith(('.xlsx', '.xlsm')):
+            planilhas = pd.read_excel(io.BytesIO(conteudo), sheet_name=None, dtype=object)
+            for nome_planilha, df in planilhas.items():
+                entidade = _entidade_do_nome(nome_planilha)
+                if entidade:
+                    tabelas[entidade] = _normalizar(df)
+        else:
+            entidade = _entidade_do_nome(nome)
+            if entidade:
+                df = pd.read_csv(io.BytesIO(conteudo), dtype=object, sep=None, engine='python',
+                                 encoding='utf-8-sig')
+                tabelas[entidade] = _normalizar(df)
+    for entidade, df in tabelas.items():
+        for coluna, padrao in OPCIONAIS.get(entidade, {}).items():
+            if coluna not in df.columns:
+                df[coluna] = padrao
+            else:
+                df[coluna] = df[coluna].fillna(padrao)
+    return tabelas
+
+def gerar_modelo_xlsx() -> bytes:
+    """Planilha modelo vazia com uma aba por entidade"""
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        for entidade in ENTIDADES:
+            colunas = COLUNAS[entidade] + list(OPCIONAIS.get(entidade, {}))
+            pd.DataFrame(columns=colunas).to_excel(writer, sheet_name=entidade, index=False)
+    return buffer.getvalue()
+
+# ============================================================================
+# VALIDAÇÃO
+# ============================================================================
+
+def _erros(entidade: str, df: pd.DataFrame, mascara: pd.Series, coluna: str, mensagem: str) -> pd.DataFrame:
+    """Converte uma máscara booleana em linhas de erro (linha = número na planilha)"""
+    linhas = df.index[mascara.fillna(False).to_numpy(dtype=bool)]
+    return pd.DataFrame({
+        'entidade': entidade,
+        'linha': linhas + 2,
+        'coluna': coluna,
+        'erro': mensagem,
+    })
+
+def _explodir(df: pd.DataFrame, coluna: str) -> pd.Series:
+    """Série (índice da linha → nome referenciado), uma entrada por item da lista"""
+    itens = df[coluna].astype('string').fillna('').str.split(SEPARADOR_LISTA, regex=True).explode()
+    itens = itens.str.strip()
+    return itens[itens != '']
+
+def validar(tabelas: Dict[str, pd.DataFrame], existentes: Dict[str, List[str]] = None,
+            modo: str = 'acrescentar') -> pd.DataFrame:
+    """
+    Valida todas as tabelas de uma vez
+    existentes: {entidade: [nomes já cadastrados]} usados para duplicidade e referências
+    modo: 'acrescentar' (mantém cadastros atuais) ou 'substituir'
+    Retorna: DataFrame com colunas entidade, linha, coluna, erro (vazio = tudo ok)
+    """
+    existentes = dict(existentes or {})
+    if modo == 'substituir':
+        for entidade in tabelas:
+            existentes[entidade] = []
+    erros = []
+
+    for entidade, df in tabelas.items():
+        faltando = [c for c in COLUNAS[entidade] if c not in df.columns]
+        if faltando:
+            erros.append(pd.DataFrame([{
+                'entidade': entidade, 'linha': 1, 'coluna': ', '.join(faltando),
+                'erro': "Coluna obrigatória ausente"
+            }]))
+            continue
+
+        nomes = df['nome']
+        erros.append(_erros(entidade, df, nomes.isna() | (nomes == ''), 'nome', "Nome vazio"))
+        erros.append(_erros(entidade, df, nomes.notna() & nomes.duplicated(keep=False), 'nome',
+                            "Nome duplicado no arquivo"))
+        ja_existe = set(existentes.get(entidade, []))
+        if ja_existe:
+            erros.append(_erros(entidade, df, nomes.isin(ja_existe), 'nome', "Nome já cadastrado"))
+
+        for coluna, minimo, maximo in LIMITES[entidade]:
+            valores = pd.to_numeric(df[coluna], errors='coerce')
+            erros.append(_erros(entidade, df, valores.isna(), coluna, "Valor numérico inválido"))
+            erros.append(_erros(entidade, df, valores.notna() & ~valores.between(minimo, maximo), coluna,
+                                f"Fora do intervalo {minimo}–{maximo}"))
+            inteiro = valores.notna() & (valores != valores.round())
+            erros.append(_erros(entidade, df, inteiro, coluna, "Deve ser inteiro"))
+
+    # Referências: nomes importados + cadastrados
+    def _nomes(entidade):
+        nomes = set(existentes.get(entidade, []))
+        if entidade in tabelas and 'nome' in tabelas[entidade].columns:
+            nomes |= set(tabelas[entidade]['nome'].dropna())
+        return nomes
+
+    referencias = {'professores': 'disciplinas', 'disciplinas': 'turmas'}
+    for entidade, alvo in referencias.items():
+        df = tabelas.get(entidade)
+        if df is None or LISTAS[entidade] not in df.columns:
+            continue
+        itens = _explodir(df, LISTAS[entidade])
+        vazias = ~df.index.isin(itens.index)
+        erros.append(_erros(entidade, df, pd.Series(vazias, index=df.index), LISTAS[entidade],
+                            f"Nenhuma referência em '{LISTAS[entidade]}'"))
+        pendentes = itens[~itens.isin(_nomes(alvo))]
+        if len(pendentes):
+            por_linha = pendentes.groupby(level=0).agg(', '.join)
+            erros.append(pd.DataFrame({
+                'entidade': entidade,
+                'linha': por_linha.index + 2,
+                'coluna': LISTAS[entidade],
+                'erro': "Referência inexistente: " + por_linha.to_numpy(dtype=object),
+            }))
+
+    erros = [e for e in erros if len(e)]
+    if not erros:
+        return pd.DataFrame(columns=['entidade', 'linha', 'coluna', 'erro'])
+    return pd.concat(erros, ignore_index=True).sort_values(['entidade', 'linha'], kind='stable')
+
+def validar_item(entidade: str, dados: Dict, nomes: List[str] = ()) -> List[str]:
+    """
+    Valida um cadastro avulso (API) com as regras da planilha
+    nomes: nomes já cadastrados na entidade (sem o próprio item)
+    Retorna: mensagens de erro (vazia = tudo ok)
+    """
+    erros = []
+    faltando = [c for c in COLUNAS[entidade] if dados.get(c) in (None, '')]
+    if faltando:
+        erros.append(f"Campo obrigatório ausente: {', '.join(faltando)}")
+
+    numericas = {c for c, _, _ in LIMITES[entidade]}
+    for coluna in COLUNAS[entidade]:
+        valor = dados.get(coluna)
+        if coluna not in numericas and coluna != LISTAS.get(entidade) and valor not in (None, '') \
+                and not isinstance(valor, str):
+            erros.append(f"{coluna}: deve ser texto")
+    if dados.get('nome') in set(nomes):
+        erros.append(f"nome: já cadastrado ({dados['nome']})")
+
+    for coluna, minimo, maximo in LIMITES[entidade]:
+        valor = dados.get(coluna, OPCIONAIS.get(entidade, {}).get(coluna))
+        if valor is None:
+            continue
+        if isinstance(valor, bool) or not isinstance(valor, (int, float)) or not float(valor).is_integer():
+            erros.append(f"{coluna}: deve ser inteiro")
+        elif not minimo <= valor <= maximo:
+            erros.append(f"{coluna}: fora do intervalo {minimo}–{maximo}")
+
+    lista = LISTAS.get(entidade)
+    valores = dados.get(lista) if lista else None
+    if valores is not None and not (isinstance(valores, list) and all(isinstance(v, str) for v in valores)):
+        erros.append(f"{lista}: deve ser uma lista de nomes")
+    elif lista and valores == []:
+        erros.append(f"{lista}: nenhuma referência")
+    return erros
+
+# ============================================================================
+# CONVERSÃO
+# ============================================================================
+
+def montar_entidades(tabelas: Dict[str, pd.DataFrame]) -> Dict[str, List]:
+    """Cria os objetos do modelo a partir das tabelas já validadas"""
+    resultado = {e: [] for e in ENTIDADES}
+
+    df = tabelas.get('turmas')
+    if df is not None:
+        resultado['turmas'] = [
+            Turma(str(r.nome), int(float(r.semestre)), str(r.curso), int(float(r.quantidade_alunos)))
+            for r in df.itertuples(index=False)
+        ]
+
+    df = tabelas.get('professores')
+    if df is not None:
+        listas = _explodir(df, 'disciplinas').groupby(level=0).agg(list)
+        resultado['professores'] = [
+            Professor(str(nome), listas.get(i, []), carga_maxima=int(float(maxima)))
+            for i, nome, maxima in zip(df.index, df['nome'], df['carga_maxima'])
+        ]
+
+    df = tabelas.get('disciplinas')
+    if df is not None:
+        listas = _explodir(df, 'turmas').groupby(level=0).agg(list)
+        resultado['disciplinas'] = [
+            Disciplina(str(nome), int(float(carga)), listas.get(i, []), frequencia=int(float(freq)),
+                       duracao=int(float(duracao)))
+            for i, nome, carga, freq, duracao in zip(df.index, df['nome'], df['carga_semanal'],
+                                                     df['frequencia'], df['duracao'])
+        ]
+
+    df = tabelas.get('salas')
+    if df is not None:
+        resultado['salas'] = [
+            Sala(str(r.nome), int(float(r.capacidade)), str(r.predio), int(float(r.andar)))
+            for r in df.itertuples(index=False)
+        ]
+
+    return resultado
+
+def importar(tabelas: Dict[str, pd.DataFrame], atuais: Dict[str, List],
+             modo: str = 'acrescentar') -> Tuple[Dict[str, List], pd.DataFrame]:
+    """
+    Valida e, se não houver erros, devolve as novas listas completas
+    atuais: {entidade: lista de objetos em uso}
+    Retorna: (novas listas ou None, erros)
+    """
+    existentes = {e: [obj.nome for obj in atuais.get(e, [])] for e in ENTIDADES}
+    erros = validar(tabelas, existentes, modo)
+    if len(erros):
+        return None, erros
+
+    novos = montar_entidades(tabelas)
+    resultado = {}
+    for entidade in ENTIDADES:
+        if entidade not in tabelas:
+            resultado[entidade] = list(atuais.get(entidade, []))
+        elif modo == 'substituir':
+            resultado[entidade] = novos[entidade]
+        else:
+            resultado[entidade] = list(atuais.get(entidade, [])) + novos[entidade]
+    return resultado, erros
@@ -0,0 +1,167 @@
+"""
+instrumentacao.py - Tempos e contadores dos caminhos quentes
+Cada medição atualiza os agregados em memória (painel de diagnóstico)
+e, com GRAVAR_LOG (app e API), vira uma linha em data/metricas.jsonl.
+cProfile é opcional.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# ============================================================================
+# CONFIGURAÇÃO
+# ============================================================================
+
+LOG_FILE = Path("data") / "metricas.jsonl"
+GRAVAR_LOG = False                 # ligado pelo app e pela API; CLI e lotes não gravam
+MAX_BYTES_LOG = 5 * 1024 * 1024    # acima disso o log vira metricas.jsonl.1 (uma cópia)
+MAX_EVENTOS = 500          # eventos recentes mantidos em memória
+LINHAS_PERFIL = 30         # funções listadas no relatório do cProfile
+
+_lock = threading.Lock()
+_lock_log = threading.Lock()       # só o arquivo: os agregados não esperam o disco
+_agregados: Dict[str, Dict] = {}
+_eventos = deque(maxlen=MAX_EVENTOS)
+_contadores: Dict[str, int] = {}
+ultimo_solver: Optional[Dict] = None
+ultimo_perfil: Optional[str] = None
+
+# ============================================================================
+# REGISTRO
+# ============================================================================
+
+def _gravar(evento: Dict) -> None:
+    """Acrescenta o evento ao log, rodando o arquivo quando passa de MAX_BYTES_LOG"""
+    if not GRAVAR_LOG:
+        return
+    linha = json.dumps(evento, ensure_ascii=False) + '\n'
+    try:
+        with _lock_log:
+            LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+            if LOG_FILE.exists() and LOG_FILE.stat().st_size + len(linha) > MAX_BYTES_LOG:
+                os.replace(LOG_FILE, LOG_FILE.with_name(LOG_FILE.name + '.1'))
+            with open(LOG_FILE, 'a', encoding='utf-8') as f:
+                f.write(linha)
+    except Exception as e:
+        print(f"❌ Erro gravar métrica: {e}")
+
+def registrar(nome: str, segundos: float, **extra) -> None:
+    """Acrescenta uma medição aos agregados e ao log"""
+    evento = {'ts': datetime.now().isoformat(timespec='milliseconds'), 'nome': nome,
+              'ms': round(segundos * 1000, 3), **extra}
+    with _lock:
+        agg = _agregados.setdefault(nome, {'chamadas': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'ultimo_ms': 0.0})
+        agg['chamadas'] += 1
+        agg['total_ms'] += evento['ms']
+        agg['max_ms'] = max(agg['max_ms'], evento['ms'])
+        agg['ultimo_ms'] = evento['ms']
+        _eventos.append(evento)
+    _gravar(evento)
+
+@contextmanager
+def medir(nome: str, **extra):
+    """with medir('solver.solve'): ... - registra o tempo do bloco"""
+    inicio = time.perf_counter()
+    try:
+        yield extra
+    finally:
+        registrar(nome, time.perf_counter() - inicio, **extra)
+
+def cronometrar(nome: str = None) -> Callable:
+    """Decorador: registra o tempo de cada chamada da função"""
+    def decorador(func):
+        rotulo = nome or func.__name__
+
+        @wraps(func)
+        def envolvida(*args, **kwargs):
+            with medir(rotulo):
+                return func(*args, **kwargs)
+        return envolvida
+    return decorador
+
+def contar(nome: str, n: int = 1) -> None:
+    with _lock:
+        _contadores[nome] = _contadores.get(nome, 0) + n
+
+# ============================================================================
+# CP-SAT
+# ============================================================================
+
+def registrar_solver(solver, status: int = None, **extra) -> Dict:
+    """Guarda as estatísticas da resposta do CpSolver (conflitos, ramos, tempo)"""
+    global ultimo_solver
+    stats = {
+        'status': solver.StatusName(status) if status is not None else None,
+        'conflitos': solver.NumConflicts(),
+        'ramos': solver.NumBranches(),
+        'tempo_parede_s': round(solver.WallTime(), 4),
+        'tempo_usuario_s': round(solver.UserTime(), 4),
+        **extra,
+    }
+    try:
+        stats['objetivo'] = solver.ObjectiveValue()
+    except Exception:
+        pass
+    ultimo_solver = stats
+    _gravar({'ts': datetime.now().isoformat(timespec='milliseconds'), 'nome': 'solver.stats', **stats})
+    return stats
+
+# ============================================================================
+# CPROFILE
+# ============================================================================
+
+@contextmanager
+def perfilar(ativo: bool = True, ordenar: str = 'cumulative'):
+    """Captura um cProfile do bloco (quando ativo); o texto fica em ultimo_perfil"""
+    global ultimo_perfil
+    if not ativo:
+        yield
+        return
+    perfil = cProfile.Profile()
+    perfil.enable()
+    try:
+        yield
+    finally:
+        perfil.disable()
+        saida = io.StringIO()
+        pstats.Stats(perfil, stream=saida).sort_stats(ordenar).print_stats(LINHAS_PERFIL)
+        ultimo_perfil = saida.getvalue()
+
+# ============================================================================
+# LEITURA
+# ============================================================================
+
+def resumo() -> List[Dict]:
+    """Agregados por medição, com a média, do mais custoso ao menos"""
+    with _lock:
+        linhas = [{'nome': nome, **agg, 'media_ms': agg['total_ms'] / agg['chamadas']}
+                  for nome, agg in _agregados.items()]
+    return sorted(linhas, key=lambda l: l['total_ms'], reverse=True)
+
+def contadores() -> Dict[str, int]:
+    with _lock:
+        return dict(_contadores)
+
+def eventos(limite: int = 50) -> List[Dict]:
+    with _lock:
+        return list(_eventos)[-limite:][::-1]
+
+def limpar() -> None:
+    """Zera os agregados em memória (o log em disco é mantido)"""
+    global ultimo_solver, ultimo_perfil
+    with _lock:
+        _agregados.clear()
+        _contadores.clear()
+        _eventos.clear()
+    ultimo_solver, ultimo_perfil = None, None
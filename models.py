@@ -3,19 +3,44 @@ models.py - Modelos de dados
 VERSÃO FINAL - Classes bem estruturadas
 """
 
+import os
 import uuid
-from typing import List
+from math import lcm
+from typing import Dict, List, Optional
 
 DIAS_SEMANA = ['segunda', 'terca', 'quarta', 'quinta', 'sexta']
 HORARIOS_REAIS = {0: '08:00-10:00', 1: '10:30-12:30'}
+MAX_HORARIOS_DIA = 12  # teto da opção "horários por dia" (app, cli e api)
+
+# Aceita os nomes completos e as abreviações usadas pelos solvers antigos
+DIA_IDX = {}
+for _i, _dia in enumerate(DIAS_SEMANA):
+    DIA_IDX[_dia] = _i
+    DIA_IDX[_dia[:3]] = _i
+DIA_IDX['terça'] = DIA_IDX['terca']
+
+# Frequência da disciplina: a cada quantas semanas a carga se repete
+FREQUENCIAS = {1: 'Semanal', 2: 'Quinzenal'}
+
+def ciclo_semanas(disciplinas: List['Disciplina']) -> int:
+    """Semanas do ciclo (mmc das frequências); 1 = todas as semanas iguais"""
+    return lcm(1, *(getattr(d, 'frequencia', 1) for d in disciplinas))
+
+def rotulo_horario(horario: int) -> str:
+    """Horário real quando conhecido; senão '3º horário'"""
+    return HORARIOS_REAIS.get(horario, f"{horario + 1}º horário")
+
+def rotulo_semana(semana: Optional[int]) -> str:
+    """None = toda semana; 0, 1, ... = semana A, B, ..."""
+    return '' if semana is None else chr(ord('A') + semana)
 
 # ============================================================================
 # CLASSE: Turma
 # ============================================================================
 
 class Turma:
-    def __init__(self, nome: str, semestre: int, curso: str, quantidade_alunos: int):
-        self.id = str(uuid.uuid4())[:8]
+    def __init__(self, nome: str, semestre: int, curso: str, quantidade_alunos: int, id: str = None):
+        self.id = id or str(uuid.uuid4())[:8]
         self.nome = nome
         self.semestre = semestre
         self.curso = curso
@@ -29,10 +54,12 @@ class Turma:
 # ============================================================================
 
 class Professor:
-    def __init__(self, nome: str, disciplinas: List[str] = None):
-        self.id = str(uuid.uuid4())[:8]
+    def __init__(self, nome: str, disciplinas: List[str] = None, id: str = None,
+                 carga_maxima: int = 0):
+        self.id = id or str(uuid.uuid4())[:8]
         self.nome = nome
         self.disciplinas = disciplinas if disciplinas else []
+        self.carga_maxima = carga_maxima  # aulas por semana (0 = sem limite)
     
     def __repr__(self):
         return f"Professor({self.nome})"
@@ -42,11 +69,14 @@ class Professor:
 # ============================================================================
 
 class Disciplina:
-    def __init__(self, nome: str, carga_semanal: int, turmas: List[str] = None):
-        self.id = str(uuid.uuid4())[:8]
+    def __init__(self, nome: str, carga_semanal: int, turmas: List[str] = None, id: str = None,
+                 frequencia: int = 1, duracao: int = 1):
+        self.id = id or str(uuid.uuid4())[:8]
         self.nome = nome
-        self.carga_semanal = carga_semanal
+        self.carga_semanal = carga_semanal  # aulas em cada ocorrência
         self.turmas = turmas if turmas else []
+        self.frequencia = frequencia        # 1 = semanal, 2 = quinzenal (semanas A/B)
+        self.duracao = duracao              # horários seguidos por aula (2 = geminada)
     
     def __repr__(self):
         return f"Disciplina({self.nome}, {self.carga_semanal}h)"
@@ -56,8 +86,8 @@ class Disciplina:
 # ============================================================================
 
 class Sala:
-    def __init__(self, nome: str, capacidade: int, predio: str, andar: int):
-        self.id = str(uuid.uuid4())[:8]
+    def __init__(self, nome: str, capacidade: int, predio: str, andar: int, id: str = None):
+        self.id = id or str(uuid.uuid4())[:8]
         self.nome = nome
         self.capacidade = capacidade
         self.predio = predio
@@ -71,18 +101,26 @@ class Sala:
 # ============================================================================
 
 class Aula:
-    def __init__(self, disciplina: str, professor: str, sala: str, dia: str, horario: int, turma: str):
-        self.id = str(uuid.uuid4())[:8]
+    def __init__(self, disciplina: str, professor: str, sala: str, dia: str, horario: int, turma: str,
+                 id: str = None, fixada: bool = False, semana: Optional[int] = None):
+        self.id = id or str(uuid.uuid4())[:8]
         self.disciplina = disciplina
         self.professor = professor
         self.sala = sala
         self.dia = dia
         self.horario = horario
         self.turma = turma
+        self.fixada = fixada  # mantida como está na regeração parcial
+        self.semana = semana  # None = toda semana; 0, 1, ... = só na semana A, B, ... do ciclo
     
     def __repr__(self):
         return f"Aula({self.disciplina}, {self.professor}, {self.sala})"
 
+def gerar_ids(n: int) -> List[str]:
+    """n ids curtos (8 hex, como uuid4()[:8]) de uma vez, para criar muitas aulas"""
+    texto = os.urandom(4 * n).hex()
+    return [texto[i:i + 8] for i in range(0, 8 * n, 8)]
+
 # ============================================================================
 # CLASSE: GradeHoraria
 # ============================================================================
@@ -95,5 +133,57 @@ class GradeHoraria:
     def adicionar_aula(self, aula: Aula):
         self.aulas.append(aula)
     
+    def fixar(self, ids: List[str] = None, **filtros) -> int:
+        """
+        Fixa aulas pelo id ou por entidade (ex.: turma=['1A'], dia=['segunda'])
+        Retorna: total de aulas fixadas na grade
+        """
+        ids = set(ids or [])
+        filtros = {campo: set(nomes) for campo, nomes in filtros.items() if nomes}
+        for aula in self.aulas:
+            if aula.id in ids or any(getattr(aula, c) in nomes for c, nomes in filtros.items()):
+                aula.fixada = True
+        return len(self.fixadas())
+    
+    def desfixar(self):
+        for aula in self.aulas:
+            aula.fixada = False
+    
+    def fixadas(self) -> List[Aula]:
+        return [a for a in self.aulas if a.fixada]
+    
     def __repr__(self):
         return f"GradeHoraria({len(self.aulas)} aulas)"
+
+# ============================================================================
+# CLASSE: Registro
+# ============================================================================
+
+class Registro:
+    """Cadastro completo da escola com índices por id e por nome"""
+    
+    def __init__(self, turmas: List[Turma] = None, professores: List[Professor] = None,
+                 disciplinas: List[Disciplina] = None, salas: List[Sala] = None):
+        self.turmas = turmas if turmas else []
+        self.professores = professores if professores else []
+        self.disciplinas = disciplinas if disciplinas else []
+        self.salas = salas if salas else []
+        self.geracao = 0    # seq do banco de onde o cadastro foi lido
+        self.versoes: Dict[str, Dict[str, int]] = {}  # entidade → id → versão
+        self.reindexar()
+    
+    def reindexar(self):
+        """Reconstrói os índices após alterações nas listas"""
+        self.por_id: Dict[str, object] = {}
+        self.por_nome: Dict[str, Dict[str, object]] = {}
+        for entidade in ('turmas', 'professores', 'disciplinas', 'salas'):
+            itens = getattr(self, entidade)
+            self.por_nome[entidade] = {obj.nome: obj for obj in itens}
+            self.por_id.update((obj.id, obj) for obj in itens)
+    
+    def listas(self):
+        return self.turmas, self.professores, self.disciplinas, self.salas
+    
+    def __repr__(self):
+        return (f"Registro({len(self.turmas)} turmas, {len(self.professores)} professores, "
+                f"{len(self.disciplinas)} disciplinas, {len(self.salas)} salas)")
@@ -1,8 +1,9 @@
 import streamlit as st
 from models import Turma, Professor, Disciplina, Sala
-from database import salvar_tudo  # Importação atualizada
+from session_state import init_session_state, salvar_sessao
 
 st.set_page_config(page_title="Dados Rápidos", page_icon="⚡")
+escola = init_session_state()
 
 st.title("⚡ Carregar Dados Padrão")
 st.write("Carregue dados de exemplo para testar rapidamente o sistema")
@@ -11,17 +12,18 @@ col1, col2 = st.columns(2)
 
 with col1:
     if st.button("📚 Carregar Turmas Padrão", use_container_width=True):
-        turmas = [            Turma("6anoA", "6", "matutino"),
-            Turma("6anoB", "6", "matutino"),
-            Turma("7anoA", "7", "matutino"),
-            Turma("7anoB", "7", "matutino"),
-            Turma("8anoA", "8", "matutino"),
-            Turma("8anoB", "8", "matutino"),
+        turmas = [            Turma("6anoA", 1, "EF_II", 25),
+            Turma("6anoB", 1, "EF_II", 25),
+            Turma("7anoA", 1, "EF_II", 25),
+            Turma("7anoB", 1, "EF_II", 25),
+            Turma("8anoA", 1, "EF_II", 25),
+            Turma("8anoB", 1, "EF_II", 25),
         ]
         st.session_state.turmas = turmas
         
         # Atualizado: salvar TUDO mantendo dados existentes
-        salvar_tudo(
+        salvar_sessao(
+            escola,
             turmas,
             st.session_state.get('professores', []),
             st.session_state.get('disciplinas', []),
@@ -40,7 +42,8 @@ with col2:
         st.session_state.professores = professores
         
         # Atualizado: salvar TUDO mantendo dados existentes
-        salvar_tudo(
+        salvar_sessao(
+            escola,
             st.session_state.get('turmas', []),
             professores,
             st.session_state.get('disciplinas', []),
@@ -52,19 +55,20 @@ col1, col2 = st.columns(2)
 
 with col1:
     if st.button("📖 Carregar Disciplinas Padrão", use_container_width=True):
-        disciplinas = [            Disciplina("Português", 4, "media", ["6", "7", "8"], "#D35400", "#FFFFFF"),
-            Disciplina("Matemática", 4, "media", ["6", "7", "8"], "#4A90E2", "#FFFFFF"),
-            Disciplina("Ciências", 3, "media", ["6", "7", "8"], "#1ABC9C", "#000000"),
-            Disciplina("História", 3, "media", ["6", "7", "8"], "#C0392B", "#FFFFFF"),
-            Disciplina("Geografia", 2, "media", ["6", "7", "8"], "#F39C12", "#000000"),
-            Disciplina("Educação Física", 2, "media", ["6", "7", "8"], "#2ECC71", "#000000"),
-            Disciplina("Literatura", 2, "media", ["7", "8"], "#9B59B6", "#FFFFFF"),
-            Disciplina("Biologia", 3, "media", ["8"], "#27AE60", "#FFFFFF"),
+        disciplinas = [            Disciplina("Português", 4, ["6anoA", "6anoB", "7anoA", "7anoB", "8anoA", "8anoB"]),
+            Disciplina("Matemática", 4, ["6anoA", "6anoB", "7anoA", "7anoB", "8anoA", "8anoB"]),
+            Disciplina("Ciências", 3, ["6anoA", "6anoB", "7anoA", "7anoB", "8anoA", "8anoB"]),
+            Disciplina("História", 3, ["6anoA", "6anoB", "7anoA", "7anoB", "8anoA", "8anoB"]),
+            Disciplina("Geografia", 2, ["6anoA", "6anoB", "7anoA", "7anoB", "8anoA", "8anoB"]),
+            Disciplina("Educação Física", 2, ["6anoA", "6anoB", "7anoA", "7anoB", "8anoA", "8anoB"]),
+            Disciplina("Literatura", 2, ["7anoA", "7anoB", "8anoA", "8anoB"]),
+            Disciplina("Biologia", 3, ["8anoA", "8anoB"]),
         ]
         st.session_state.disciplinas = disciplinas
         
         # Atualizado: salvar TUDO mantendo dados existentes
-        salvar_tudo(
+        salvar_sessao(
+            escola,
             st.session_state.get('turmas', []),
             st.session_state.get('professores', []),
             disciplinas,
@@ -74,16 +78,17 @@ with col1:
 
 with col2:
     if st.button("🚪 Carregar Salas Padrão", use_container_width=True):
-        salas = [            Sala("Sala 1", 30, "normal"),
-            Sala("Sala 2", 30, "normal"),
-            Sala("Sala 3", 30, "normal"),
-            Sala("Laboratório", 25, "laboratorio"),
-            Sala("Auditório", 60, "auditorio"),
+        salas = [            Sala("Sala 1", 30, "Bloco A", 0),
+            Sala("Sala 2", 30, "Bloco A", 0),
+            Sala("Sala 3", 30, "Bloco A", 0),
+            Sala("Laboratório", 25, "Bloco B", 1),
+            Sala("Auditório", 60, "Bloco B", 0),
         ]
         st.session_state.salas = salas
         
         # Atualizado: salvar TUDO mantendo dados existentes
-        salvar_tudo(
+        salvar_sessao(
+            escola,
             st.session_state.get('turmas', []),
             st.session_state.get('professores', []),
             st.session_state.get('disciplinas', []),
@@ -94,12 +99,12 @@ with col2:
 st.divider()
 
 if st.button("🚀 Carregar TUDO de Uma Vez", use_container_width=True, type="primary"):
-    turmas = [        Turma("6anoA", "6", "matutino"),
-        Turma("6anoB", "6", "matutino"),
-        Turma("7anoA", "7", "matutino"),
-        Turma("7anoB", "7", "matutino"),
-        Turma("8anoA", "8", "matutino"),
-        Turma("8anoB", "8", "matutino"),
+    turmas = [        Turma("6anoA", 1, "EF_II", 25),
+        Turma("6anoB", 1, "EF_II", 25),
+        Turma("7anoA", 1, "EF_II", 25),
+        Turma("7anoB", 1, "EF_II", 25),
+        Turma("8anoA", 1, "EF_II", 25),
+        Turma("8anoB", 1, "EF_II", 25),
     ]
     
     professores = [        Professor("João Silva", ["Português", "Literatura"]),
@@ -109,21 +114,21 @@ if st.button("🚀 Carregar TUDO de Uma Vez", use_container_width=True, type="pr
         Professor("Pedro Ferreira", ["Educação Física"]),
     ]
     
-    disciplinas = [        Disciplina("Português", 4, "media", ["6", "7", "8"], "#D35400", "#FFFFFF"),
-        Disciplina("Matemática", 4, "media", ["6", "7", "8"], "#4A90E2", "#FFFFFF"),
-        Disciplina("Ciências", 3, "media", ["6", "7", "8"], "#1ABC9C", "#000000"),
-        Disciplina("História", 3, "media", ["6", "7", "8"], "#C0392B", "#FFFFFF"),
-        Disciplina("Geografia", 2, "media", ["6", "7", "8"], "#F39C12", "#000000"),
-        Disciplina("Educação Física", 2, "media", ["6", "7", "8"], "#2ECC71", "#000000"),
-        Disciplina("Literatura", 2, "media", ["7", "8"], "#9B59B6", "#FFFFFF"),
-        Disciplina("Biologia", 3, "media", ["8"], "#27AE60", "#FFFFFF"),
+    disciplinas = [        Disciplina("Português", 4, ["6anoA", "6anoB", "7anoA", "7anoB", "8anoA", "8anoB"]),
+        Disciplina("Matemática", 4, ["6anoA", "6anoB", "7anoA", "7anoB", "8anoA", "8anoB"]),
+        Disciplina("Ciências", 3, ["6anoA", "6anoB", "7anoA", "7anoB", "8anoA", "8anoB"]),
+        Disciplina("História", 3, ["6anoA", "6anoB", "7anoA", "7anoB", "8anoA", "8anoB"]),
+        Disciplina("Geografia", 2, ["6anoA", "6anoB", "7anoA", "7anoB", "8anoA", "8anoB"]),
+        Disciplina("Educação Física", 2, ["6anoA", "6anoB", "7anoA", "7anoB", "8anoA", "8anoB"]),
+        Disciplina("Literatura", 2, ["7anoA", "7anoB", "8anoA", "8anoB"]),
+        Disciplina("Biologia", 3, ["8anoA", "8anoB"]),
     ]
     
-    salas = [        Sala("Sala 1", 30, "normal"),
-        Sala("Sala 2", 30, "normal"),
-        Sala("Sala 3", 30, "normal"),
-        Sala("Laboratório", 25, "laboratorio"),
-        Sala("Auditório", 60, "auditorio"),
+    salas = [        Sala("Sala 1", 30, "Bloco A", 0),
+        Sala("Sala 2", 30, "Bloco A", 0),
+        Sala("Sala 3", 30, "Bloco A", 0),
+        Sala("Laboratório", 25, "Bloco B", 1),
+        Sala("Auditório", 60, "Bloco B", 0),
     ]
     
     st.session_state.turmas = turmas
@@ -131,8 +136,8 @@ if st.button("🚀 Carregar TUDO de Uma Vez", use_container_width=True, type="pr
     st.session_state.disciplinas = disciplinas
     st.session_state.salas = salas
     
-    # Atualizado: usar salvar_tudo() uma única vez
-    salvar_tudo(turmas, professores, disciplinas, salas)
+    # Atualizado: usar salvar_sessao() uma única vez
+    salvar_sessao(escola, turmas, professores, disciplinas, salas)
     
     st.success("✅ Sistema carregado com dados de teste!")
     st.balloons()
@@ -0,0 +1,57 @@
+import streamlit as st
+
+from session_state import init_session_state, salvar_sessao
+from importacao import ENTIDADES, COLUNAS, ler_arquivos, importar, gerar_modelo_xlsx
+
+st.set_page_config(page_title="Importação", page_icon="📥")
+escola = init_session_state()
+
+st.title("📥 Importação em Lote")
+st.write("Importe turmas, professores, disciplinas e salas de arquivos CSV ou XLSX")
+
+with st.expander("ℹ️ Formato esperado"):
+    st.write("XLSX: uma aba por entidade (turmas, professores, disciplinas, salas). "
+             "CSV: um arquivo por entidade, com o nome da entidade no nome do arquivo.")
+    st.write("Listas (disciplinas do professor, turmas da disciplina) separadas por ';'.")
+    for entidade in ENTIDADES:
+        st.write(f"**{entidade}**: {', '.join(COLUNAS[entidade])}")
+    st.download_button("📄 Baixar modelo XLSX", gerar_modelo_xlsx(), "modelo_importacao.xlsx",
+                       "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+arquivos = st.file_uploader("Arquivos", type=["csv", "xlsx"], accept_multiple_files=True)
+modo = st.radio("Modo", ["acrescentar", "substituir"], horizontal=True,
+                help="Substituir troca apenas as entidades presentes nos arquivos")
+
+if arquivos:
+    try:
+        tabelas = ler_arquivos([(a.name, a.getvalue()) for a in arquivos])
+    except Exception as e:
+        st.error(f"❌ Erro ao ler arquivos: {e}")
+        st.stop()
+
+    if not tabelas:
+        st.warning("⚠️ Nenhuma entidade reconhecida nos arquivos")
+        st.stop()
+
+    c = st.columns(len(ENTIDADES))
+    for col, entidade in zip(c, ENTIDADES):
+        with col:
+            st.metric(entidade.capitalize(), len(tabelas[entidade]) if entidade in tabelas else 0)
+
+    atuais = {e: st.session_state.get(e, []) for e in ENTIDADES}
+    resultado, erros = importar(tabelas, atuais, modo)
+
+    if len(erros):
+        st.error(f"❌ {len(erros)} erro(s) encontrados - nada foi importado")
+        st.dataframe(erros, use_container_width=True, hide_index=True)
+        st.download_button("📥 Baixar relatório de erros", erros.to_csv(index=False, encoding='utf-8-sig'),
+                           "erros_importacao.csv", "text/csv")
+    else:
+        st.success("✅ Nenhum erro encontrado")
+        if st.button("🚀 Confirmar importação", type="primary", use_container_width=True):
+            if salvar_sessao(escola, resultado['turmas'], resultado['professores'],
+                             resultado['disciplinas'], resultado['salas']):
+                st.success("✅ Importação concluída!")
+                st.balloons()
+            else:
+                st.error("❌ Erro ao salvar os dados importados")
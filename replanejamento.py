@@ -0,0 +1,145 @@
+"""
+replanejamento.py - Replanejamento emergencial de um dia da grade
+Professores ou salas ficam indisponíveis num dia: só as aulas desse dia
+que usam um deles são deslocadas. Todo o resto fica fixo e um modelo
+CP-SAT pequeno (um booleano por opção horário × professor × sala de cada
+aula deslocada) escolhe o conserto com menos mudanças, em menos de um segundo
+"""
+
+import copy
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Union
+
+import instrumentacao
+from editor_grade import EditorGrade
+from models import Aula, GradeHoraria, Professor, Sala, Turma, DIAS_SEMANA, HORARIOS_REAIS, DIA_IDX
+
+# ============================================================================
+# CONFIGURAÇÃO
+# ============================================================================
+
+TEMPO_MAXIMO = 0.5         # segundos
+SALAS_POR_OPCAO = 3        # salas livres consideradas por (aula, horário, professor)
+
+# Custo de cada mudança (o solver minimiza a soma)
+PESO_SALA = 1
+PESO_HORARIO = 2
+PESO_PROFESSOR = 3
+PESO_DESCOBERTA = 20       # aula sem conserto: cancelada no dia
+
+# ============================================================================
+# REPLANEJAMENTO
+# ============================================================================
+
+def _deslocadas(grade: GradeHoraria, dia: str, professores: set, salas: set) -> List[Aula]:
+    return [a for a in grade.aulas if str(a.dia).lower() == dia and (a.professor in professores or a.sala in salas)]
+
+def replanejar_dia(grade: GradeHoraria, dia: Union[int, str], professores: List[Professor], salas: List[Sala],
+                   turmas: List[Turma] = None, professores_indisponiveis: Iterable[str] = (),
+                   salas_indisponiveis: Iterable[str] = (), tempo_maximo: float = TEMPO_MAXIMO,
+                   n_horarios: int = None) -> Dict:
+    """
+    Conserta o dia com o mínimo de mudanças (a grade original não é alterada)
+    Cada aula deslocada pode trocar de sala, de horário (no mesmo dia) e de
+    professor habilitado; sem opção viável, é cancelada no dia
+    Retorna: {'grade', 'alteracoes', 'descobertas', 'status', 'deslocadas', 'segundos'}
+    """
+    from ortools.sat.python import cp_model
+
+    inicio = time.perf_counter()
+    dia = DIAS_SEMANA[dia] if isinstance(dia, int) else str(dia).lower()
+    if dia not in DIA_IDX:
+        raise ValueError(f"Dia inválido: {dia}")
+    i_dia = DIA_IDX[dia]
+    sem_prof, sem_sala = set(professores_indisponiveis), set(salas_indisponiveis)
+
+    nova = GradeHoraria([copy.copy(a) for a in grade.aulas])
+    deslocadas = _deslocadas(nova, dia, sem_prof, sem_sala)
+    resultado = {'grade': nova, 'alteracoes': [], 'descobertas': [], 'status': None,
+                 'deslocadas': len(deslocadas), 'segundos': 0.0}
+    if not deslocadas:
+        resultado['status'] = 'SEM_MUDANCAS'
+        return resultado
+
+    # Ocupação das aulas que ficam (as deslocadas saem dos índices via `fora`)
+    editor = EditorGrade(nova)
+    fora = {a.id for a in deslocadas}
+    n_horarios = max([n_horarios or len(HORARIOS_REAIS)] + [a.horario + 1 for a in nova.aulas])
+    n_semanas = max([1] + [a.semana + 1 for a in nova.aulas if a.semana is not None])
+    alunos = {t.nome: t.quantidade_alunos for t in (turmas or []) if isinstance(t, Turma)}
+    salas_ok = sorted((s for s in salas if isinstance(s, Sala) and s.nome not in sem_sala),
+                      key=lambda s: s.capacidade)
+    habilitados = defaultdict(list)
+    for p in professores:
+        if isinstance(p, Professor) and p.nome not in sem_prof:
+            for disciplina in p.disciplinas:
+                habilitados[disciplina].append(p.nome)
+
+    model = cp_model.CpModel()
+    opcoes: List[List] = []                  # por aula: [(var, horario, professor, sala)]
+    recursos: Dict[tuple, List] = defaultdict(list)  # (campo, nome, horário, semana) → variáveis
+    termos = []
+    for j, aula in enumerate(deslocadas):
+        semanas = range(n_semanas) if aula.semana is None else [aula.semana]
+        profs = habilitados.get(aula.disciplina, [])
+        if aula.professor not in sem_prof and aula.professor not in profs:
+            profs = [aula.professor] + profs
+        cabe = [s.nome for s in salas_ok if s.capacidade >= alunos.get(aula.turma, 0)]
+
+        lista = []
+        for h in range(n_horarios):
+            if editor.ocupado('turma', aula.turma, i_dia, h, aula.semana, fora):
+                continue
+            livres = [s for s in cabe if not editor.ocupado('sala', s, i_dia, h, aula.semana, fora)]
+            # A sala atual primeiro (sem custo), depois as menores que comportam a turma
+            livres = sorted(livres, key=lambda s: s != aula.sala)[:SALAS_POR_OPCAO]
+            for p in profs:
+                if editor.ocupado('professor', p, i_dia, h, aula.semana, fora):
+                    continue
+                for s in livres:
+                    var = model.NewBoolVar(f"op_{j}_{h}_{p}_{s}")
+                    lista.append((var, h, p, s))
+                    termos.append((PESO_HORARIO * (h != aula.horario) + PESO_PROFESSOR * (p != aula.professor)
+                                   + PESO_SALA * (s != aula.sala)) * var)
+                    for semana in semanas:
+                        for recurso in (('turma', aula.turma), ('professor', p), ('sala', s)):
+                            recursos[(*recurso, h, semana)].append(var)
+
+        descoberta = model.NewBoolVar(f"descoberta_{j}")
+        model.AddExactlyOne([v for v, *_ in lista] + [descoberta])
+        termos.append(PESO_DESCOBERTA * descoberta)
+        opcoes.append(lista)
+
+    # Entre as deslocadas: cada turma, professor e sala no máximo uma vez por horário
+    for variaveis in recursos.values():
+        if len(variaveis) > 1:
+            model.AddAtMostOne(variaveis)
+    model.Minimize(sum(termos))
+    instrumentacao.registrar('replanejamento.modelo', time.perf_counter() - inicio,
+                             deslocadas=len(deslocadas), variaveis=len(model.Proto().variables))
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = tempo_maximo
+    with instrumentacao.medir('replanejamento.solve'):
+        status = solver.Solve(model)
+    instrumentacao.registrar_solver(solver, status, motor='replanejamento')
+    resultado['status'] = solver.StatusName(status)
+    resolvido = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+
+    # ===== APLICAR NA CÓPIA =====
+    for aula, lista in zip(deslocadas, opcoes):
+        escolha = next(((h, p, s) for var, h, p, s in lista if solver.Value(var)), None) if resolvido else None
+        if escolha is None:
+            resultado['descobertas'].append(aula)
+            continue
+        de = {'horario': aula.horario, 'professor': aula.professor, 'sala': aula.sala}
+        aula.horario, aula.professor, aula.sala = escolha
+        para = {'horario': aula.horario, 'professor': aula.professor, 'sala': aula.sala}
+        resultado['alteracoes'].append({'id': aula.id, 'turma': aula.turma, 'disciplina': aula.disciplina,
+                                        'semana': aula.semana, 'de': de, 'para': para})
+
+    canceladas = {a.id for a in resultado['descobertas']}
+    nova.aulas = [a for a in nova.aulas if a.id not in canceladas]
+    resultado['segundos'] = round(time.perf_counter() - inicio, 4)
+    return resultado
@@ -0,0 +1,255 @@
+"""
+scheduler_intervalos.py - Gerador de grade com variáveis de intervalo (CP-SAT)
+Cada aula é um intervalo (início variável, duração fixa) em vez de um
+booleano por célula: aulas geminadas e de durações diferentes cabem no
+mesmo modelo, e os choques viram AddNoOverlap por turma, professor e sala
+"""
+
+import time
+from array import array
+from collections import defaultdict, deque
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+import instrumentacao
+from grade_compacta import GradeCompacta
+from models import Turma, Professor, Disciplina, Sala, Aula, GradeHoraria, DIAS_SEMANA, DIA_IDX
+from simple_scheduler import SimpleGradeHoraria
+
+# ============================================================================
+# CLASSE: GradeIntervalos
+# ============================================================================
+
+class GradeIntervalos(SimpleGradeHoraria):
+    """
+    Mesma interface do SimpleGradeHoraria (fixadas, ciclo de semanas,
+    escolha de professor, fallback); muda só a formulação do modelo
+    Tempo linear: semana × dias × horários, com início sempre dentro de um dia
+    """
+    MOTOR = 'intervalos'
+
+    def __init__(self, turmas: List[Turma], professores: List[Professor],
+                 disciplinas: List[Disciplina], salas: List[Sala], tempo_maximo: float = 10,
+                 progresso: Callable[[str, str], None] = None, n_horarios: int = None,
+                 parametros: Dict = None, exportar=None, chave: str = None, dicas: List[Aula] = None):
+        super().__init__(turmas, professores, disciplinas, salas, tempo_maximo, progresso, n_horarios,
+                         parametros, exportar, chave, dicas)
+        self.por_semana = len(DIAS_SEMANA) * self.n_horarios  # horários por semana
+
+    # ========================================================================
+    # TEMPO
+    # ========================================================================
+
+    def _tempo(self, semana: int, dia: int, horario: int) -> int:
+        return semana * self.por_semana + dia * self.n_horarios + horario
+
+    def _inicios(self, semanas: List[int], duracao: int) -> List[int]:
+        """Inícios válidos: a aula termina no mesmo dia (não atravessa o intervalo entre dias)"""
+        return [self._tempo(s, d, h) for s in semanas for d in range(len(DIAS_SEMANA))
+                for h in range(self.n_horarios - duracao + 1)]
+
+    def _duracoes(self, disciplina: Disciplina, falta: int) -> List[int]:
+        """Divide a carga em aulas da duração da disciplina (a última pode ser menor)"""
+        duracao = min(max(1, getattr(disciplina, 'duracao', 1)), self.n_horarios)
+        return [duracao] * (falta // duracao) + ([falta % duracao] if falta % duracao else [])
+
+    # ========================================================================
+    # DICAS
+    # ========================================================================
+
+    def _dicas_intervalos(self, model, colunas: np.ndarray, presencas: array, atribuicao: Dict[Tuple, Dict]) -> int:
+        """
+        Cada aula da demanda recebe, em ordem, o próximo horário que a
+        referência usava para a mesma (turma, disciplina); uma aula de
+        duração k consome k horários. A sala vem junto quando ainda existe
+        """
+        filas: Dict[Tuple, deque] = defaultdict(deque)
+        for i_t, i_d, dia, horario, i_s, _, semana in sorted(self._linhas_dicas().tolist(),
+                                                             key=lambda l: (l[6], l[2], l[3])):
+            if semana >= self.ciclo:
+                continue
+            filas[(i_t, i_d, semana < 0)].append((self._tempo(max(semana, 0), dia, horario), i_s))
+
+        salas = np.frombuffer(presencas, dtype=np.int64).reshape(len(colunas), -1)
+        indices, valores = [], []
+        for n, (var_inicio, i_t, i_d, _, semanal, duracao) in enumerate(colunas.tolist()):
+            fila = filas.get((i_t, i_d, bool(semanal)))
+            if not fila:
+                continue
+            tempo, i_s = fila[0]
+            for _ in range(min(duracao, len(fila))):
+                fila.popleft()
+            indices.append(var_inicio)
+            valores.append(tempo)
+            if i_s >= 0:
+                indices.extend(salas[n].tolist())
+                valores.extend(int(k == i_s) for k in range(salas.shape[1]))
+        return self._sugerir(model, indices, valores, atribuicao)
+
+    # ========================================================================
+    # GERAÇÃO
+    # ========================================================================
+
+    def gerar_grade(self, fixadas: List[Aula] = None) -> GradeHoraria:
+        """
+        Gera a grade com intervalos opcionais e NoOverlap
+        fixadas: aulas mantidas como estão (intervalos constantes)
+        """
+        fixadas = [self._copiar_fixada(a) for a in (fixadas or [])]
+        grade = GradeHoraria(list(fixadas))
+        self.compacta = None
+
+        if not all([self.turmas, self.professores, self.disciplinas, self.salas]):
+            self.progresso('aviso', "⚠️ Dados insuficientes")
+            return grade
+        longas = sorted(d.nome for d in self.disciplinas if getattr(d, 'duracao', 1) > self.n_horarios)
+        if longas:
+            self.progresso('aviso', f"⚠️ Duração maior que {self.n_horarios} horário(s) por dia, "
+                                    f"aulas limitadas a {self.n_horarios}: {', '.join(longas)}")
+
+        from ortools.sat.python import cp_model
+
+        inicio = time.perf_counter()
+        model = cp_model.CpModel()
+
+        # recurso ('turma' | 'prof' | 'sala', nome) → intervalos que o ocupam
+        intervalos: Dict[Tuple[str, str], List] = defaultdict(list)
+
+        # ===== AULAS FIXADAS (intervalos constantes, um por semana em que valem) =====
+        _, fixas = self._aplicar_fixadas(fixadas)
+        prof_fixado = {(a.turma, a.disciplina): a.professor for a in fixadas}
+        for n, aula in enumerate(fixadas):
+            dia = DIA_IDX.get(str(aula.dia).lower())
+            if dia is None or not 0 <= aula.horario < self.n_horarios:
+                continue
+            semanas = range(self.ciclo) if aula.semana is None else [aula.semana]
+            for semana in semanas:
+                iv = model.NewFixedSizeIntervalVar(self._tempo(semana, dia, aula.horario), 1, f"fixa_{n}_{semana}")
+                for recurso in (('turma', aula.turma), ('prof', aula.professor), ('sala', aula.sala)):
+                    intervalos[recurso].append(iv)
+
+        atribuicao: Dict[Tuple, Dict[str, object]] = {}
+        carga_fixa: Dict[str, int] = defaultdict(int)
+        carga_termos: Dict[str, List] = defaultdict(list)
+
+        # Uma linha por aula, em colunas planas (extração vetorizada):
+        # (índice do início, turma, disciplina, prof | -1, semanal, duração) + presença em cada sala
+        aulas = array('q')
+        presencas = array('q')
+        cod_prof = {p.nome: i for i, p in enumerate(self.professores)}
+
+        # ===== CRIAR VARIÁVEIS =====
+        for i_t, turma in enumerate(self.turmas):
+            for i_d, disciplina in enumerate(self.disciplinas):
+                if turma.nome not in disciplina.turmas:
+                    continue
+
+                prof, escolha = self._atribuir(model, turma, disciplina, prof_fixado,
+                                               atribuicao, carga_fixa, carga_termos)
+                if not prof and not escolha:
+                    continue
+                i_p = cod_prof[prof.nome] if prof else -1
+
+                for bloco, semanas in self._blocos(disciplina):
+                    falta = disciplina.carga_semanal - self._fixas_no_bloco(fixas, turma.nome, disciplina.nome, semanas)
+                    if falta <= 0:
+                        continue
+                    semanas = self._semanas_do_bloco(fixas, turma.nome, disciplina.nome, semanas)
+
+                    # Semanal: início na semana 0, repetido em todas as semanas do ciclo
+                    semanal = semanas == [None]
+                    copias = [k * self.por_semana for k in range(self.ciclo)] if semanal else [0]
+                    anterior = None
+                    # Bloco de várias semanas: todas as aulas na mesma semana (escolhida pelo solver)
+                    semana_bloco = None
+                    if len(semanas) > 1:
+                        semana_bloco = model.NewIntVarFromDomain(cp_model.Domain.FromValues(semanas),
+                                                                 f"semana_{turma.nome}_{disciplina.nome}_{bloco}")
+                    for n, duracao in enumerate(self._duracoes(disciplina, falta)):
+                        nome = f"{turma.nome}_{disciplina.nome}_{bloco}_{n}"
+                        dominio = cp_model.Domain.FromValues(self._inicios([0] if semanal else semanas, duracao))
+                        var_inicio = model.NewIntVarFromDomain(dominio, f"inicio_{nome}")
+                        if semana_bloco is not None:
+                            model.AddDivisionEquality(semana_bloco, var_inicio, self.por_semana)
+
+                        # Aulas iguais da mesma demanda são intercambiáveis: fixa a ordem
+                        if anterior is not None and anterior[1] == duracao:
+                            model.Add(var_inicio >= anterior[0] + duracao)
+                        anterior = (var_inicio, duracao)
+
+                        salas = {s.nome: model.NewBoolVar(f"sala_{nome}_{s.nome}") for s in self.salas}
+                        model.AddExactlyOne(list(salas.values()))
+
+                        for desloc in copias:
+                            ini = var_inicio + desloc
+                            intervalos[('turma', turma.nome)].append(
+                                model.NewFixedSizeIntervalVar(ini, duracao, f"iv_{nome}_{desloc}"))
+                            if prof:
+                                intervalos[('prof', prof.nome)].append(
+                                    model.NewFixedSizeIntervalVar(ini, duracao, f"ivp_{nome}_{desloc}"))
+                            else:
+                                for p_nome, atrib in escolha.items():
+                                    intervalos[('prof', p_nome)].append(model.NewOptionalFixedSizeIntervalVar(
+                                        ini, duracao, atrib, f"ivp_{nome}_{p_nome}_{desloc}"))
+                            for s_nome, presenca in salas.items():
+                                intervalos[('sala', s_nome)].append(model.NewOptionalFixedSizeIntervalVar(
+                                    ini, duracao, presenca, f"ivs_{nome}_{s_nome}_{desloc}"))
+
+                        aulas.extend((var_inicio.Index(), i_t, i_d, i_p, int(semanal), duracao))
+                        presencas.extend(var.Index() for var in salas.values())
+
+        if not aulas:
+            return grade
+        colunas = np.frombuffer(aulas, dtype=np.int64).reshape(-1, 6)
+
+        # ===== RESTRIÇÕES =====
+        # Turma, professor e sala: nenhum par de intervalos se sobrepõe
+        for ivs in intervalos.values():
+            if len(ivs) > 1:
+                model.AddNoOverlap(ivs)
+
+        # Carga máxima dos professores + OBJECTIVE: equilibrar a carga
+        self._carga_professores(model, atribuicao, carga_fixa, carga_termos)
+        self.modelo = model
+
+        # DICAS: inícios e salas da grade de referência
+        n_dicas = self._dicas_intervalos(model, colunas, presencas, atribuicao) if self.dicas else 0
+
+        instrumentacao.registrar('solver.modelo', time.perf_counter() - inicio, motor='intervalos',
+                                 variaveis=len(model.Proto().variables), aulas=len(colunas),
+                                 fixadas=len(fixadas), ciclo=self.ciclo, atribuicoes=len(atribuicao),
+                                 dicas=n_dicas)
+
+        # ===== RESOLVER =====
+        solver, status = self._resolver(model, aulas=len(colunas))
+
+        # ===== EXTRAIR SOLUÇÃO =====
+        inicio = time.perf_counter()
+        if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+            valores = self._valores(solver)
+            semana, resto = np.divmod(valores[colunas[:, 0]], self.por_semana)
+            dia, horario = np.divmod(resto, self.n_horarios)
+            sala = np.argmax(valores[np.frombuffer(presencas, dtype=np.int64).reshape(len(colunas), -1)], axis=1)
+            prof = colunas[:, 3]
+            if atribuicao:
+                escolhido = self._escolhidos(valores, atribuicao)
+                prof = np.where(prof >= 0, prof, escolhido[colunas[:, 1], colunas[:, 2]])
+            semana = np.where(colunas[:, 4] == 1, -1, semana)
+
+            # Aula de duração k → k linhas em horários seguidos
+            duracao = colunas[:, 5]
+            linha = np.repeat(np.arange(len(colunas)), duracao)
+            deslocamento = np.arange(len(linha)) - np.repeat(np.cumsum(duracao) - duracao, duracao)
+            solucao = GradeCompacta.de_colunas(
+                self._nomes(), {'turma': colunas[linha, 1], 'disciplina': colunas[linha, 2],
+                                'professor': prof[linha], 'sala': sala[linha]},
+                dia[linha], horario[linha] + deslocamento, self.n_horarios, semana[linha])
+            grade = self._montar_grade(fixadas, solucao)
+        else:
+            self.progresso('aviso', "⚠️ Nenhuma solução viável encontrada. Gerando grade simples...")
+            grade = self._gerar_grade_simples(fixadas)
+            instrumentacao.contar('solver.fallback')
+        instrumentacao.registrar('solver.extracao', time.perf_counter() - inicio, aulas=len(grade.aulas))
+
+        return grade
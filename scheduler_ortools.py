@@ -2,26 +2,29 @@
 scheduler_ortools.py - Gerador de grade horária com OR-Tools
 """
 
-import streamlit as st
+import importlib.util
 from models import Aula, GradeHoraria, DIAS_SEMANA
-from typing import List, Dict
+from typing import Callable, List, Dict
 
-try:
-    from ortools.sat.python import cp_model
-    ORTOOLS_DISPONIVEL = True
-except ImportError:
-    ORTOOLS_DISPONIVEL = False
+# Só verifica se está instalado; o import (pesado) acontece em gerar()
+ORTOOLS_DISPONIVEL = importlib.util.find_spec("ortools") is not None
+
+
+def _progresso_padrao(nivel: str, mensagem: str) -> None:
+    print(mensagem)
 
 
 class GradeHorariaORTools:
     """Gerador de grade horária com otimização via OR-Tools"""
     
-    def __init__(self):
+    def __init__(self, progresso: Callable[[str, str], None] = None):
+        """progresso(nivel, mensagem) - nivel: 'info', 'sucesso', 'aviso' ou 'erro'"""
         self.grade = GradeHoraria()
         self.erros = []
+        self.progresso = progresso or _progresso_padrao
         
         if not ORTOOLS_DISPONIVEL:
-            st.warning("⚠️ OR-Tools não instalado. Use: pip install ortools")
+            self.progresso('aviso', "⚠️ OR-Tools não instalado. Use: pip install ortools")
     
     def gerar(self, turmas, professores, disciplinas, salas) -> GradeHoraria:
         """
@@ -37,11 +40,13 @@ class GradeHorariaORTools:
             GradeHoraria: Grade horária gerada
         """
         if not ORTOOLS_DISPONIVEL:
-            st.error("❌ OR-Tools não disponível. Instale com: pip install ortools")
+            self.progresso('erro', "❌ OR-Tools não disponível. Instale com: pip install ortools")
             return self.grade
         
+        from ortools.sat.python import cp_model
+        
         try:
-            st.info("⏳ Gerando grade com OR-Tools...")
+            self.progresso('info', "⏳ Gerando grade com OR-Tools...")
             
             # Criar modelo
             model = cp_model.CpModel()
@@ -115,12 +120,12 @@ class GradeHorariaORTools:
                         )
                         self.grade.aulas.append(aula)
                 
-                st.success(f"✅ Grade otimizada gerada com {len(self.grade.aulas)} aulas")
+                self.progresso('sucesso', f"✅ Grade otimizada gerada com {len(self.grade.aulas)} aulas")
             else:
-                st.warning("⚠️ Não foi possível gerar uma grade viável")
+                self.progresso('aviso', "⚠️ Não foi possível gerar uma grade viável")
             
             return self.grade
         
         except Exception as e:
-            st.error(f"❌ Erro ao gerar grade: {str(e)}")
+            self.progresso('erro', f"❌ Erro ao gerar grade: {str(e)}")
             return self.grade
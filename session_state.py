@@ -2,30 +2,60 @@
 session_state.py - Gerenciamento do estado da sessão Streamlit
 """
 
+import uuid
+
 import streamlit as st
 import database
+from escolas import escolas, ESCOLA_PADRAO
 from models import Turma, Professor, Disciplina, Sala
 
+def escola_da_sessao():
+    """Abre a escola escolhida na sessão e ativa o banco dela (padrão se nenhuma)"""
+    escola = escolas.abrir(st.session_state.get('escola', ESCOLA_PADRAO))
+    database.ativar(escola.banco)
+    return escola
+
+def id_sessao() -> str:
+    """Id desta sessão (separa os estados pendentes na gravação adiada da escola)"""
+    if 'id_sessao' not in st.session_state:
+        st.session_state.id_sessao = uuid.uuid4().hex[:8]
+    return st.session_state.id_sessao
+
+def recarregar_sessao(escola):
+    """Listas, geração e versões da sessão relidas da escola (depois de gravar)"""
+    registro = escola.registro()
+    st.session_state.turmas, st.session_state.professores, st.session_state.disciplinas, \
+        st.session_state.salas = registro.listas()
+    st.session_state.geracao = registro.geracao
+    st.session_state.versoes = registro.versoes
+
+def salvar_sessao(escola, turmas, professores, disciplinas, salas) -> bool:
+    """
+    Grava as listas com a geração que a sessão viu (não apaga o que outras
+    sessões incluíram depois), avisa os conflitos e relê a sessão da escola
+    """
+    sucesso = database.salvar_tudo(turmas, professores, disciplinas, salas, st.session_state.get('geracao'))
+    if escola.banco.ultimos_conflitos:
+        st.warning("⚠️ Alterados por outra sessão (não sobrescritos): "
+                   + ", ".join(str(c['nome']) for c in escola.banco.ultimos_conflitos))
+    if sucesso:
+        recarregar_sessao(escola)
+    return sucesso
+
 def init_session_state():
-    """Inicializa o estado da sessão com dados persistidos"""
-    
-    if 'turmas' not in st.session_state:
-        st.session_state.turmas = database.carregar_turmas()
-    
-    if 'professores' not in st.session_state:
-        st.session_state.professores = database.carregar_professores()
-    
-    if 'disciplinas' not in st.session_state:
-        st.session_state.disciplinas = database.carregar_disciplinas()
+    """Inicializa o estado da sessão com dados persistidos (e a geração vista)"""
     
-    if 'salas' not in st.session_state:
-        st.session_state.salas = database.carregar_salas()
+    escola = escola_da_sessao()
+    faltando = [k for k in ('turmas', 'professores', 'disciplinas', 'salas') if k not in st.session_state]
+    if faltando or 'geracao' not in st.session_state:
+        recarregar_sessao(escola)
     
     if 'grade_gerada' not in st.session_state:
         st.session_state.grade_gerada = False
     
     if 'timestamp_ultima_atualizacao' not in st.session_state:
         st.session_state.timestamp_ultima_atualizacao = None
+    return escola
 
 
 def limpar_session_state():
@@ -3,143 +3,480 @@ simple_scheduler.py - Gerador de grade horária com Google OR-Tools
 VERSÃO FINAL - Otimização inteligente
 """
 
-from typing import List, Dict, Set, Tuple
-from ortools.sat.python import cp_model
-from models import Turma, Professor, Disciplina, Sala, Aula, GradeHoraria, DIAS_SEMANA
+import time
+from array import array
+from collections import defaultdict
+from typing import Callable, List, Dict, Optional, Set, Tuple
+import numpy as np
+import ajuste_solver
+import instrumentacao
+from grade_compacta import GradeCompacta
+from models import (Turma, Professor, Disciplina, Sala, Aula, GradeHoraria, DIAS_SEMANA, DIA_IDX, HORARIOS_REAIS,
+                    ciclo_semanas)
+
+def _progresso_padrao(nivel: str, mensagem: str) -> None:
+    """Sem interface: mensagens de progresso vão para o terminal"""
+    print(mensagem)
+
+def _livre(ocupados: Dict[Tuple, Set], chave: Tuple, semana: Optional[int]) -> bool:
+    """
+    Slot livre na semana (None = em todas as semanas do ciclo)
+    ocupados: chave → semanas ocupadas (None = ocupado em todas)
+    """
+    semanas = ocupados.get(chave)
+    if not semanas:
+        return True
+    if None in semanas or semana is None:
+        return False
+    return semana not in semanas
+
 
 class SimpleGradeHoraria:
+    MOTOR = 'simples'
+    
     def __init__(self, turmas: List[Turma], professores: List[Professor], 
-                 disciplinas: List[Disciplina], salas: List[Sala]):
+                 disciplinas: List[Disciplina], salas: List[Sala], tempo_maximo: float = 10,
+                 progresso: Callable[[str, str], None] = None, n_horarios: int = None,
+                 parametros: Dict = None, exportar=None, chave: str = None, dicas: List[Aula] = None):
+        """
+        parametros: SatParameters extras (None = ajuste gravado para o tamanho do modelo)
+        exportar: pasta onde gravar o modelo montado (ajuste_solver), identificado pela chave
+        dicas: grade de referência (ex.: a solução do cenário base) usada como ponto de partida
+        """
+        self.tempo_maximo = tempo_maximo
+        self.parametros = parametros
+        self.exportar = exportar
+        self.chave = chave
+        self.dicas = dicas or []
+        self.n_horarios = n_horarios or len(HORARIOS_REAIS)  # horários por dia
+        self.modelo = None    # último CpModel montado (benchmark/diagnóstico)
+        self.compacta = None  # forma compacta da última grade resolvida pelo CP-SAT
+        self.progresso = progresso or _progresso_padrao
         self.turmas = [t for t in turmas if isinstance(t, Turma)]
         self.professores = [p for p in professores if isinstance(p, Professor)]
         self.disciplinas = [d for d in disciplinas if isinstance(d, Disciplina)]
         self.salas = [s for s in salas if isinstance(s, Sala)]
+        self.ciclo = ciclo_semanas(self.disciplinas)
     
-    def gerar_grade(self) -> GradeHoraria:
-        """Gera grade horária usando OR-Tools CP-SAT"""
-        grade = GradeHoraria()
+    def gerar_grade(self, fixadas: List[Aula] = None) -> GradeHoraria:
+        """
+        Gera grade horária usando OR-Tools CP-SAT
+        fixadas: aulas mantidas como estão (constantes, não variáveis); só o
+        restante da carga é resolvido, nos horários que elas deixam livres
+        """
+        fixadas = [self._copiar_fixada(a) for a in (fixadas or [])]
+        grade = GradeHoraria(list(fixadas))
+        self.compacta = None
         
         # Validação
         if not all([self.turmas, self.professores, self.disciplinas, self.salas]):
-            print("⚠️ Dados insuficientes")
+            self.progresso('aviso', "⚠️ Dados insuficientes")
             return grade
         
+        from ortools.sat.python import cp_model
+        
         # Criar modelo CP-SAT
+        inicio = time.perf_counter()
         model = cp_model.CpModel()
         
-        # Variáveis
-        aulas_vars = {}  # (turma, disciplina, dia, horario, sala, prof) -> variável booleana
+        # Variáveis: uma linha de códigos por booleano, em colunas planas (extração vetorizada)
+        # (índice da variável, turma, disciplina, dia, horario, sala, prof | -1, semana | -1)
+        aulas_vars = array('q')
+        cod_prof = {p.nome: i for i, p in enumerate(self.professores)}
         
         # Dados
         dias_idx = list(range(len(DIAS_SEMANA)))
-        horarios_idx = [0, 1]
+        horarios_idx = list(range(self.n_horarios))
+        
+        # ===== AULAS FIXADAS =====
+        ocupados, fixas = self._aplicar_fixadas(fixadas)
+        prof_fixado = {(a.turma, a.disciplina): a.professor for a in fixadas}
+        restante: Dict[Tuple, int] = {}
+        
+        # Atribuição de professor: uma decisão por (turma, disciplina) com mais de
+        # um habilitado; com um só, o professor é constante como antes
+        atribuicao: Dict[Tuple, Dict[str, object]] = {}      # (turma, disc) → prof → bool
+        carga_fixa: Dict[str, int] = defaultdict(int)        # aulas no ciclo já decididas
+        carga_termos: Dict[str, List] = defaultdict(list)    # termos (aulas × atribuição)
+        
+        # Variáveis agrupadas por recurso/horário (e semana) e por demanda (uma passada)
+        # Semanas iguais são colapsadas: disciplinas semanais têm uma única variável
+        # (semana None) valendo para todo o ciclo; só as quinzenais ganham uma por semana
+        por_turma: Dict[Tuple, Dict] = {}
+        por_prof: Dict[Tuple, Dict] = {}
+        por_sala: Dict[Tuple, Dict] = {}
+        por_demanda: Dict[Tuple, Dict] = {}   # demanda → semana → variáveis
         
         # ===== CRIAR VARIÁVEIS =====
-        for turma in self.turmas:
-            for disciplina in self.disciplinas:
+        for i_t, turma in enumerate(self.turmas):
+            for i_d, disciplina in enumerate(self.disciplinas):
                 if turma.nome not in disciplina.turmas:
                     continue
                 
-                # Encontrar professor da disciplina
-                prof = None
-                for p in self.professores:
-                    if disciplina.nome in p.disciplinas:
-                        prof = p
-                        break
-                
-                if not prof:
+                prof, escolha = self._atribuir(model, turma, disciplina, prof_fixado,
+                                               atribuicao, carga_fixa, carga_termos)
+                if not prof and not escolha:
                     continue
+                i_p = cod_prof[prof.nome] if prof else -1
                 
-                # Criar variáveis para cada combinação possível
-                for dia_idx in dias_idx:
-                    for hora_idx in horarios_idx:
-                        for sala in self.salas:
-                            var_name = f"{turma.nome}_{disciplina.nome}_{dia_idx}_{hora_idx}_{sala.nome}"
-                            aulas_vars[(turma.nome, disciplina.nome, dia_idx, hora_idx, sala.nome, prof.nome)] = \
-                                model.NewBoolVar(var_name)
+                for bloco, semanas in self._blocos(disciplina):
+                    falta = disciplina.carga_semanal - self._fixas_no_bloco(fixas, turma.nome, disciplina.nome, semanas)
+                    if falta <= 0:
+                        continue
+                    semanas = self._semanas_do_bloco(fixas, turma.nome, disciplina.nome, semanas)
+                    
+                    chave_demanda = (turma.nome, disciplina.nome, bloco)
+                    demanda = por_demanda.setdefault(chave_demanda, {s: [] for s in semanas})
+                    restante[chave_demanda] = falta
+                    
+                    # Criar variáveis só para horários livres para turma, professor e sala
+                    for semana in semanas:
+                        for dia_idx in dias_idx:
+                            for hora_idx in horarios_idx:
+                                if not _livre(ocupados, ('turma', turma.nome, dia_idx, hora_idx), semana):
+                                    continue
+                                if prof and not _livre(ocupados, ('prof', prof.nome, dia_idx, hora_idx), semana):
+                                    continue
+                                celula = []
+                                for i_s, sala in enumerate(self.salas):
+                                    if not _livre(ocupados, ('sala', sala.nome, dia_idx, hora_idx), semana):
+                                        continue
+                                    var_name = f"{turma.nome}_{disciplina.nome}_{dia_idx}_{hora_idx}_{sala.nome}_{semana}"
+                                    var = model.NewBoolVar(var_name)
+                                    aulas_vars.extend((var.Index(), i_t, i_d, dia_idx, hora_idx, i_s, i_p,
+                                                       -1 if semana is None else semana))
+                                    celula.append(var)
+                                    demanda[semana].append(var)
+                                    por_turma.setdefault((turma.nome, dia_idx, hora_idx), {}).setdefault(semana, []).append(var)
+                                    por_sala.setdefault((sala.nome, dia_idx, hora_idx), {}).setdefault(semana, []).append(var)
+                                    if prof:
+                                        por_prof.setdefault((prof.nome, dia_idx, hora_idx), {}).setdefault(semana, []).append(var)
+                                
+                                # Professor escolhido no slot: ocupa = aula no slot E atribuído
+                                # (uma variável por candidato e horário, não por sala)
+                                if escolha and celula:
+                                    for p_nome, atrib in escolha.items():
+                                        if not _livre(ocupados, ('prof', p_nome, dia_idx, hora_idx), semana):
+                                            model.Add(sum(celula) + atrib <= 1)
+                                            continue
+                                        ocupa = model.NewBoolVar(f"ocupa_{p_nome}_{turma.nome}_{disciplina.nome}_{dia_idx}_{hora_idx}_{semana}")
+                                        model.Add(ocupa >= sum(celula) + atrib - 1)
+                                        por_prof.setdefault((p_nome, dia_idx, hora_idx), {}).setdefault(semana, []).append(ocupa)
+        
+        if not por_demanda:
+            # Tudo fixado (ou nada a alocar): nada para resolver
+            return grade
         
         # ===== RESTRIÇÕES =====
         
         # 1. Cada turma não pode ter 2 aulas no mesmo horário
-        for turma in self.turmas:
-            for dia_idx in dias_idx:
-                for hora_idx in horarios_idx:
-                    vars_turma_hora = [
-                        var for (t, d, di, h, s, p), var in aulas_vars.items()
-                        if t == turma.nome and di == dia_idx and h == hora_idx
-                    ]
-                    if vars_turma_hora:
-                        model.Add(sum(vars_turma_hora) <= 1)
-        
         # 2. Cada professor não pode ensinar 2 aulas no mesmo horário
-        for professor in self.professores:
-            for dia_idx in dias_idx:
-                for hora_idx in horarios_idx:
-                    vars_prof_hora = [
-                        var for (t, d, di, h, s, p), var in aulas_vars.items()
-                        if p == professor.nome and di == dia_idx and h == hora_idx
-                    ]
-                    if vars_prof_hora:
-                        model.Add(sum(vars_prof_hora) <= 1)
-        
         # 3. Cada sala não pode ter 2 aulas no mesmo horário
-        for sala in self.salas:
-            for dia_idx in dias_idx:
-                for hora_idx in horarios_idx:
-                    vars_sala_hora = [
-                        var for (t, d, di, h, s, p), var in aulas_vars.items()
-                        if s == sala.nome and di == dia_idx and h == hora_idx
-                    ]
-                    if vars_sala_hora:
-                        model.Add(sum(vars_sala_hora) <= 1)
-        
-        # 4. Cumprir carga horária de cada disciplina
-        for turma in self.turmas:
-            for disciplina in self.disciplinas:
-                if turma.nome not in disciplina.turmas:
-                    continue
-                
-                vars_disciplina = [
-                    var for (t, d, di, h, s, p), var in aulas_vars.items()
-                    if t == turma.nome and d == disciplina.nome
-                ]
-                
-                if vars_disciplina:
-                    model.Add(sum(vars_disciplina) == disciplina.carga_semanal)
+        # (em cada semana do ciclo: as semanais contam em todas)
+        for grupo in (por_turma, por_prof, por_sala):
+            for por_semana in grupo.values():
+                semanais = por_semana.get(None, [])
+                especificas = [s for s in por_semana if s is not None]
+                for semana in especificas:
+                    vars_hora = semanais + por_semana[semana]
+                    if len(vars_hora) > 1:
+                        model.Add(sum(vars_hora) <= 1)
+                if len(especificas) < self.ciclo and len(semanais) > 1:
+                    model.Add(sum(semanais) <= 1)
+        
+        # 4. Cumprir carga horária restante de cada disciplina (por bloco de semanas)
+        # Bloco de várias semanas: um booleano por semana, exatamente um ligado,
+        # e a carga toda na semana escolhida
+        for chave, por_semana in por_demanda.items():
+            if len(por_semana) == 1:
+                model.Add(sum(next(iter(por_semana.values()))) == restante[chave])
+                continue
+            escolhas = {s: model.NewBoolVar(f"semana_{chave[0]}_{chave[1]}_{chave[2]}_{s}") for s in por_semana}
+            model.AddExactlyOne(escolhas.values())
+            for semana, vars_semana in por_semana.items():
+                model.Add(sum(vars_semana) == restante[chave] * escolhas[semana])
+        
+        # 5. Carga máxima de cada professor + OBJECTIVE: equilibrar a carga
+        self._carga_professores(model, atribuicao, carga_fixa, carga_termos)
+        self.modelo = model
         
-        # ===== OBJECTIVE: Minimizar conflitos =====
-        model.Minimize(0)  # Sem função objetivo específica, apenas viabilidade
+        colunas = np.frombuffer(aulas_vars, dtype=np.int64).reshape(-1, 8)
+        
+        # 6. DICAS: cada booleano começa no valor que tem na grade de referência
+        n_dicas = 0
+        if self.dicas:
+            referencia = self._linhas_dicas()
+            raios = (len(self.turmas), len(self.disciplinas), len(DIAS_SEMANA), self.n_horarios,
+                     len(self.salas), self.ciclo + 1)
+            chaves = np.ravel_multi_index(tuple((colunas[:, [1, 2, 3, 4, 5, 7]] + [0, 0, 0, 0, 0, 1]).T), raios)
+            validas = referencia[(referencia[:, 4] >= 0) & (referencia[:, 6] < self.ciclo)]
+            ref = np.ravel_multi_index(tuple((validas[:, [0, 1, 2, 3, 4, 6]] + [0, 0, 0, 0, 0, 1]).T), raios)
+            n_dicas = self._sugerir(model, colunas[:, 0], np.isin(chaves, ref), atribuicao)
+        
+        instrumentacao.registrar('solver.modelo', time.perf_counter() - inicio,
+                                 variaveis=len(colunas), fixadas=len(fixadas), ciclo=self.ciclo,
+                                 atribuicoes=len(atribuicao), dicas=n_dicas)
         
         # ===== RESOLVER =====
-        solver = cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = 10
-        status = solver.Solve(model)
+        solver, status = self._resolver(model, variaveis=len(colunas))
         
         # ===== EXTRAIR SOLUÇÃO =====
+        inicio = time.perf_counter()
         if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
-            for (turma_nome, disc_nome, dia_idx, hora_idx, sala_nome, prof_nome), var in aulas_vars.items():
-                if solver.Value(var) == 1:
-                    aula = Aula(
-                        disciplina=disc_nome,
-                        professor=prof_nome,
-                        sala=sala_nome,
-                        dia=DIAS_SEMANA[dia_idx],
-                        horario=hora_idx,
-                        turma=turma_nome
-                    )
-                    grade.adicionar_aula(aula)
+            valores = self._valores(solver)
+            ativas = colunas[valores[colunas[:, 0]] != 0]
+            prof = ativas[:, 6]
+            if atribuicao:
+                escolhido = self._escolhidos(valores, atribuicao)
+                prof = np.where(prof >= 0, prof, escolhido[ativas[:, 1], ativas[:, 2]])
+            solucao = GradeCompacta.de_colunas(
+                self._nomes(), {'turma': ativas[:, 1], 'disciplina': ativas[:, 2], 'professor': prof,
+                                'sala': ativas[:, 5]},
+                ativas[:, 3], ativas[:, 4], self.n_horarios, ativas[:, 7])
+            grade = self._montar_grade(fixadas, solucao)
         else:
-            print("⚠️ Nenhuma solução viável encontrada. Gerando grade simples...")
-            grade = self._gerar_grade_simples()
+            self.progresso('aviso', "⚠️ Nenhuma solução viável encontrada. Gerando grade simples...")
+            grade = self._gerar_grade_simples(fixadas)
+            instrumentacao.contar('solver.fallback')
+        instrumentacao.registrar('solver.extracao', time.perf_counter() - inicio, aulas=len(grade.aulas))
         
         return grade
     
-    def _gerar_grade_simples(self) -> GradeHoraria:
-        """Fallback: gera grade simples sem OR-Tools"""
+    # ========================================================================
+    # SOLVE (comum aos motores CP-SAT)
+    # ========================================================================
+    
+    def _resolver(self, model, **extra):
+        """
+        Resolve com o tempo máximo e os parâmetros do motor (ou os ajustados
+        para o tamanho do modelo); exporta o modelo antes, se pedido
+        Retorna: (solver, status)
+        """
+        from ortools.sat.python import cp_model
+        
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = self.tempo_maximo
+        n_variaveis = len(model.Proto().variables)
+        parametros = self.parametros if self.parametros is not None else ajuste_solver.parametros_ajustados(n_variaveis)
+        ajuste_solver.aplicar_parametros(solver, parametros)
+        if self.exportar:
+            ajuste_solver.exportar_modelo(model, solver, self.exportar, self.chave, self.MOTOR, ciclo=self.ciclo)
+        
+        with instrumentacao.medir('solver.solve', motor=self.MOTOR):
+            status = solver.Solve(model)
+        instrumentacao.registrar_solver(solver, status, motor=self.MOTOR, parametros=parametros, **extra)
+        return solver, status
+    
+    # ========================================================================
+    # EXTRAÇÃO (vetorizada, comum aos motores CP-SAT)
+    # ========================================================================
+    
+    @staticmethod
+    def _valores(solver) -> np.ndarray:
+        """Valores de todas as variáveis numa única cópia (posição = var.Index())"""
+        solucao = solver.ResponseProto().solution
+        return np.fromiter(solucao, dtype=np.int64, count=len(solucao))
+    
+    def _nomes(self) -> Dict[str, List[str]]:
+        """Tabelas de nomes às quais os códigos das variáveis se referem"""
+        return {'turma': [t.nome for t in self.turmas], 'disciplina': [d.nome for d in self.disciplinas],
+                'professor': [p.nome for p in self.professores], 'sala': [s.nome for s in self.salas]}
+    
+    def _escolhidos(self, valores: np.ndarray, atribuicao: Dict[Tuple, Dict]) -> np.ndarray:
+        """Matriz (turma × disciplina) com o código do professor escolhido (-1 = sem escolha)"""
+        cod_t = {t.nome: i for i, t in enumerate(self.turmas)}
+        cod_d = {d.nome: i for i, d in enumerate(self.disciplinas)}
+        cod_p = {p.nome: i for i, p in enumerate(self.professores)}
+        escolhido = np.full((len(self.turmas), len(self.disciplinas)), -1, dtype=np.int64)
+        for (turma, disciplina), escolha in atribuicao.items():
+            nomes = list(escolha)
+            marcado = int(np.argmax(valores[[var.Index() for var in escolha.values()]]))
+            escolhido[cod_t[turma], cod_d[disciplina]] = cod_p[nomes[marcado]]
+        return escolhido
+    
+    def _montar_grade(self, fixadas: List[Aula], solucao: GradeCompacta) -> GradeHoraria:
+        """Grade final (fixadas + solução); a forma compacta fica em self.compacta"""
+        if fixadas:
+            self.compacta = GradeCompacta.de_grade(GradeHoraria(list(fixadas)), self.n_horarios).juntar(solucao)
+        else:
+            self.compacta = solucao
+        return GradeHoraria(list(fixadas) + solucao.para_grade().aulas)
+    
+    # ========================================================================
+    # DICAS (comum aos motores CP-SAT)
+    # ========================================================================
+    
+    def _linhas_dicas(self) -> np.ndarray:
+        """
+        Grade de referência em códigos: (turma, disciplina, dia, horario, sala, prof, semana)
+        Sala ou professor que não existem mais viram -1; aulas de turma ou
+        disciplina removida são descartadas
+        """
+        cod = {campo: {nome: i for i, nome in enumerate(nomes)} for campo, nomes in self._nomes().items()}
+        linhas = []
+        for a in self.dicas:
+            i_t, i_d = cod['turma'].get(a.turma), cod['disciplina'].get(a.disciplina)
+            dia = DIA_IDX.get(str(a.dia).lower())
+            if i_t is None or i_d is None or dia is None or not 0 <= a.horario < self.n_horarios:
+                continue
+            linhas.append((i_t, i_d, dia, a.horario, cod['sala'].get(a.sala, -1),
+                           cod['professor'].get(a.professor, -1), -1 if a.semana is None else a.semana))
+        return np.array(linhas, dtype=np.int64).reshape(-1, 7)
+    
+    def _sugerir(self, model, indices: np.ndarray, valores: np.ndarray, atribuicao: Dict[Tuple, Dict]) -> int:
+        """
+        Grava as dicas no modelo de uma vez (solution_hint do proto), incluindo o
+        professor que a referência usava em cada (turma, disciplina) com escolha
+        Retorna: número de variáveis com dica
+        """
+        indices, valores = np.asarray(indices).tolist(), np.asarray(valores, dtype=np.int64).tolist()
+        professor_ref = {(a.turma, a.disciplina): a.professor for a in self.dicas}
+        for chave, escolha in atribuicao.items():
+            if professor_ref.get(chave) not in escolha:
+                continue
+            for p_nome, var in escolha.items():
+                indices.append(var.Index())
+                valores.append(int(p_nome == professor_ref[chave]))
+        dica = model.Proto().solution_hint
+        dica.vars.extend(indices)
+        dica.values.extend(valores)
+        return len(indices)
+    
+    # ========================================================================
+    # ATRIBUIÇÃO DE PROFESSORES (comum aos motores CP-SAT)
+    # ========================================================================
+    
+    def _atribuir(self, model, turma: Turma, disciplina: Disciplina, prof_fixado: Dict[Tuple, str],
+                  atribuicao: Dict[Tuple, Dict], carga_fixa: Dict[str, int],
+                  carga_termos: Dict[str, List]) -> Tuple[Optional[Professor], Optional[Dict]]:
+        """
+        Professor da (turma, disciplina): constante se há um só candidato,
+        senão um booleano por candidato (exatamente um verdadeiro)
+        Retorna: (professor, None) ou (None, {nome: variável}); (None, None) sem candidatos
+        """
+        candidatos = self._candidatos(disciplina.nome, prof_fixado.get((turma.nome, disciplina.nome)))
+        if not candidatos:
+            return None, None
+        
+        aulas_ciclo = self._aulas_no_ciclo(disciplina)
+        if len(candidatos) == 1:
+            carga_fixa[candidatos[0].nome] += aulas_ciclo
+            return candidatos[0], None
+        
+        escolha = {p.nome: model.NewBoolVar(f"atrib_{turma.nome}_{disciplina.nome}_{p.nome}")
+                   for p in candidatos}
+        model.AddExactlyOne(list(escolha.values()))
+        atribuicao[(turma.nome, disciplina.nome)] = escolha
+        for p_nome, var in escolha.items():
+            carga_termos[p_nome].append(aulas_ciclo * var)
+        return None, escolha
+    
+    def _carga_professores(self, model, atribuicao: Dict[Tuple, Dict], carga_fixa: Dict[str, int],
+                           carga_termos: Dict[str, List]) -> None:
+        """Carga máxima no ciclo (restrição) e menor carga máxima entre os professores (objetivo)"""
+        maior_carga = None
+        if atribuicao:
+            total = sum(self._aulas_no_ciclo(d) * len(d.turmas) for d in self.disciplinas)
+            maior_carga = model.NewIntVar(0, total, "maior_carga")
+            for p in self.professores:
+                termos = carga_termos.get(p.nome)
+                if not termos:
+                    continue
+                carga = carga_fixa[p.nome] + sum(termos)
+                if self._limite(p):
+                    model.Add(carga <= self._limite(p))
+                model.Add(maior_carga >= carga)
+        for p in self.professores:
+            if self._limite(p) and not carga_termos.get(p.nome) and carga_fixa[p.nome] > self._limite(p):
+                self.progresso('aviso', f"⚠️ {p.nome}: {carga_fixa[p.nome] / self.ciclo:g} aulas/semana "
+                                        f"acima do máximo ({p.carga_maxima}) e sem outro professor habilitado")
+        
+        if maior_carga is not None:
+            model.Minimize(maior_carga)
+        else:
+            model.Minimize(0)  # Sem escolha de professor: apenas viabilidade
+    
+    def _candidatos(self, disciplina: str, fixado: str = None) -> List[Professor]:
+        """
+        Professores habilitados na disciplina
+        Com aula fixada, a turma fica com o professor dela
+        """
+        habilitados = [p for p in self.professores if disciplina in p.disciplinas]
+        if fixado:
+            return [p for p in self.professores if p.nome == fixado][:1] or habilitados
+        return habilitados
+    
+    def _limite(self, professor: Professor) -> int:
+        """Carga máxima do professor no ciclo (0 = sem limite)"""
+        return getattr(professor, 'carga_maxima', 0) * self.ciclo
+    
+    def _aulas_no_ciclo(self, disciplina: Disciplina) -> int:
+        """Aulas da disciplina por turma em todo o ciclo"""
+        f = max(1, getattr(disciplina, 'frequencia', 1))
+        return disciplina.carga_semanal * self.ciclo // f
+    
+    def _blocos(self, disciplina: Disciplina) -> List[Tuple[Optional[int], List[Optional[int]]]]:
+        """
+        Blocos de semanas em que a carga da disciplina deve ser cumprida
+        Semanal: um bloco com semana None (vale para todo o ciclo)
+        Frequência f: ciclo/f blocos de f semanas, a carga toda numa das semanas do bloco
+        """
+        f = max(1, getattr(disciplina, 'frequencia', 1))
+        if f == 1:
+            return [(None, [None])]
+        return [(k, list(range(k * f, (k + 1) * f))) for k in range(self.ciclo // f)]
+    
+    @staticmethod
+    def _fixas_no_bloco(fixas: Dict[Tuple, int], turma: str, disciplina: str,
+                        semanas: List[Optional[int]]) -> int:
+        total = sum(fixas.get((turma, disciplina, s), 0) for s in semanas)
+        if None not in semanas:
+            total += fixas.get((turma, disciplina, None), 0)
+        return total
+    
+    @staticmethod
+    def _semanas_do_bloco(fixas: Dict[Tuple, int], turma: str, disciplina: str,
+                          semanas: List[Optional[int]]) -> List[Optional[int]]:
+        """Semanas em que o restante do bloco pode cair: a das aulas fixadas, se houver"""
+        com_fixas = [s for s in semanas if s is not None and fixas.get((turma, disciplina, s))]
+        return com_fixas[:1] or semanas
+    
+    @staticmethod
+    def _copiar_fixada(aula: Aula) -> Aula:
+        return Aula(aula.disciplina, aula.professor, aula.sala, aula.dia, aula.horario, aula.turma,
+                    id=aula.id, fixada=True, semana=getattr(aula, 'semana', None))
+    
+    @staticmethod
+    def _aplicar_fixadas(fixadas: List[Aula]) -> Tuple[Dict[Tuple, Set], Dict[Tuple, int]]:
+        """
+        Horários ocupados pelas aulas fixadas (com as semanas) e quantas aulas
+        fixadas há por (turma, disciplina, semana)
+        Retorna: (ocupados, fixas)
+        """
+        ocupados: Dict[Tuple, Set] = {}
+        fixas: Dict[Tuple, int] = {}
+        for aula in fixadas:
+            dia_idx = DIA_IDX.get(str(aula.dia).lower())
+            if dia_idx is None:
+                continue
+            semana = getattr(aula, 'semana', None)
+            ocupados.setdefault(('turma', aula.turma, dia_idx, aula.horario), set()).add(semana)
+            ocupados.setdefault(('prof', aula.professor, dia_idx, aula.horario), set()).add(semana)
+            ocupados.setdefault(('sala', aula.sala, dia_idx, aula.horario), set()).add(semana)
+            chave = (aula.turma, aula.disciplina, semana)
+            fixas[chave] = fixas.get(chave, 0) + 1
+        
+        return ocupados, fixas
+    
+    def _gerar_grade_simples(self, fixadas: List[Aula] = None) -> GradeHoraria:
+        """Fallback: gera grade simples sem OR-Tools (mantendo as aulas fixadas)"""
         import random
         
-        grade = GradeHoraria()
-        slots_ocupados = set()
+        fixadas = fixadas or []
+        grade = GradeHoraria(list(fixadas))
+        ocupados, fixas = self._aplicar_fixadas(fixadas)
+        prof_fixado = {(a.turma, a.disciplina): a.professor for a in fixadas}
+        cargas: Dict[str, int] = defaultdict(int)
         
         for disciplina in self.disciplinas:
             if not isinstance(disciplina, Disciplina):
@@ -150,36 +487,42 @@ class SimpleGradeHoraria:
                 if not turma:
                     continue
                 
-                professor = self._buscar_professor_disciplina(disciplina.nome)
+                professor = self._escolher_professor(
+                    self._candidatos(disciplina.nome, prof_fixado.get((turma.nome, disciplina.nome))),
+                    self._aulas_no_ciclo(disciplina), cargas)
                 if not professor:
                     continue
                 
-                for _ in range(disciplina.carga_semanal):
-                    aula_criada = False
-                    tentativas = 0
-                    
-                    while not aula_criada and tentativas < 20:
-                        dia = random.choice(DIAS_SEMANA)
-                        horario = random.choice([0, 1])
-                        sala = random.choice(self.salas)
+                for _, semanas in self._blocos(disciplina):
+                    falta = disciplina.carga_semanal - self._fixas_no_bloco(fixas, turma.nome, disciplina.nome, semanas)
+                    semana = random.choice(self._semanas_do_bloco(fixas, turma.nome, disciplina.nome, semanas))
+                    for _ in range(falta):
+                        aula_criada = False
+                        tentativas = 0
                         
-                        slot = (turma.nome, dia, horario)
-                        
-                        if slot not in slots_ocupados:
-                            slots_ocupados.add(slot)
+                        while not aula_criada and tentativas < 20:
+                            dia_idx = random.randrange(len(DIAS_SEMANA))
+                            horario = random.randrange(self.n_horarios)
+                            sala = random.choice(self.salas)
                             
-                            aula = Aula(
-                                disciplina=disciplina.nome,
-                                professor=professor.nome,
-                                sala=sala.nome,
-                                dia=dia,
-                                horario=horario,
-                                turma=turma.nome
-                            )
-                            grade.adicionar_aula(aula)
-                            aula_criada = True
-                        
-                        tentativas += 1
+                            slot = ('turma', turma.nome, dia_idx, horario)
+                            
+                            if _livre(ocupados, slot, semana):
+                                ocupados.setdefault(slot, set()).add(semana)
+                                
+                                aula = Aula(
+                                    disciplina=disciplina.nome,
+                                    professor=professor.nome,
+                                    sala=sala.nome,
+                                    dia=DIAS_SEMANA[dia_idx],
+                                    horario=horario,
+                                    turma=turma.nome,
+                                    semana=semana
+                                )
+                                grade.adicionar_aula(aula)
+                                aula_criada = True
+                            
+                            tentativas += 1
         
         return grade
     
@@ -190,9 +533,12 @@ class SimpleGradeHoraria:
                 return t
         return None
     
-    def _buscar_professor_disciplina(self, disciplina: str) -> Professor:
-        """Busca professor que ensina a disciplina"""
-        for p in self.professores:
-            if isinstance(p, Professor) and disciplina in p.disciplinas:
-                return p
-        return None
+    def _escolher_professor(self, candidatos: List[Professor], aulas: int,
+                            cargas: Dict[str, int]) -> Optional[Professor]:
+        """Candidato menos carregado que ainda comporta as aulas (ou o menos carregado)"""
+        if not candidatos:
+            return None
+        cabem = [p for p in candidatos if not self._limite(p) or cargas[p.nome] + aulas <= self._limite(p)]
+        professor = min(cabem or candidatos, key=lambda p: cargas[p.nome])
+        cargas[professor.nome] += aulas
+        return professor
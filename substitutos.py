@@ -0,0 +1,190 @@
+"""
+substitutos.py - Busca de professores substitutos numa grade gerada
+Índices em bitsets (inteiros do Python) montados uma vez por grade:
+disciplina → professores habilitados, horário → professores ocupados e
+professor → horários ocupados; cada consulta são alguns AND/NOT
+"""
+
+import heapq
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from models import Aula, GradeHoraria, Professor, DIAS_SEMANA, HORARIOS_REAIS, DIA_IDX
+
+# ============================================================================
+# CONFIGURAÇÃO
+# ============================================================================
+
+# Pesos do ranking (menor custo = melhor)
+PESO_FORA_DO_DIA = 3     # não tem aula no dia: teria de vir à escola só para isso
+PESO_SEM_VIZINHA = 1     # sem aula no horário anterior/seguinte (abre janela)
+PESO_OUTRA_TURMA = 1     # não dá aula para a turma
+PESO_ACIMA_MAXIMO = 5    # a substituição passa da carga máxima semanal
+
+# ============================================================================
+# FUNÇÕES AUXILIARES
+# ============================================================================
+
+def _bits(mascara: int):
+    """Posições dos bits ligados, do menor para o maior"""
+    while mascara:
+        menor = mascara & -mascara
+        yield menor.bit_length() - 1
+        mascara ^= menor
+
+def _indice_dia(dia: Union[int, str]) -> int:
+    indice = DIA_IDX.get(str(dia).lower()) if isinstance(dia, str) else dia
+    if indice is None or not 0 <= indice < len(DIAS_SEMANA):
+        raise ValueError(f"Dia inválido: {dia}")
+    return indice
+
+# ============================================================================
+# CLASSE: IndiceSubstitutos
+# ============================================================================
+
+class IndiceSubstitutos:
+    """
+    Bit i de uma máscara de professores = professor i; bit s de uma
+    agenda = slot s = (semana × dias + dia) × horários + horário.
+    Aulas de toda semana ocupam o slot em todas as semanas do ciclo
+    """
+
+    def __init__(self, grade: GradeHoraria, professores: List[Professor], n_horarios: int = None):
+        aulas = list(grade.aulas)
+        self.n_dias = len(DIAS_SEMANA)
+        self.n_horarios = max([n_horarios or len(HORARIOS_REAIS)] + [a.horario + 1 for a in aulas])
+        self.n_semanas = max([1] + [a.semana + 1 for a in aulas if a.semana is not None])
+        n_slots = self.n_semanas * self.n_dias * self.n_horarios
+
+        self.nomes: List[str] = [p.nome for p in professores if isinstance(p, Professor)]
+        self.nomes += sorted({a.professor for a in aulas} - set(self.nomes))
+        self.codigo: Dict[str, int] = {nome: i for i, nome in enumerate(self.nomes)}
+        self.limite: List[int] = [0] * len(self.nomes)
+
+        self.habilitados: Dict[str, int] = {}        # disciplina → professores
+        self.por_turma: Dict[str, int] = {}          # turma → professores que dão aula nela
+        self.ocupados: List[int] = [0] * n_slots     # slot → professores ocupados
+        self.agenda: List[int] = [0] * len(self.nomes)  # professor → slots ocupados
+        self.aulas_slot: Dict[Tuple[int, int, int], List[Aula]] = {}  # (professor, dia, horário) → aulas
+
+        for p in professores:
+            if not isinstance(p, Professor):
+                continue
+            bit = 1 << self.codigo[p.nome]
+            self.limite[self.codigo[p.nome]] = p.carga_maxima or 0
+            for disciplina in p.disciplinas:
+                self.habilitados[disciplina] = self.habilitados.get(disciplina, 0) | bit
+
+        for aula in aulas:
+            dia = DIA_IDX.get(str(aula.dia).lower())
+            if dia is None:
+                continue
+            i_p = self.codigo[aula.professor]
+            self.por_turma[aula.turma] = self.por_turma.get(aula.turma, 0) | (1 << i_p)
+            self.aulas_slot.setdefault((i_p, dia, aula.horario), []).append(aula)
+            for s in self._slots(dia, aula.horario, aula.semana):
+                self.ocupados[s] |= 1 << i_p
+                self.agenda[i_p] |= 1 << s
+
+        # Máscaras de slots fixas: cada dia (todas as semanas) e os vizinhos de cada horário
+        self.mascara_dia = [sum(1 << s for h in range(self.n_horarios)
+                                for s in self._slots(dia, h, None)) for dia in range(self.n_dias)]
+        self.carga = [bin(agenda).count('1') / self.n_semanas for agenda in self.agenda]
+
+    # ========================================================================
+    # ÍNDICES
+    # ========================================================================
+
+    def _slot(self, semana: int, dia: int, horario: int) -> int:
+        return (semana * self.n_dias + dia) * self.n_horarios + horario
+
+    def _slots(self, dia: int, horario: int, semana: Optional[int]) -> List[int]:
+        semanas = range(self.n_semanas) if semana is None else [semana]
+        return [self._slot(s, dia, horario) for s in semanas if s < self.n_semanas]
+
+    def _mascara(self, nomes: Iterable[str]) -> int:
+        mascara = 0
+        for nome in nomes:
+            if nome in self.codigo:
+                mascara |= 1 << self.codigo[nome]
+        return mascara
+
+    # ========================================================================
+    # CONSULTAS
+    # ========================================================================
+
+    def livres(self, disciplina: str, dia: Union[int, str], horario: int, semana: Optional[int] = None,
+               excluir: int = 0) -> int:
+        """Máscara dos habilitados na disciplina livres no slot (em todas as semanas da aula)"""
+        dia = _indice_dia(dia)
+        ocupados = excluir
+        for s in self._slots(dia, horario, semana):
+            ocupados |= self.ocupados[s]
+        return self.habilitados.get(disciplina, 0) & ~ocupados
+
+    def _ranquear(self, aula: Aula, dia: int, livres: int, k: int) -> List[Dict]:
+        vizinhas = 0
+        for h in (aula.horario - 1, aula.horario + 1):
+            if 0 <= h < self.n_horarios:
+                for s in self._slots(dia, h, aula.semana):
+                    vizinhas |= 1 << s
+        turma = self.por_turma.get(aula.turma, 0)
+
+        candidatos = []
+        for i in _bits(livres):
+            agenda = self.agenda[i]
+            no_dia = bool(agenda & self.mascara_dia[dia])
+            vizinha = bool(agenda & vizinhas)
+            mesma_turma = bool(turma >> i & 1)
+            acima = bool(self.limite[i]) and self.carga[i] + 1 > self.limite[i]
+            custo = (PESO_FORA_DO_DIA * (not no_dia) + PESO_SEM_VIZINHA * (not vizinha)
+                     + PESO_OUTRA_TURMA * (not mesma_turma) + PESO_ACIMA_MAXIMO * acima)
+            candidatos.append((custo, self.carga[i], self.nomes[i], no_dia, mesma_turma))
+
+        return [{'professor': nome, 'custo': custo, 'aulas_semana': carga, 'no_dia': no_dia,
+                 'mesma_turma': mesma_turma}
+                for custo, carga, nome, no_dia, mesma_turma in heapq.nsmallest(k, candidatos)]
+
+    def substitutos(self, professor: str, dia: Union[int, str], horario: int, k: int = 5) -> List[Dict]:
+        """
+        Substitutos para cada aula do professor no slot (quinzenais A/B são aulas distintas)
+        Retorna: [{'aula', 'candidatos': [...]}]; vazio se ele não tem aula no slot
+        """
+        dia = _indice_dia(dia)
+        i_p = self.codigo.get(professor)
+        if i_p is None:
+            return []
+        resultado = []
+        for aula in self.aulas_slot.get((i_p, dia, horario), []):
+            livres = self.livres(aula.disciplina, dia, horario, aula.semana, excluir=1 << i_p)
+            resultado.append({'aula': aula, 'candidatos': self._ranquear(aula, dia, livres, k)})
+        return resultado
+
+    def cobrir_ausencias(self, ausentes: Iterable[str], dia: Union[int, str], k: int = 5) -> List[Dict]:
+        """
+        Todas as aulas dos ausentes no dia, em ordem de horário, cada uma com o
+        substituto sugerido: o melhor candidato ainda não escalado naquele horário
+        Retorna: [{'aula', 'ausente', 'substituto' | None, 'candidatos': [...]}]
+        """
+        dia = _indice_dia(dia)
+        ausentes = list(ausentes)
+        excluir = self._mascara(ausentes)
+        escalados: Dict[int, int] = {}  # slot → substitutos já escolhidos
+
+        aulas = [(aula.horario, -1 if aula.semana is None else aula.semana, nome, aula)
+                 for nome in ausentes if nome in self.codigo
+                 for h in range(self.n_horarios)
+                 for aula in self.aulas_slot.get((self.codigo[nome], dia, h), [])]
+        resultado = []
+        for horario, _, nome, aula in sorted(aulas, key=lambda linha: linha[:3]):
+            slots = self._slots(dia, horario, aula.semana)
+            ja_escalados = 0
+            for s in slots:
+                ja_escalados |= escalados.get(s, 0)
+            livres = self.livres(aula.disciplina, dia, horario, aula.semana, excluir=excluir | ja_escalados)
+            candidatos = self._ranquear(aula, dia, livres, k)
+            substituto = candidatos[0]['professor'] if candidatos else None
+            if substituto:
+                for s in slots:
+                    escalados[s] = escalados.get(s, 0) | (1 << self.codigo[substituto])
+            resultado.append({'aula': aula, 'ausente': nome, 'substituto': substituto, 'candidatos': candidatos})
+        return resultado
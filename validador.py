@@ -0,0 +1,225 @@
+"""
+validador.py - Verificação de qualquer GradeHoraria depois de pronta
+Trabalha sobre a GradeCompacta: choques, carga horária e restrições
+de cadastro são detectados com bincount/indexação, sem laços por aula
+"""
+
+from typing import Dict, List, Union
+
+import numpy as np
+
+from models import (Disciplina, Professor, Sala, Turma, GradeHoraria, DIAS_SEMANA, HORARIOS_REAIS,
+                    ciclo_semanas, rotulo_semana)
+from grade_compacta import GradeCompacta
+
+# ============================================================================
+# CONFIGURAÇÃO
+# ============================================================================
+
+CAMPOS_CHOQUE = ('turma', 'professor', 'sala')
+
+# Tipos de problema
+CHOQUE = 'choque'
+CARGA = 'carga'
+HORARIO_INVALIDO = 'horario_invalido'
+NAO_HABILITADO = 'nao_habilitado'
+CAPACIDADE = 'capacidade'
+DESCONHECIDO = 'desconhecido'
+
+# Tipos que impedem gravar a grade
+TIPOS_BLOQUEANTES = (CHOQUE, HORARIO_INVALIDO)
+
+# ============================================================================
+# CLASSE: RelatorioValidacao
+# ============================================================================
+
+class RelatorioValidacao:
+    """Problemas encontrados, um dict por linha (tipo, campo, nome, detalhe, ...)"""
+
+    def __init__(self, total_aulas: int = 0):
+        self.total_aulas = total_aulas
+        self.problemas: List[Dict] = []
+
+    def adicionar(self, tipo: str, campo: str, nome: str, detalhe: str, **extra):
+        self.problemas.append({'tipo': tipo, 'campo': campo, 'nome': nome, 'detalhe': detalhe, **extra})
+
+    def contagem(self) -> Dict[str, int]:
+        """Número de problemas por tipo"""
+        contagem: Dict[str, int] = {}
+        for p in self.problemas:
+            contagem[p['tipo']] = contagem.get(p['tipo'], 0) + 1
+        return contagem
+
+    def bloqueantes(self) -> List[Dict]:
+        return [p for p in self.problemas if p['tipo'] in TIPOS_BLOQUEANTES]
+
+    @property
+    def valido(self) -> bool:
+        """Sem choques nem horários inválidos (avisos de carga/cadastro não bloqueiam)"""
+        return not self.bloqueantes()
+
+    def __repr__(self):
+        return f"RelatorioValidacao({self.total_aulas} aulas, {self.contagem() or 'sem problemas'})"
+
+# ============================================================================
+# VERIFICAÇÕES
+# ============================================================================
+
+def _rotulo_slot(dia: int, horario: int) -> str:
+    return f"{DIAS_SEMANA[dia]} {HORARIOS_REAIS.get(horario, horario)}"
+
+def _choques(compacta: GradeCompacta, relatorio: RelatorioValidacao) -> None:
+    """Entidade com mais de uma aula no mesmo dia/horário (em alguma semana do ciclo)"""
+    for campo in CAMPOS_CHOQUE:
+        por_semana = compacta.ocupacao_por_semana(campo)
+        ocup = por_semana.max(axis=1)
+        for codigo, dia, horario in np.argwhere(ocup > 1):
+            semanas = np.flatnonzero(por_semana[codigo, :, dia, horario] > 1)
+            quando = _rotulo_slot(dia, horario)
+            if len(semanas) < compacta.n_semanas:
+                quando += " (semana " + "/".join(rotulo_semana(int(s)) for s in semanas) + ")"
+            relatorio.adicionar(
+                CHOQUE, campo, compacta.nomes[campo][codigo],
+                f"{int(ocup[codigo, dia, horario])} aulas em {quando}",
+                dia=DIAS_SEMANA[dia], horario=int(horario), aulas=int(ocup[codigo, dia, horario])
+            )
+
+def _horarios_invalidos(compacta: GradeCompacta, relatorio: RelatorioValidacao, n_horarios: int) -> None:
+    """Dia fora de DIAS_SEMANA ou horário fora dos n_horarios do dia"""
+    invalidas = (compacta.dia < 0) | (compacta.horario < 0) | (compacta.horario >= n_horarios)
+    for i in np.flatnonzero(invalidas):
+        aula = compacta.aula(i)
+        relatorio.adicionar(HORARIO_INVALIDO, 'turma', aula.turma,
+                            f"{aula.disciplina}: dia '{aula.dia if compacta.dia[i] >= 0 else '?'}' "
+                            f"horário {aula.horario}")
+
+def _carga(compacta: GradeCompacta, disciplinas: List[Disciplina], relatorio: RelatorioValidacao) -> None:
+    """
+    Aulas por (turma, disciplina) comparadas com a carga cadastrada
+    Semanais contam uma vez; as de frequência f somam carga × ciclo/f no ciclo
+    """
+    n_t, n_d = len(compacta.nomes['turma']), len(compacta.nomes['disciplina'])
+    contagem = np.bincount(compacta.codigos['turma'].astype(np.int64) * n_d + compacta.codigos['disciplina'],
+                           minlength=n_t * n_d).reshape(n_t, n_d)
+    esperado = np.zeros((n_t, n_d), dtype=np.int64)
+    ausentes = []  # pares cadastrados sem nenhuma aula na grade
+    ciclo = ciclo_semanas(disciplinas)
+
+    for d in disciplinas:
+        cod_d = compacta.indices['disciplina'].get(d.nome)
+        f = max(1, getattr(d, 'frequencia', 1))
+        carga = d.carga_semanal * (ciclo // f if f > 1 else 1)
+        for turma in d.turmas:
+            cod_t = compacta.indices['turma'].get(turma)
+            if cod_t is None or cod_d is None:
+                if carga > 0:
+                    ausentes.append((turma, d.nome, carga))
+            else:
+                esperado[cod_t, cod_d] = carga
+
+    for cod_t, cod_d in np.argwhere(contagem != esperado):
+        tem, deveria = int(contagem[cod_t, cod_d]), int(esperado[cod_t, cod_d])
+        turma, disciplina = compacta.nomes['turma'][cod_t], compacta.nomes['disciplina'][cod_d]
+        detalhe = (f"{disciplina}: {tem}/{deveria} aulas" if deveria
+                   else f"{disciplina}: {tem} aulas sem carga cadastrada para a turma")
+        relatorio.adicionar(CARGA, 'turma', turma, detalhe, disciplina=disciplina,
+                            aulas=tem, carga=deveria)
+
+    for turma, disciplina, carga in ausentes:
+        relatorio.adicionar(CARGA, 'turma', turma, f"{disciplina}: 0/{carga} aulas",
+                            disciplina=disciplina, aulas=0, carga=carga)
+
+def _carga_professores(compacta: GradeCompacta, professores: List[Professor], ciclo: int,
+                       relatorio: RelatorioValidacao) -> None:
+    """Aulas por semana (média do ciclo) acima da carga máxima do professor"""
+    n_p = len(compacta.nomes['professor'])
+    peso = np.where(compacta.semana < 0, ciclo, 1)
+    no_ciclo = np.bincount(compacta.codigos['professor'], weights=peso, minlength=n_p)
+    for p in professores:
+        maxima = getattr(p, 'carga_maxima', 0)
+        i = compacta.indices['professor'].get(p.nome)
+        if maxima > 0 and i is not None and no_ciclo[i] > maxima * ciclo:
+            semanal = no_ciclo[i] / ciclo
+            relatorio.adicionar(CARGA, 'professor', p.nome, f"{semanal:g} aulas/semana, máximo {maxima}",
+                                aulas=float(semanal), carga=maxima)
+
+def _cadastro(compacta: GradeCompacta, turmas: List[Turma], professores: List[Professor],
+              salas: List[Sala], relatorio: RelatorioValidacao) -> None:
+    """Professor habilitado na disciplina, sala comporta a turma, nomes cadastrados"""
+    nomes = compacta.nomes
+    cod_t, cod_p = compacta.codigos['turma'], compacta.codigos['professor']
+    cod_d, cod_s = compacta.codigos['disciplina'], compacta.codigos['sala']
+
+    cadastrados = {'turma': turmas, 'professor': professores, 'sala': salas}
+    for campo, lista in cadastrados.items():
+        if lista is None:
+            continue
+        conhecidos = {obj.nome for obj in lista}
+        for nome in nomes[campo]:
+            if nome not in conhecidos:
+                relatorio.adicionar(DESCONHECIDO, campo, nome, "não está cadastrado(a)")
+
+    if professores is not None:
+        habilitado = np.zeros((len(nomes['professor']), len(nomes['disciplina'])), dtype=bool)
+        conhecidos = np.zeros(len(nomes['professor']), dtype=bool)
+        for p in professores:
+            i = compacta.indices['professor'].get(p.nome)
+            if i is None:
+                continue
+            conhecidos[i] = True
+            for d in p.disciplinas:
+                j = compacta.indices['disciplina'].get(d)
+                if j is not None:
+                    habilitado[i, j] = True
+        erradas = conhecidos[cod_p] & ~habilitado[cod_p, cod_d]
+        pares = np.unique(cod_p[erradas].astype(np.int64) * len(nomes['disciplina']) + cod_d[erradas])
+        for par in pares:
+            p, d = divmod(int(par), len(nomes['disciplina']))
+            relatorio.adicionar(NAO_HABILITADO, 'professor', nomes['professor'][p],
+                                f"leciona {nomes['disciplina'][d]} sem estar habilitado(a)",
+                                disciplina=nomes['disciplina'][d])
+
+    if turmas is not None and salas is not None:
+        alunos = np.full(len(nomes['turma']), -1, dtype=np.int64)
+        for t in turmas:
+            if t.nome in compacta.indices['turma']:
+                alunos[compacta.indices['turma'][t.nome]] = t.quantidade_alunos
+        capacidade = np.full(len(nomes['sala']), -1, dtype=np.int64)
+        for s in salas:
+            if s.nome in compacta.indices['sala']:
+                capacidade[compacta.indices['sala'][s.nome]] = s.capacidade
+        # -1 = desconhecido (já reportado acima); capacidade 0 = não informada
+        lotadas = (alunos[cod_t] > 0) & (capacidade[cod_s] > 0) & (alunos[cod_t] > capacidade[cod_s])
+        pares = np.unique(cod_s[lotadas].astype(np.int64) * len(nomes['turma']) + cod_t[lotadas])
+        for par in pares:
+            s, t = divmod(int(par), len(nomes['turma']))
+            relatorio.adicionar(CAPACIDADE, 'sala', nomes['sala'][s],
+                                f"{nomes['turma'][t]} tem {alunos[t]} alunos, capacidade {capacidade[s]}",
+                                turma=nomes['turma'][t])
+
+# ============================================================================
+# ENTRADA
+# ============================================================================
+
+def validar_grade(grade: Union[GradeHoraria, GradeCompacta], turmas: List[Turma] = None,
+                  professores: List[Professor] = None, disciplinas: List[Disciplina] = None,
+                  salas: List[Sala] = None, n_horarios: int = None) -> RelatorioValidacao:
+    """
+    Valida uma grade (ou sua forma compacta)
+    Choques e horários sempre; carga e cadastro quando as listas são informadas
+    n_horarios: horários por dia do motor (padrão: os da própria grade)
+    """
+    compacta = grade if isinstance(grade, GradeCompacta) else GradeCompacta.de_grade(grade)
+    relatorio = RelatorioValidacao(len(compacta))
+    if not len(compacta):
+        return relatorio
+
+    _choques(compacta, relatorio)
+    _horarios_invalidos(compacta, relatorio, n_horarios or compacta.n_horarios)
+    if disciplinas is not None:
+        _carga(compacta, disciplinas, relatorio)
+    if professores is not None:
+        ciclo = ciclo_semanas(disciplinas) if disciplinas is not None else compacta.n_semanas
+        _carga_professores(compacta, professores, ciclo, relatorio)
+    _cadastro(compacta, turmas, professores, salas, relatorio)
+    return relatorio